@@ -0,0 +1,364 @@
+"""
+Non-interactive batch scraping
+
+	python scrape.py links --input urls.txt --concurrency 64 --out results.jsonl.zst --db
+
+URLs are streamed from a file (plain or .gz) or stdin, one per line, and
+scraped by a pool of threads with the regular extractor classes. Each result
+is written to the output as it finishes, one JSON object per line (plain,
+.gz, or .zst with the optional zstandard package). With --db, results are
+handed to a single writer thread that saves them through the database
+service, so scraping never waits on the database. Progress and throughput
+go to stderr.
+
+Exit codes: 0 every URL succeeded, 1 some URLs or database writes failed,
+2 invalid arguments, 3 input, output or database could not be opened,
+130 interrupted, 141 the output was closed early (e.g. piped into head).
+"""
+
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scraper.element_extractor import ElementExtractor
+from scraper.link_extractor import LinkExtractor
+from scraper.email_extractor import EmailExtractor
+from scraper.image_extractor import ImageExtractor
+from monitoring.metrics import crawl_metrics
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+EXIT_INTERRUPTED = 130
+# What shells report for a process killed by SIGPIPE
+EXIT_BROKEN_PIPE = 141
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL = 1.0
+
+EXTRACTORS = {
+	"elements": ElementExtractor,
+	"links": LinkExtractor,
+	"emails": EmailExtractor,
+	"images": ImageExtractor,
+}
+
+class _TimeoutAdapter(HTTPAdapter):
+	"""HTTP adapter applying a default timeout, so one stalled host cannot hold a worker forever"""
+
+	def __init__(self, timeout: float, **kwargs):
+		self.timeout = timeout
+		super().__init__(**kwargs)
+
+	def send(self, request, **kwargs):
+		if kwargs.get("timeout") is None:
+			kwargs["timeout"] = self.timeout
+		return super().send(request, **kwargs)
+
+def create_session(concurrency: int, timeout: float) -> requests.Session:
+	"""HTTP session shared by the worker threads, with a connection pool sized to match"""
+	session = requests.Session()
+	session.headers.update({"User-Agent": USER_AGENT})
+	adapter = _TimeoutAdapter(timeout, pool_connections=concurrency, pool_maxsize=concurrency)
+	session.mount("http://", adapter)
+	session.mount("https://", adapter)
+	return session
+
+def create_database_service(db_type: str, db_name: Optional[str]):
+	"""Database service configured like the interactive CLI's"""
+	from database.config import DatabaseConfig
+	from database.service import DatabaseService
+	from database.sharding import ShardedDatabaseService
+
+	shards = DatabaseConfig.get_sqlite_shards() if db_type == "sqlite" else 1
+	if shards > 1:
+		return ShardedDatabaseService(shards=shards, db_name=db_name or "web_scraper.db")
+	return DatabaseService(db_type=db_type, db_name=db_name)
+
+def open_input(path: str) -> IO[str]:
+	"""URL source: stdin for "-", gzip-decompressed for .gz paths"""
+	if path == "-":
+		return sys.stdin
+	if path.endswith(".gz"):
+		return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+	return open(path, encoding="utf-8", errors="replace")
+
+def open_output(path: str) -> IO[str]:
+	"""Result sink: stdout for "-", compressed by the .gz or .zst extension"""
+	if path == "-":
+		return sys.stdout
+	if path.endswith(".gz"):
+		return gzip.open(path, "wt", encoding="utf-8")
+	if path.endswith(".zst"):
+		import zstandard
+		return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, "wb")), encoding="utf-8")
+	return open(path, "w", encoding="utf-8")
+
+def _close(stream: IO[str]):
+	# stdin and stdout stay open for the rest of the process
+	if stream not in (sys.stdin, sys.stdout):
+		stream.close()
+
+def _discard_stdout(stream: IO[str]):
+	"""Point a broken stdout at devnull, so flushing it again at exit cannot fail the process"""
+	if stream is not sys.stdout:
+		return
+	try:
+		os.dup2(os.open(os.devnull, os.O_WRONLY), stream.fileno())
+	except (OSError, ValueError):
+		pass
+
+def iter_urls(lines) -> Iterator[str]:
+	"""URLs of an input stream, skipping blank lines and # comments"""
+	for line in lines:
+		url = line.strip()
+		if url and not url.startswith("#"):
+			yield url
+
+class DatabaseWriter:
+	"""Single thread saving results to the database, fed through a bounded queue"""
+
+	def __init__(self, extractor, max_pending: int):
+		self.extractor = extractor
+		# Bounded, so a slow database slows the crawl down instead of filling memory
+		self.queue = queue.Queue(max_pending)
+		self.saved = 0
+		self.errors = 0
+		self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+
+	def start(self) -> "DatabaseWriter":
+		crawl_metrics.watch_queue("db_writer", self.queue)
+		self._thread.start()
+		return self
+
+	def put(self, result: Dict[str, Any]):
+		self.queue.put(result)
+
+	def close(self):
+		"""Save what is still queued, then stop the thread"""
+		self.queue.put(None)
+		self._thread.join()
+		crawl_metrics.watch_queue("db_writer", None)
+
+	def _run(self):
+		while True:
+			result = self.queue.get()
+			if result is None:
+				return
+			try:
+				self.extractor.save_result(result)
+				self.saved += 1
+			except Exception as e:
+				self.errors += 1
+				logger.error(f"Failed to save {result['url']} to database: {e}")
+
+class Progress:
+	"""Progress and throughput line on stderr"""
+
+	def __init__(self, stream: IO[str], enabled: bool = True):
+		self.stream = stream
+		self.enabled = enabled
+		self.started = time.perf_counter()
+		self.last = 0.0
+		self.done = 0
+		self.failed = 0
+
+	def record(self, success: bool):
+		self.done += 1
+		self.failed += 0 if success else 1
+
+	def line(self, in_flight: int = 0, pending_writes: Optional[int] = None) -> str:
+		elapsed = time.perf_counter() - self.started
+		rate = self.done / elapsed if elapsed else 0.0
+		text = f"{self.done} done, {self.failed} failed, {in_flight} in flight, {rate:.1f} URLs/s"
+		if pending_writes is not None:
+			text += f", {pending_writes} queued for database"
+		return text
+
+	def show(self, in_flight: int = 0, pending_writes: Optional[int] = None, final: bool = False):
+		now = time.perf_counter()
+		if not self.enabled or (not final and now - self.last < PROGRESS_INTERVAL):
+			return
+		self.last = now
+		self.stream.write(("\r" if self.stream.isatty() else "") + self.line(in_flight, pending_writes)
+						+ ("\n" if final or not self.stream.isatty() else ""))
+		self.stream.flush()
+
+def _record(result: Dict[str, Any]) -> Dict[str, Any]:
+	return {key: result.get(key) for key in ("url", "scraper_type", "success", "data", "error", "duration_ms")}
+
+def run(args: argparse.Namespace) -> int:
+	"""Scrape every input URL; returns the exit code"""
+	try:
+		source = open_input(args.input)
+	except OSError as e:
+		print(f"Cannot open input {args.input}: {e}", file=sys.stderr)
+		return EXIT_FATAL
+
+	try:
+		sink = open_output(args.out)
+	except (OSError, ImportError) as e:
+		print(f"Cannot open output {args.out}: {e}", file=sys.stderr)
+		_close(source)
+		return EXIT_FATAL
+
+	database_service = None
+	if args.db:
+		try:
+			database_service = create_database_service(args.db_type, args.db_name)
+		except Exception as e:
+			print(f"Cannot open database: {e}", file=sys.stderr)
+			_close(sink)
+			_close(source)
+			return EXIT_FATAL
+
+	session = create_session(args.concurrency, args.timeout)
+	if args.command == "elements":
+		extractor = ElementExtractor(session, args.selector, database_service)
+	else:
+		extractor = EXTRACTORS[args.command](session, database_service)
+
+	server = None
+	if args.dashboard_port is not None:
+		from monitoring.server import MetricsServer
+		try:
+			server = MetricsServer(port=args.dashboard_port).start()
+			print(f"Live crawl dashboard at {server.url}", file=sys.stderr)
+		except OSError as e:
+			# The dashboard is only an aid; scrape without it
+			print(f"Live crawl dashboard unavailable: {e}", file=sys.stderr)
+
+	writer = DatabaseWriter(extractor, args.concurrency * 4).start() if database_service else None
+	progress = Progress(sys.stderr, enabled=not args.quiet)
+	urls = iter_urls(source)
+	pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="scrape")
+	# Submitted URLs whose result has not been written yet
+	running = set()
+	interrupted = False
+	broken_pipe = False
+
+	def emit(future):
+		nonlocal broken_pipe
+		result = future.result()
+		if not broken_pipe:
+			try:
+				sink.write(json.dumps(_record(result), ensure_ascii=False) + "\n")
+			except BrokenPipeError:
+				# The reader is gone: stop scraping, but still save what has finished
+				broken_pipe = True
+				_discard_stdout(sink)
+		progress.record(result["success"])
+		if writer:
+			writer.put(result)
+
+	try:
+		# Keep a bounded window of submitted URLs, so inputs are streamed rather than read upfront
+		window = args.concurrency * 2
+		exhausted = False
+		while (running or not exhausted) and not broken_pipe:
+			while not exhausted and len(running) < window:
+				url = next(urls, None)
+				if url is None:
+					exhausted = True
+				else:
+					running.add(pool.submit(extractor.scrape_and_save, url))
+
+			finished, _ = wait(running, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+			for future in finished:
+				emit(future)
+				running.discard(future)
+			progress.show(min(len(running), args.concurrency), writer.queue.qsize() if writer else None)
+	except KeyboardInterrupt:
+		interrupted = True
+	finally:
+		# When stopped early, drop queued URLs but let requests already in flight finish
+		pool.shutdown(wait=True, cancel_futures=interrupted or broken_pipe)
+		for future in running:
+			if not future.cancelled():
+				emit(future)
+		if writer:
+			writer.close()
+		try:
+			_close(sink)
+		except BrokenPipeError:
+			broken_pipe = True
+		_close(source)
+		if server:
+			server.stop()
+		if database_service:
+			database_service.close()
+
+	progress.show(final=True)
+	if writer:
+		print(f"{writer.saved} saved to database, {writer.errors} failed", file=sys.stderr)
+	if interrupted:
+		return EXIT_INTERRUPTED
+	if broken_pipe:
+		return EXIT_BROKEN_PIPE
+	if progress.failed or (writer and writer.errors):
+		return EXIT_PARTIAL
+	return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(
+		prog="scrape",
+		description="Scrape many URLs non-interactively, streaming results as JSON lines",
+	)
+	common = argparse.ArgumentParser(add_help=False)
+	common.add_argument("--input", "-i", default="-",
+						help="File of URLs, one per line (.gz allowed); - reads stdin (default)")
+	common.add_argument("--out", "-o", default="-",
+						help="JSONL output; .gz and .zst are compressed; - writes stdout (default)")
+	common.add_argument("--concurrency", "-c", type=_positive_int, default=8,
+						help="Concurrent requests (default: 8)")
+	common.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds (default: 30)")
+	common.add_argument("--db", action="store_true", help="Also save results to the database")
+	common.add_argument("--db-type", choices=("sqlite", "mysql", "postgresql"), default="sqlite",
+						help="Database backend for --db (default: sqlite)")
+	common.add_argument("--db-name", help="SQLite database file for --db (default: web_scraper.db)")
+	common.add_argument("--dashboard-port", type=int, metavar="PORT",
+						help="Serve the live crawl dashboard on this port while running")
+	common.add_argument("--quiet", "-q", action="store_true", help="No progress on stderr")
+	common.add_argument("--verbose", "-v", action="count", default=0,
+						help="Log failures (-v) or every request (-vv) to stderr")
+
+	commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+	elements = commands.add_parser("elements", parents=[common], help="Extract elements by CSS selector")
+	elements.add_argument("--selector", "-s", required=True, help="CSS selector of the elements")
+	commands.add_parser("links", parents=[common], help="Extract all links")
+	commands.add_parser("emails", parents=[common], help="Extract email addresses")
+	commands.add_parser("images", parents=[common], help="Extract image URLs")
+	return parser
+
+def _positive_int(value: str) -> int:
+	number = int(value)
+	if number < 1:
+		raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+	return number
+
+def main(argv: Optional[List[str]] = None) -> int:
+	args = build_parser().parse_args(argv)
+	# Failures are recorded in the output; only log them when asked to
+	logging.basicConfig(level=(logging.CRITICAL, logging.ERROR, logging.INFO)[min(args.verbose, 2)],
+						format="%(levelname)s %(name)s: %(message)s")
+	return run(args)
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,11 +1,13 @@
 import requests, json, sys, os
+from datetime import datetime
 from scraper.element_extractor import ElementExtractor
 from scraper.link_extractor import LinkExtractor
 from scraper.sitemap_generator import SitemapGenerator
 from scraper.email_extractor import EmailExtractor
 from scraper.image_extractor import ImageExtractor
 from database.service import DatabaseService
-from visualization import DataVisualizer, ReportGenerator
+from database.sharding import ShardedDatabaseService
+from database.config import DatabaseConfig
 
 class bcolors:
 	HEADER = '\033[95m'
@@ -34,6 +36,7 @@ options = (
 	+ bcolors.OKBLUE + "7. View database statistics\n"
 	+ bcolors.OKBLUE + "8. Configure database settings\n"
 	+ bcolors.WARNING + "9. Generate data visualizations\n"
+	+ bcolors.WARNING + "m. Start live crawl dashboard\n"
 	+ bcolors.WARNING + "q. Quit\n"
 	+ bcolors.ENDC
 )
@@ -53,6 +56,9 @@ class WebScraperCLI:
 			"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
 		})
 
+		# Live crawl dashboard, started on request
+		self.metrics_server = None
+
 		# Initialize database service
 		self.db_service = None
 		self.db_enabled = False
@@ -61,10 +67,15 @@ class WebScraperCLI:
 	def _initialize_database(self):
 		"""Initialize database service with default SQLite configuration"""
 		try:
-			self.db_service = DatabaseService(db_type="sqlite")
+			shards = DatabaseConfig.get_sqlite_shards()
+			if shards > 1:
+				self.db_service = ShardedDatabaseService(shards=shards)
+			else:
+				self.db_service = DatabaseService(db_type="sqlite")
 			if self.db_service.test_connection():
 				self.db_enabled = True
-				print(bcolors.OKGREEN + "✓ Database initialized successfully (SQLite)" + bcolors.ENDC)
+				mode = f"SQLite, {shards} shards" if shards > 1 else "SQLite"
+				print(bcolors.OKGREEN + f"✓ Database initialized successfully ({mode})" + bcolors.ENDC)
 			else:
 				print(bcolors.WARNING + "⚠ Database connection failed, running in file-only mode" + bcolors.ENDC)
 		except Exception as e:
@@ -89,16 +100,17 @@ class WebScraperCLI:
 			'7': self.handle_view_statistics,
 			'8': self.handle_configure_database,
 			'9': self.handle_visualizations,
+			'm': self.handle_live_dashboard,
 		}
 
 		while True:
 			print(options)
 			try:
-				choice = input(bcolors.OKGREEN + "Choose an option (1 - 9, or 'q' to quit): " + bcolors.ENDC).strip()
+				choice = input(bcolors.OKGREEN + "Choose an option (1 - 9, m, or 'q' to quit): " + bcolors.ENDC).strip()
 				if choice.lower() == 'q':
 					exit_message()
-				elif choice in choice_actions:
-					choice_actions[choice]()
+				elif choice.lower() in choice_actions:
+					choice_actions[choice.lower()]()
 				else:
 					print("Invalid option. Please try again.")
 			except KeyboardInterrupt:
@@ -213,6 +225,15 @@ class WebScraperCLI:
 	def handle_generate_sitemap(self):
 		"""Prompt user to generate a sitemap from extracted links."""
 		url = input(bcolors.OKGREEN + "Enter the URL of the page to scrape links for sitemap: " + bcolors.ENDC).strip()
+
+		if self.db_enabled:
+			from_db = input(bcolors.OKGREEN + "Use links stored in the database for this URL? (y/n): " + bcolors.ENDC).strip().lower()
+			if from_db == 'y':
+				filename = input(bcolors.OKGREEN + "Enter the filename for the sitemap (default: sitemap.xml): " + bcolors.ENDC).strip() or "sitemap.xml"
+				# Stream links straight from the database into the file
+				SitemapGenerator().generate(self.db_service.iter_links(url or None), filename)
+				return
+
 		extractor = LinkExtractor(self.session)
 		links = extractor.scrape(url)
 		if links:
@@ -356,6 +377,19 @@ class WebScraperCLI:
 		else:
 			print(bcolors.FAIL + "✗ Database connection failed" + bcolors.ENDC)
 
+	def handle_live_dashboard(self):
+		"""Serve live crawl metrics over HTTP while extractions run from this menu"""
+		from monitoring.server import MetricsServer, DEFAULT_PORT
+
+		if self.metrics_server is None:
+			port = input(bcolors.OKGREEN + f"Port (default: {DEFAULT_PORT}): " + bcolors.ENDC).strip()
+			try:
+				self.metrics_server = MetricsServer(port=int(port) if port else DEFAULT_PORT).start()
+			except (ValueError, OSError) as e:
+				print(bcolors.FAIL + f"✗ Could not start live dashboard: {str(e)}" + bcolors.ENDC)
+				return
+		print(bcolors.OKGREEN + f"✓ Live crawl dashboard running at {self.metrics_server.url}" + bcolors.ENDC)
+
 	def handle_visualizations(self):
 		"""Generate data visualizations and analytics"""
 		if not self.db_enabled:
@@ -370,12 +404,27 @@ class WebScraperCLI:
 		print("5. Generate data volume charts")
 		print("6. Create success rate analysis")
 		print("7. Generate comprehensive HTML report")
-		print("8. Back to main menu")
+		print("8. Build offline dashboard bundle")
+		print("9. Back to main menu")
 
 		choice = input(bcolors.OKGREEN + "Choose visualization option: " + bcolors.ENDC).strip()
+		if choice == '9':
+			return
+		if choice not in ('1', '2', '3', '4', '5', '6', '7', '8'):
+			print("Invalid choice.")
+			return
+
+		since = input(bcolors.OKGREEN + "Only include sessions since (YYYY-MM-DD, or press Enter for all history): " + bcolors.ENDC).strip()
+		try:
+			since = datetime.strptime(since, "%Y-%m-%d") if since else None
+		except ValueError:
+			print(bcolors.FAIL + f"✗ Invalid date: {since}" + bcolors.ENDC)
+			return
 
 		try:
-			visualizer = DataVisualizer(self.db_service)
+			# pandas, matplotlib and plotly take seconds to import, so load them on first use
+			from visualization import DataVisualizer
+			visualizer = DataVisualizer(self.db_service, since=since)
 
 			if choice == '1':
 				self._generate_all_visualizations(visualizer)
@@ -392,9 +441,7 @@ class WebScraperCLI:
 			elif choice == '7':
 				self._generate_html_report(visualizer)
 			elif choice == '8':
-				return
-			else:
-				print("Invalid choice.")
+				self._create_dashboard_bundle(visualizer)
 		except ImportError as e:
 			print(bcolors.FAIL + f"✗ Visualization dependencies not installed: {str(e)}" + bcolors.ENDC)
 			print(bcolors.WARNING + "Please install required packages: pip install matplotlib seaborn plotly pandas" + bcolors.ENDC)
@@ -501,6 +548,7 @@ class WebScraperCLI:
 		"""Generate comprehensive HTML report"""
 		print(bcolors.OKGREEN + "Generating comprehensive HTML report..." + bcolors.ENDC)
 
+		from visualization import ReportGenerator
 		report_generator = ReportGenerator(visualizer)
 		report_path = report_generator.generate_html_report()
 
@@ -513,6 +561,21 @@ class WebScraperCLI:
 		else:
 			print(bcolors.WARNING + "HTML report generation failed." + bcolors.ENDC)
 
+	def _create_dashboard_bundle(self, visualizer):
+		"""Build the tabbed dashboard of all charts and the report"""
+		print(bcolors.OKGREEN + "Building dashboard bundle..." + bcolors.ENDC)
+
+		bundle_path = visualizer.create_dashboard_bundle()
+
+		if bundle_path:
+			print(bcolors.OKGREEN + f"✓ Dashboard bundle created: {bundle_path}" + bcolors.ENDC)
+
+			open_bundle = input(bcolors.OKGREEN + "Open dashboard in browser? (y/n): " + bcolors.ENDC).strip().lower()
+			if open_bundle == 'y':
+				os.system(f"xdg-open {bundle_path}")
+		else:
+			print(bcolors.WARNING + "Dashboard bundle creation failed or no data available." + bcolors.ENDC)
+
 def main():
 	cli = WebScraperCLI()
 	cli.run()
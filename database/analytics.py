@@ -0,0 +1,208 @@
+"""
+Aggregations behind the analytics charts
+
+The chart aggregates read the hourly and daily session rollups
+(session_rollups), which are maintained as sessions are written, so their
+cost grows with the number of hours and groups rather than with the number of
+sessions. Rows are plain dicts of group keys and additive measures (counts and
+sums); rates and averages are derived by the caller, which also lets the
+sharded service merge per-shard results by summing.
+"""
+
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import case, cast, extract, func, select, union_all, Integer
+from sqlalchemy.orm import Session
+
+from .models import (
+	ScrapingSession, ExtractedElements, ExtractedLinks, ExtractedEmails, ExtractedImages,
+	SessionSnapshot, SessionRollup
+)
+from .repository import chunked, rollup_bucket
+
+MEASURES = ("sessions", "successful", "results", "duration_ms_sum", "timed_sessions")
+
+def _measures() -> List:
+	"""Sessions, successful sessions, stored results and measured durations of a group"""
+	return [
+		func.sum(SessionRollup.sessions).label("sessions"),
+		func.sum(case((SessionRollup.status == "success", SessionRollup.sessions), else_=0)).label("successful"),
+		func.sum(SessionRollup.results).label("results"),
+		func.sum(SessionRollup.duration_ms_sum).label("duration_ms_sum"),
+		func.sum(SessionRollup.timed_sessions).label("timed_sessions"),
+	]
+
+def _rollups(statement, since: Optional[datetime], granularity: str = "day"):
+	"""Restrict to one granularity; since is applied at hour resolution"""
+	if since is not None:
+		granularity = "hour"
+		statement = statement.where(SessionRollup.bucket >= rollup_bucket("hour", since))
+	return statement.where(SessionRollup.granularity == granularity)
+
+def _filtered(statement, since: Optional[datetime]):
+	if since is not None:
+		statement = statement.where(ScrapingSession.timestamp >= since)
+	return statement
+
+def _as_date(value) -> Optional[date]:
+	# SQLite returns date() as text
+	if isinstance(value, str):
+		return date.fromisoformat(value)
+	if isinstance(value, datetime):
+		return value.date()
+	return value
+
+def _rows(db_session: Session, statement, keys: List[str]) -> List[Dict]:
+	rows = []
+	for row in db_session.execute(statement):
+		values = dict(zip(keys, row))
+		for measure in MEASURES:
+			if measure in values:
+				values[measure] = int(values[measure] or 0)
+		rows.append(values)
+	return rows
+
+def daily_counts(db_session: Session, since: Optional[datetime] = None) -> List[Dict]:
+	"""Sessions per day and extraction type"""
+	day = func.date(SessionRollup.bucket)
+	statement = _rollups(
+		select(day, SessionRollup.scraper_type, *_measures())
+		.group_by(day, SessionRollup.scraper_type)
+		.order_by(day, SessionRollup.scraper_type), since)
+
+	rows = _rows(db_session, statement, ["date", "scraper_type", *MEASURES])
+	for row in rows:
+		row["date"] = _as_date(row["date"])
+	return rows
+
+def domain_totals(db_session: Session, since: Optional[datetime] = None, limit: Optional[int] = None) -> List[Dict]:
+	"""Sessions per domain, busiest domains first"""
+	sessions = func.sum(SessionRollup.sessions)
+	statement = _rollups(
+		select(SessionRollup.domain, *_measures())
+		.group_by(SessionRollup.domain)
+		.order_by(sessions.desc(), SessionRollup.domain), since)
+	if limit is not None:
+		statement = statement.limit(limit)
+	return _rows(db_session, statement, ["domain", *MEASURES])
+
+def activity_by_hour(db_session: Session, since: Optional[datetime] = None) -> List[Dict]:
+	"""Sessions per weekday (0 = Monday) and hour of day"""
+	dialect = db_session.get_bind().dialect.name
+	bucket = SessionRollup.bucket
+	if dialect == "sqlite":
+		hour = cast(func.strftime("%H", bucket), Integer)
+		# %w counts from Sunday
+		weekday = (cast(func.strftime("%w", bucket), Integer) + 6) % 7
+	elif dialect == "mysql":
+		hour = func.hour(bucket)
+		weekday = func.weekday(bucket)
+	else:
+		hour = cast(extract("hour", bucket), Integer)
+		# ISO day of week counts from Monday = 1
+		weekday = cast(extract("isodow", bucket), Integer) - 1
+
+	statement = _rollups(
+		select(weekday, hour, *_measures())
+		.group_by(weekday, hour)
+		.order_by(weekday, hour), since, granularity="hour")
+	rows = _rows(db_session, statement, ["weekday", "hour", *MEASURES])
+	for row in rows:
+		row["weekday"], row["hour"] = int(row["weekday"]), int(row["hour"])
+	return rows
+
+def type_totals(db_session: Session, since: Optional[datetime] = None) -> List[Dict]:
+	"""Sessions per extraction type"""
+	statement = _rollups(
+		select(SessionRollup.scraper_type, *_measures())
+		.group_by(SessionRollup.scraper_type)
+		.order_by(SessionRollup.scraper_type), since)
+	return _rows(db_session, statement, ["scraper_type", *MEASURES])
+
+def domain_count(db_session: Session, since: Optional[datetime] = None) -> List[Dict]:
+	"""Number of distinct domains, as a single row"""
+	statement = _rollups(select(func.count(func.distinct(SessionRollup.domain))), since)
+	return [{"domains": int(db_session.execute(statement).scalar() or 0)}]
+
+def top_errors(db_session: Session, since: Optional[datetime] = None, limit: Optional[int] = None) -> List[Dict]:
+	"""Most frequent error messages of failed sessions (not rolled up, read from the sessions)"""
+	occurrences = func.count(ScrapingSession.id)
+	statement = _filtered(
+		select(ScrapingSession.error_message, occurrences.label("sessions"))
+		.where(ScrapingSession.status == "failed")
+		.group_by(ScrapingSession.error_message)
+		.order_by(occurrences.desc(), ScrapingSession.error_message), since)
+	if limit is not None:
+		statement = statement.limit(limit)
+	rows = _rows(db_session, statement, ["error_message", "sessions"])
+	for row in rows:
+		row["error_message"] = row["error_message"] or ""
+	return rows
+
+def session_result_counts(db_session: Session, session_ids: List[int]) -> Dict[int, int]:
+	"""
+	Stored rows per session across all extraction tables, one grouped query per chunk of IDs
+
+	Per-table counts are combined with UNION ALL and summed in the database;
+	change-tracked sessions contribute their snapshot's item count.
+	"""
+	counts = {session_id: 0 for session_id in session_ids}
+	for chunk in chunked(list(counts)):
+		parts = [
+			select(model.session_id.label("session_id"), func.count().label("rows"))
+			.where(model.session_id.in_(chunk))
+			.group_by(model.session_id)
+			for model in (ExtractedElements, ExtractedLinks, ExtractedEmails, ExtractedImages)
+		]
+		parts.append(
+			select(SessionSnapshot.session_id.label("session_id"), SessionSnapshot.item_count.label("rows"))
+			.where(SessionSnapshot.session_id.in_(chunk))
+		)
+		per_table = union_all(*parts).subquery()
+		statement = (select(per_table.c.session_id, func.sum(per_table.c.rows))
+					.group_by(per_table.c.session_id))
+		for session_id, rows in db_session.execute(statement):
+			counts[session_id] = int(rows or 0)
+	return counts
+
+def _busiest(field: str) -> Callable[[Dict], Tuple]:
+	return lambda row: (-row["sessions"], row[field])
+
+# name -> (aggregate, group key fields, row limit, sort key of merged rows or None to sort by keys)
+AGGREGATES: Dict[str, Tuple[Callable, Tuple[str, ...], Optional[int], Optional[Callable]]] = {
+	"daily_counts": (daily_counts, ("date", "scraper_type"), None, None),
+	"domain_totals": (domain_totals, ("domain",), 50, _busiest("domain")),
+	"activity_by_hour": (activity_by_hour, ("weekday", "hour"), None, None),
+	"type_totals": (type_totals, ("scraper_type",), None, None),
+	# Sharding keeps each domain on one shard, so per-shard counts add up
+	"domain_count": (domain_count, (), None, None),
+	"top_errors": (top_errors, ("error_message",), 5, _busiest("error_message")),
+}
+
+# Aggregates whose groups can span shards: their row limit only holds after the merge
+CROSS_SHARD_AGGREGATES = {"top_errors"}
+
+def compute_aggregate(db_session: Session, name: str, since: Optional[datetime] = None,
+					limited: bool = True) -> List[Dict]:
+	"""Run one of the AGGREGATES, with its row limit unless limited is False"""
+	aggregate, _, limit, _ = AGGREGATES[name]
+	if limit is None or not limited:
+		return aggregate(db_session, since=since)
+	return aggregate(db_session, since=since, limit=limit)
+
+def merge_aggregates(name: str, results: List[List[Dict]]) -> List[Dict]:
+	"""Combine the rows of one aggregate computed on several databases by summing the measures"""
+	_, keys, limit, sort_key = AGGREGATES[name]
+	merged = {}
+	for rows in results:
+		for row in rows:
+			key = tuple(row[field] for field in keys)
+			if key not in merged:
+				merged[key] = dict(row)
+				continue
+			for field, value in row.items():
+				if field not in keys:
+					merged[key][field] += value
+
+	rows = sorted(merged.values(), key=sort_key or (lambda row: tuple(row[field] for field in keys)))
+	return rows if limit is None else rows[:limit]
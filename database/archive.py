@@ -0,0 +1,405 @@
+"""
+Columnar export and archiving of extraction tables
+
+Streams sessions and their extracted rows into Hive-partitioned Parquet files
+(<table>/date=YYYY-MM-DD/scraper_type=<type>/part-*.parquet) that pandas,
+pyarrow.dataset, DuckDB or Spark can read directly, and optionally removes the
+exported sessions from the operational database afterwards. Shards of a
+sharded database write below an extra shard=<index> level, since their
+session IDs are shard-local.
+
+Change-tracked sessions keep their items as snapshot deltas instead of
+extraction rows; their rebuilt item lists are exported as snapshot_items.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy import select, func, delete
+from sqlalchemy.orm import aliased
+import logging
+
+try:
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+except ImportError:  # optional dependency, checked when an exporter is created
+	pa = None
+	pq = None
+
+from .models import (
+	ScrapingSession, ScrapedData, ExtractedElements, ExtractedLinks,
+	ExtractedEmails, ExtractedImages, UrlDictionary, SessionSnapshot, SnapshotDelta, EntitySighting
+)
+from .repository import StatisticsRepository, ChangeTrackingRepository, chunked
+
+logger = logging.getLogger(__name__)
+
+# Tables with rows belonging to a session, and the statistics counter tracking each
+CHILD_TABLES = {
+	"extracted_elements": (ExtractedElements, "total_elements"),
+	"extracted_links": (ExtractedLinks, "total_links"),
+	"extracted_emails": (ExtractedEmails, "total_emails"),
+	"extracted_images": (ExtractedImages, "total_images"),
+}
+
+EXPORT_TABLES = ["scraping_sessions", *CHILD_TABLES]
+
+# Dataset of the rebuilt item lists of change-tracked sessions, one row per item
+SNAPSHOT_ITEMS = "snapshot_items"
+
+def _table_columns(table: str) -> List[Tuple[str, Any, Any]]:
+	"""(name, SQL expression, arrow type) of the exported columns of a table"""
+	if table == "scraping_sessions":
+		return [
+			("id", ScrapingSession.id, pa.int64()),
+			("url", ScrapingSession.url, pa.string()),
+			("status", ScrapingSession.status, pa.string()),
+			("error_message", ScrapingSession.error_message, pa.string()),
+			("extra_data", ScrapingSession.extra_data, pa.string()),
+			("domain", ScrapingSession.domain, pa.string()),
+			("result_count", ScrapingSession.result_count, pa.int64()),
+			("duration_ms", ScrapingSession.duration_ms, pa.int64()),
+		]
+
+	model = CHILD_TABLES[table][0]
+	columns = [
+		("id", model.id, pa.int64()),
+		("session_id", model.session_id, pa.int64()),
+	]
+	if model is ExtractedElements:
+		columns += [
+			("css_selector", model.css_selector, pa.string()),
+			("element_text", model.element_text, pa.string()),
+			("element_html", model.element_html, pa.string()),
+			("position", model.position, pa.int32()),
+		]
+	elif model is ExtractedLinks:
+		columns += [
+			("url", func.coalesce(UrlDictionary.url, model.stored_url), pa.string()),
+			("link_text", model.link_text, pa.string()),
+			("is_external", model.is_external, pa.bool_()),
+			("is_valid", model.is_valid, pa.bool_()),
+		]
+	elif model is ExtractedEmails:
+		columns += [
+			("email", model.email, pa.string()),
+			("context", model.context, pa.string()),
+			("is_validated", model.is_validated, pa.bool_()),
+		]
+	elif model is ExtractedImages:
+		columns += [
+			("image_url", func.coalesce(UrlDictionary.url, model.stored_image_url), pa.string()),
+			("alt_text", model.alt_text, pa.string()),
+			("title", model.title, pa.string()),
+			("width", model.width, pa.int32()),
+			("height", model.height, pa.int32()),
+			("file_size", model.file_size, pa.int64()),
+		]
+	columns.append(("created_at", model.created_at, pa.timestamp("us")))
+	return columns
+
+def _partition(timestamp: Optional[datetime], scraper_type: str) -> Tuple[str, str]:
+	"""(date, scraper_type) partition of a session's rows"""
+	return timestamp.strftime("%Y-%m-%d") if timestamp else "unknown", scraper_type
+
+def _snapshot_schema():
+	return pa.schema([
+		("session_id", pa.int64()),
+		("position", pa.int32()),
+		("item", pa.string()),
+		("timestamp", pa.timestamp("us")),
+	])
+
+class _PartitionWriters:
+	"""One open Parquet writer per (date, scraper_type) partition of a dataset"""
+
+	def __init__(self, output_dir: str, dataset: str, schema, max_open_files: int, shard: Optional[int] = None):
+		self.output_dir = output_dir
+		self.dataset = dataset
+		self.shard = shard
+		self.schema = schema
+		self.max_open_files = max_open_files
+		self.run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+		self.writers = {}
+		self.written = {}
+
+	def write(self, partition: Tuple[str, str], records: List[Dict]):
+		writer, path = self._writer_for(partition)
+		writer.write_table(pa.Table.from_pylist(records, schema=self.schema))
+		self.written[path] += len(records)
+
+	def _writer_for(self, partition: Tuple[str, str]):
+		if partition not in self.writers:
+			if len(self.writers) >= self.max_open_files:
+				# Rows arrive roughly in time order, so the oldest partition is done
+				oldest = next(iter(self.writers))
+				self.writers.pop(oldest)[0].close()
+
+			date, scraper_type = partition
+			directory = os.path.join(self.output_dir, self.dataset)
+			if self.shard is not None:
+				directory = os.path.join(directory, f"shard={self.shard}")
+			directory = os.path.join(directory, f"date={date}", f"scraper_type={scraper_type}")
+			os.makedirs(directory, exist_ok=True)
+			path = os.path.join(directory, f"part-{self.run_id}-{len(self.written):05d}.parquet")
+			self.writers[partition] = (pq.ParquetWriter(path, self.schema, compression="zstd"), path)
+			self.written[path] = 0
+		return self.writers[partition]
+
+	def close(self):
+		for writer, _ in self.writers.values():
+			writer.close()
+		self.writers = {}
+
+class ParquetExporter:
+	"""Export extraction tables to partitioned Parquet files and archive old sessions"""
+
+	def __init__(self, db_service, output_dir: str = "exports", chunk_size: int = 50000,
+				max_open_files: int = 32, shard: Optional[int] = None):
+		if pa is None:
+			raise ImportError("pyarrow is required for Parquet export: pip install pyarrow")
+
+		self.db_service = db_service
+		self.output_dir = output_dir
+		self.chunk_size = chunk_size
+		self.max_open_files = max_open_files
+		self.shard = shard
+
+	def _export_query(self, table: str, since: Optional[datetime], until: Optional[datetime]):
+		"""Select statement for one table, with the session's timestamp and type for partitioning"""
+		columns = _table_columns(table)
+		query = select(
+			*[expression.label(name) for name, expression, _ in columns],
+			ScrapingSession.timestamp.label("timestamp"),
+			ScrapingSession.scraper_type.label("scraper_type")
+		)
+
+		if table == "scraping_sessions":
+			key = ScrapingSession.id
+		else:
+			model = CHILD_TABLES[table][0]
+			key = model.id
+			query = query.join(ScrapingSession, ScrapingSession.id == model.session_id)
+			if model is ExtractedLinks:
+				query = query.outerjoin(UrlDictionary, UrlDictionary.id == model.url_id)
+			elif model is ExtractedImages:
+				query = query.outerjoin(UrlDictionary, UrlDictionary.id == model.image_url_id)
+
+		if since:
+			query = query.where(ScrapingSession.timestamp >= since)
+		if until:
+			query = query.where(ScrapingSession.timestamp < until)
+		return query, key
+
+	def export_table(self, table: str, since: Optional[datetime] = None,
+					until: Optional[datetime] = None, read_only: bool = False) -> Dict[str, int]:
+		"""
+		Stream one table into partitioned Parquet files
+
+		Rows are read in keyset-paginated chunks of chunk_size and appended to one
+		open writer per (date, scraper_type) partition, so memory stays bounded by
+		the chunk size no matter how large the table is.
+
+		With read_only, rows are read through the service's read-only engine.
+
+		Returns:
+			Dict mapping each written file path to its row count
+		"""
+		if table not in EXPORT_TABLES:
+			raise ValueError(f"Unsupported table for export: {table}")
+
+		columns = _table_columns(table)
+		schema = pa.schema(
+			[(name, arrow_type) for name, _, arrow_type in columns] + [("timestamp", pa.timestamp("us"))]
+		)
+		query, key = self._export_query(table, since, until)
+		writers = _PartitionWriters(self.output_dir, table, schema, self.max_open_files, self.shard)
+
+		try:
+			with self.db_service.get_db_session(read_only=read_only) as session:
+				last_key = None
+				while True:
+					page = query.order_by(key).limit(self.chunk_size)
+					if last_key is not None:
+						page = page.where(key > last_key)
+					rows = session.execute(page).mappings().all()
+					if not rows:
+						break
+
+					partitions = {}
+					for row in rows:
+						record = dict(row)
+						if "extra_data" in record and record["extra_data"] is not None:
+							record["extra_data"] = json.dumps(record["extra_data"])
+						partitions.setdefault(_partition(row["timestamp"], row["scraper_type"]), []).append(record)
+
+					for partition, records in partitions.items():
+						writers.write(partition, records)
+
+					last_key = rows[-1]["id"]
+					if len(rows) < self.chunk_size:
+						break
+		finally:
+			writers.close()
+
+		written = writers.written
+		logger.info(f"Exported {sum(written.values())} rows of {table} into {len(written)} Parquet files")
+		return written
+
+	def export_snapshot_items(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+							read_only: bool = False) -> Dict[str, int]:
+		"""
+		Stream the rebuilt item lists of change-tracked sessions into partitioned Parquet files
+
+		Tracked sessions store their items as deltas, so each session's list is
+		rebuilt from its chain and written as (session_id, position, item) rows.
+
+		Returns:
+			Dict mapping each written file path to its row count
+		"""
+		writers = _PartitionWriters(self.output_dir, SNAPSHOT_ITEMS, _snapshot_schema(), self.max_open_files,
+									self.shard)
+		query = (
+			select(SessionSnapshot.session_id, ScrapingSession.timestamp, ScrapingSession.scraper_type)
+			.join(ScrapingSession, ScrapingSession.id == SessionSnapshot.session_id)
+		)
+		if since:
+			query = query.where(ScrapingSession.timestamp >= since)
+		if until:
+			query = query.where(ScrapingSession.timestamp < until)
+
+		try:
+			with self.db_service.get_db_session(read_only=read_only) as session:
+				tracking_repo = ChangeTrackingRepository(session)
+				last_key = None
+				while True:
+					page = query.order_by(SessionSnapshot.session_id).limit(self.chunk_size)
+					if last_key is not None:
+						page = page.where(SessionSnapshot.session_id > last_key)
+					rows = session.execute(page).all()
+					if not rows:
+						break
+
+					partitions = {}
+					for session_id, timestamp, scraper_type in rows:
+						partitions.setdefault(_partition(timestamp, scraper_type), []).extend(
+							{"session_id": session_id, "position": position, "item": item, "timestamp": timestamp}
+							for position, item in enumerate(tracking_repo.reconstruct(session_id))
+						)
+
+					for partition, records in partitions.items():
+						if records:
+							writers.write(partition, records)
+
+					last_key = rows[-1].session_id
+					if len(rows) < self.chunk_size:
+						break
+		finally:
+			writers.close()
+
+		written = writers.written
+		logger.info(f"Exported {sum(written.values())} snapshot items into {len(written)} Parquet files")
+		return written
+
+	def export_all(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+				read_only: bool = False) -> Dict[str, Dict[str, int]]:
+		"""Export sessions, every extraction table and the change-tracked items for a date range"""
+		exported = {table: self.export_table(table, since, until, read_only) for table in EXPORT_TABLES}
+		exported[SNAPSHOT_ITEMS] = self.export_snapshot_items(since, until, read_only)
+		return exported
+
+	def _detach_snapshots(self, session, before: datetime):
+		"""
+		Turn retained change-tracking snapshots that build on archived sessions into keyframes
+
+		Covers every session older than the cutoff, not just the current batch:
+		a retained snapshot's chain can reach back through archived sessions of
+		later batches, which must still exist while it is rebuilt.
+		"""
+		parent = aliased(ScrapingSession)
+		children = session.execute(
+			select(SessionSnapshot.session_id)
+			.join(ScrapingSession, ScrapingSession.id == SessionSnapshot.session_id)
+			.join(parent, parent.id == SessionSnapshot.parent_session_id)
+			.where(ScrapingSession.timestamp >= before, parent.timestamp < before)
+			.order_by(SessionSnapshot.session_id)
+		).scalars().all()
+
+		tracking_repo = ChangeTrackingRepository(session)
+		for session_id in children:
+			tracking_repo.materialize(session_id)
+
+	def archive(self, before: datetime) -> Dict[str, int]:
+		"""
+		Export every session older than a cutoff, then delete it from the database
+
+		Rows are only deleted once all Parquet files have been written and closed.
+		Retained change-tracked sessions that build on archived ones are turned
+		into keyframes first. Deletion runs in batches of sessions, each in its
+		own transaction together with the matching statistics counter updates.
+
+		Returns:
+			Number of deleted rows per table
+		"""
+		# Read from the primary: a lagging replica could miss rows that are then deleted
+		exported = self.export_all(until=before)
+		deleted = {table: 0 for table in EXPORT_TABLES}
+
+		with self.db_service.get_db_session() as session:
+			try:
+				self._detach_snapshots(session, before)
+				session.commit()
+			except Exception as e:
+				session.rollback()
+				logger.error(f"Failed to detach snapshots from archived sessions: {str(e)}")
+				raise
+
+			while True:
+				session_ids = session.execute(
+					select(ScrapingSession.id)
+					.where(ScrapingSession.timestamp < before)
+					.order_by(ScrapingSession.id)
+					.limit(self.chunk_size)
+				).scalars().all()
+				if not session_ids:
+					break
+
+				try:
+					counters = {}
+					for ids in chunked(session_ids):
+						session.execute(delete(SnapshotDelta).where(SnapshotDelta.session_id.in_(ids)))
+						session.execute(delete(SessionSnapshot).where(SessionSnapshot.session_id.in_(ids)))
+						# Entity totals keep counting archived sightings; only the session links go
+						session.execute(delete(EntitySighting).where(EntitySighting.session_id.in_(ids)))
+
+						for table, (model, counter) in CHILD_TABLES.items():
+							result = session.execute(delete(model).where(model.session_id.in_(ids)))
+							deleted[table] += result.rowcount
+							counters[counter] = counters.get(counter, 0) - result.rowcount
+						session.execute(delete(ScrapedData).where(ScrapedData.session_id.in_(ids)))
+
+						statuses = session.execute(
+							select(ScrapingSession.status, func.count())
+							.where(ScrapingSession.id.in_(ids))
+							.group_by(ScrapingSession.status)
+						).all()
+						for status, count in statuses:
+							counters["total_sessions"] = counters.get("total_sessions", 0) - count
+							counter = StatisticsRepository.STATUS_COUNTERS.get(status)
+							if counter:
+								counters[counter] = counters.get(counter, 0) - count
+
+						result = session.execute(delete(ScrapingSession).where(ScrapingSession.id.in_(ids)))
+						deleted["scraping_sessions"] += result.rowcount
+
+					StatisticsRepository(session).increment(counters)
+					session.commit()
+				except Exception as e:
+					session.rollback()
+					logger.error(f"Failed to archive sessions: {str(e)}")
+					raise
+
+		logger.info(f"Archived sessions older than {before}: {deleted} "
+					f"({sum(len(files) for files in exported.values())} Parquet files)")
+		return deleted
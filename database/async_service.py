@@ -0,0 +1,366 @@
+"""
+Asyncio database layer
+
+AsyncDatabaseManager wraps SQLAlchemy's asyncio extension (aiosqlite, asyncpg,
+aiomysql) and AsyncDatabaseService exposes the DatabaseService API as
+coroutines. The ORM work itself is the same repository code, run on the sync
+view of an AsyncSession through run_sync, so both layers share models,
+repositories and migrations and write identical rows.
+"""
+
+import time
+from contextlib import asynccontextmanager, contextmanager
+from itertools import islice
+from typing import List, Optional, Dict, Any, AsyncIterator
+from datetime import datetime
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+try:
+	import greenlet  # runs the sync ORM code on the event loop
+except ImportError:  # optional dependency, checked when a manager is created
+	greenlet = None
+
+from .config import DatabaseConfig
+from .metrics import EngineMetrics
+from .service import DatabaseService
+from .repository import STREAM_BATCH_SIZE, StatisticsRepository
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseManager:
+	"""Manages asyncio database connections and sessions"""
+
+	def __init__(self, db_type: str = "sqlite", db_name: Optional[str] = None,
+				pool_size: Optional[int] = None, max_overflow: Optional[int] = None,
+				pool_timeout: Optional[float] = None):
+		if greenlet is None:
+			raise ImportError("SQLAlchemy's asyncio extension requires greenlet: pip install greenlet")
+
+		# Explicit arguments win over the DB_POOL_* environment settings
+		settings = DatabaseConfig.get_pool_settings()
+		self.db_type = db_type.lower()
+		self.pool_size = settings["pool_size"] if pool_size is None else pool_size
+		self.max_overflow = settings["max_overflow"] if max_overflow is None else max_overflow
+		self.pool_timeout = settings["pool_timeout"] if pool_timeout is None else pool_timeout
+		self.metrics = EngineMetrics(settings["slow_query_ms"])
+		self.engine = None
+		self.SessionLocal = None
+		self._initialize_database(db_name)
+
+	def _initialize_database(self, db_name: Optional[str]):
+		"""Initialize the async engine based on type"""
+		try:
+			url = DatabaseConfig.get_async_url(self.db_type, db_name)
+			self.engine = create_async_engine(
+				url,
+				poolclass=self.metrics.pool_class(AsyncAdaptedQueuePool),
+				pool_size=self.pool_size,
+				max_overflow=self.max_overflow,
+				pool_timeout=self.pool_timeout,
+				echo=False
+			)
+			self.metrics.attach(self.engine.sync_engine)
+
+			self.SessionLocal = sessionmaker(
+				bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=True
+			)
+			logger.info(f"Async database connection established: {self.db_type}")
+
+		except Exception as e:
+			logger.error(f"Failed to initialize async database: {str(e)}")
+			raise
+
+	def get_session(self) -> "AsyncSession":
+		"""Get an async database session"""
+		return self.SessionLocal()
+
+	async def create_tables(self):
+		"""Create all database tables and apply pending schema migrations"""
+		from .models import Base
+		from .migrations import run_migrations, schema_is_current
+		try:
+			async with self.engine.connect() as connection:
+				if await connection.run_sync(lambda sync_connection: schema_is_current(sync_connection.engine)):
+					return
+			async with self.engine.begin() as connection:
+				await connection.run_sync(Base.metadata.create_all)
+			# Migrations open their own transactions on the sync view of the engine
+			async with self.engine.connect() as connection:
+				await connection.run_sync(lambda sync_connection: run_migrations(sync_connection.engine))
+			logger.info("Database tables created successfully")
+		except Exception as e:
+			logger.error(f"Failed to create tables: {str(e)}")
+			raise
+
+	async def test_connection(self) -> bool:
+		"""Test database connection"""
+		try:
+			async with self.engine.connect() as connection:
+				await connection.execute(text("SELECT 1"))
+			return True
+		except Exception as e:
+			logger.error(f"Database connection test failed: {str(e)}")
+			return False
+
+	async def dispose(self):
+		"""Close all pooled connections"""
+		await self.engine.dispose()
+
+class _BoundSessionManager:
+	"""Stands in for DatabaseManager by handing out one already open sync session"""
+
+	def __init__(self, session):
+		self.session = session
+
+	def get_session(self):
+		return self.session
+
+	def get_read_session(self):
+		return self.session
+
+class _SessionBoundService(DatabaseService):
+	"""DatabaseService running on the sync session of an AsyncSession (inside run_sync)"""
+
+	def __init__(self, session, track_changes: bool):
+		# The regular constructor, so every attribute it sets exists here too
+		super().__init__(stats_cache_ttl=0, track_changes=track_changes, use_read_engine=False,
+						db_manager=_BoundSessionManager(session))
+
+	@contextmanager
+	def get_db_session(self, read_only: bool = False):
+		# The owning AsyncSession closes the session; errors roll back there too
+		yield self.db_manager.get_session()
+
+class AsyncDatabaseService:
+	"""Asyncio service layer with the same save/query methods as DatabaseService"""
+
+	def __init__(self, db_type: str = "sqlite", db_name: Optional[str] = None,
+				stats_cache_ttl: float = 10.0, track_changes: bool = False,
+				pool_size: Optional[int] = None, max_overflow: Optional[int] = None):
+		self.db_manager = AsyncDatabaseManager(db_type, db_name, pool_size=pool_size,
+											max_overflow=max_overflow)
+		self.track_changes = track_changes
+		self._tables_ready = False
+
+		# Short-lived cache in front of the statistics counters
+		self.stats_cache_ttl = stats_cache_ttl
+		self._stats_cache = None
+
+	@classmethod
+	async def create(cls, *args, **kwargs) -> "AsyncDatabaseService":
+		"""Create a service and make sure its tables exist"""
+		service = cls(*args, **kwargs)
+		await service.create_tables()
+		return service
+
+	async def create_tables(self):
+		"""Create tables and apply migrations once per service"""
+		if not self._tables_ready:
+			await self.db_manager.create_tables()
+			self._tables_ready = True
+
+	@asynccontextmanager
+	async def get_db_session(self):
+		"""Async context manager for database sessions"""
+		await self.create_tables()
+		session = self.db_manager.get_session()
+		try:
+			yield session
+		except Exception as e:
+			await session.rollback()
+			logger.error(f"Database session error: {str(e)}")
+			raise
+		finally:
+			await session.close()
+
+	async def _run(self, method: str, *args, **kwargs) -> Any:
+		"""Run a DatabaseService method on a fresh session"""
+		async with self.get_db_session() as session:
+			return await session.run_sync(
+				lambda sync_session: getattr(_SessionBoundService(sync_session, self.track_changes), method)(*args, **kwargs)
+			)
+
+	async def _iterate(self, method: str, *args, batch_size: int = STREAM_BATCH_SIZE,
+					**kwargs) -> AsyncIterator[Any]:
+		"""Drive a DatabaseService iterator in batches, one event loop hop per batch"""
+		async with self.get_db_session() as session:
+			iterator = None
+
+			def next_batch(sync_session):
+				nonlocal iterator
+				if iterator is None:
+					service = _SessionBoundService(sync_session, self.track_changes)
+					iterator = getattr(service, method)(*args, batch_size=batch_size, **kwargs)
+				return list(islice(iterator, batch_size))
+
+			while True:
+				batch = await session.run_sync(next_batch)
+				for item in batch:
+					yield item
+				if len(batch) < batch_size:
+					return
+
+	async def save_element_extraction(self, url: str, css_selector: str, elements: List[str],
+									metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
+		"""Save element extraction results to database"""
+		session_id = await self._run("save_element_extraction", url, css_selector, elements, metadata, duration_ms)
+		self._stats_cache = None
+		return session_id
+
+	async def save_link_extraction(self, url: str, links: List[str], metadata: Dict = None,
+								duration_ms: Optional[int] = None) -> int:
+		"""Save link extraction results to database"""
+		session_id = await self._run("save_link_extraction", url, links, metadata, duration_ms)
+		self._stats_cache = None
+		return session_id
+
+	async def save_email_extraction(self, url: str, emails: List[str], metadata: Dict = None,
+									duration_ms: Optional[int] = None) -> int:
+		"""Save email extraction results to database"""
+		session_id = await self._run("save_email_extraction", url, emails, metadata, duration_ms)
+		self._stats_cache = None
+		return session_id
+
+	async def save_image_extraction(self, url: str, images: List[str], metadata: Dict = None,
+									duration_ms: Optional[int] = None) -> int:
+		"""Save image extraction results to database"""
+		session_id = await self._run("save_image_extraction", url, images, metadata, duration_ms)
+		self._stats_cache = None
+		return session_id
+
+	async def save_failed_extraction(self, url: str, scraper_type: str, error_message: str,
+									metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
+		"""Save failed extraction attempt to database"""
+		session_id = await self._run("save_failed_extraction", url, scraper_type, error_message, metadata,
+									duration_ms)
+		self._stats_cache = None
+		return session_id
+
+	async def get_extraction_history(self, url: Optional[str] = None, limit: int = 10) -> List[Dict]:
+		"""Get extraction history"""
+		return await self._run("get_extraction_history", url, limit)
+
+	def iter_extraction_history(self, url: Optional[str] = None, since: Optional[datetime] = None,
+								until: Optional[datetime] = None, css_selector: Optional[str] = None,
+								min_results: Optional[int] = None, max_results: Optional[int] = None,
+								batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Dict]:
+		"""Stream the full extraction history, newest first, in constant memory"""
+		return self._iterate("iter_extraction_history", url=url, since=since, until=until,
+							css_selector=css_selector, min_results=min_results, max_results=max_results,
+							batch_size=batch_size)
+
+	async def find_sessions(self, css_selector: Optional[str] = None, min_results: Optional[int] = None,
+							max_results: Optional[int] = None, url: Optional[str] = None,
+							since: Optional[datetime] = None, limit: int = 100) -> List[Dict]:
+		"""Newest sessions matching a selector and/or a result-count range"""
+		return await self._run("find_sessions", css_selector, min_results, max_results, url, since, limit)
+
+	def iter_session_rows(self, session_id: int, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Any]:
+		"""Stream the extracted rows of one session without materializing them"""
+		return self._iterate("iter_session_rows", session_id, batch_size=batch_size)
+
+	def iter_links(self, url: Optional[str] = None, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[str]:
+		"""Stream every extracted link URL, optionally only those found on one page"""
+		return self._iterate("iter_links", url, batch_size=batch_size)
+
+	async def get_session_data(self, session_id: int) -> Optional[Dict]:
+		"""Get all data for a specific scraping session"""
+		return await self._run("get_session_data", session_id)
+
+	async def get_sessions_data(self, session_ids: List[int], limit_per_session: Optional[int] = None,
+								counts_only: bool = False) -> Dict[int, Dict]:
+		"""Get data for many scraping sessions with a constant number of queries"""
+		return await self._run("get_sessions_data", session_ids, limit_per_session, counts_only)
+
+	async def get_snapshot(self, session_id: int) -> Optional[List[str]]:
+		"""Full item list of a change-tracked session, or None if it is not tracked"""
+		return await self._run("get_snapshot", session_id)
+
+	async def get_changes(self, session_id: int) -> Optional[Dict]:
+		"""Items added and removed by a change-tracked session"""
+		return await self._run("get_changes", session_id)
+
+	async def search_elements(self, query: str, url_prefix: Optional[str] = None,
+							since: Optional[datetime] = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+		"""Full-text search over extracted element text"""
+		return await self._run("search_elements", query, url_prefix, since, limit, offset)
+
+	async def get_unique_emails(self, domain: Optional[str] = None, site: Optional[str] = None,
+								limit: Optional[int] = 100, offset: int = 0) -> List[Dict]:
+		"""Unique email addresses with first/last sighting and occurrence count"""
+		return await self._run("get_unique_emails", domain, site, limit, offset)
+
+	async def get_unique_images(self, domain: Optional[str] = None, site: Optional[str] = None,
+								limit: Optional[int] = 100, offset: int = 0) -> List[Dict]:
+		"""Unique image URLs with first/last sighting and occurrence count"""
+		return await self._run("get_unique_images", domain, site, limit, offset)
+
+	async def count_unique_entities(self, kind: str, domain: Optional[str] = None,
+									site: Optional[str] = None) -> int:
+		"""Number of unique emails or image URLs matching the filters"""
+		return await self._run("count_unique_entities", kind, domain, site)
+
+	async def get_entity_sessions(self, kind: str, value: str) -> List[int]:
+		"""IDs of the sessions an email address or image URL was found in"""
+		return await self._run("get_entity_sessions", kind, value)
+
+	async def get_result_counts(self, session_ids: List[int]) -> Dict[int, int]:
+		"""Number of stored result rows per session"""
+		return await self._run("get_result_counts", session_ids)
+
+	async def get_aggregates(self, names: Optional[List[str]] = None,
+							since: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+		"""Analytics aggregates computed in the database over the full history"""
+		return await self._run("get_aggregates", names, since)
+
+	async def test_connection(self) -> bool:
+		"""Test database connection"""
+		return await self.db_manager.test_connection()
+
+	async def get_statistics(self) -> Dict:
+		"""Get scraping statistics from the incrementally maintained counters"""
+		cached = self._stats_cache
+		if cached and time.monotonic() - cached[0] < self.stats_cache_ttl:
+			return dict(cached[1])
+
+		async with self.get_db_session() as session:
+			stats = await session.run_sync(lambda sync_session: StatisticsRepository(sync_session).get_statistics())
+
+		self._stats_cache = (time.monotonic(), stats)
+		return dict(stats)
+
+	async def rebuild_statistics(self) -> Dict:
+		"""Recompute the statistics counters from the base tables"""
+		async with self.get_db_session() as session:
+			stats = await session.run_sync(lambda sync_session: StatisticsRepository(sync_session).rebuild())
+
+		self._stats_cache = (time.monotonic(), stats)
+		return dict(stats)
+
+	async def get_data_watermark(self) -> Dict[str, int]:
+		"""Newest session ID and session count, for caching results derived from the sessions"""
+		return await self._run("get_data_watermark")
+
+	async def refresh_rollups(self) -> int:
+		"""Roll up sessions written past the rollup high-water mark"""
+		return await self._run("refresh_rollups")
+
+	async def rebuild_rollups(self) -> int:
+		"""Recompute the session rollups from the sessions in the database"""
+		return await self._run("rebuild_rollups")
+
+	def metrics(self, reset: bool = False) -> Dict:
+		"""Connection pool and query metrics of the async engine"""
+		snapshot = {"primary": self.db_manager.metrics.snapshot()}
+		if reset:
+			self.db_manager.metrics.reset()
+		return snapshot
+
+	async def close(self):
+		"""Dispose of the engine's connection pool"""
+		await self.db_manager.dispose()
@@ -0,0 +1,166 @@
+"""
+Bulk row loading
+
+PostgreSQL loads rows with COPY FROM STDIN through psycopg2's copy_expert,
+streamed from an in-memory text buffer; every other backend and driver uses a
+single executemany INSERT. Both paths take plain column-name dicts.
+
+Counter tables are maintained with upsert_rows, which maps to the backend's
+native upsert (ON CONFLICT DO UPDATE / ON DUPLICATE KEY UPDATE).
+"""
+
+import io
+import json
+from datetime import datetime, date
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import Table, insert, case
+from sqlalchemy.orm import Session
+
+# Rows sent per COPY / executemany round trip
+BULK_CHUNK_SIZE = 10000
+
+_COPY_ESCAPES = str.maketrans({
+	"\\": "\\\\",
+	"\n": "\\n",
+	"\r": "\\r",
+	"\t": "\\t",
+})
+
+def format_copy_value(value: Any) -> str:
+	"""Render one value in PostgreSQL COPY text format"""
+	if value is None:
+		return "\\N"
+	if isinstance(value, bool):
+		return "t" if value else "f"
+	if isinstance(value, (datetime, date)):
+		return value.isoformat()
+	if isinstance(value, (dict, list)):
+		value = json.dumps(value)
+	return str(value).translate(_COPY_ESCAPES)
+
+def build_copy_stream(rows: Iterable[Dict[str, Any]], columns: List[str]) -> io.StringIO:
+	"""Build a tab-separated COPY text stream of rows, positioned for reading"""
+	buffer = io.StringIO()
+	for row in rows:
+		buffer.write("\t".join(format_copy_value(row.get(column)) for column in columns))
+		buffer.write("\n")
+	buffer.seek(0)
+	return buffer
+
+def _apply_python_defaults(table: Table, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Fill client-side column defaults (e.g. created_at) that COPY would otherwise skip"""
+	defaults = [
+		column for column in table.columns
+		if column.default is not None and not column.primary_key
+		and (column.default.is_scalar or column.default.is_callable)
+	]
+	for row in rows:
+		for column in defaults:
+			if column.name not in row:
+				default = column.default
+				row[column.name] = default.arg if default.is_scalar else default.arg(None)
+	return rows
+
+def copy_rows(db_session: Session, table: Table, rows: List[Dict[str, Any]]):
+	"""Load rows into a PostgreSQL table with COPY FROM STDIN"""
+	rows = _apply_python_defaults(table, rows)
+	columns = list(rows[0])
+	preparer = db_session.get_bind().dialect.identifier_preparer
+	statement = (
+		f"COPY {preparer.format_table(table)} "
+		f"({', '.join(preparer.quote(column) for column in columns)}) FROM STDIN"
+	)
+
+	cursor = db_session.connection().connection.cursor()
+	try:
+		cursor.copy_expert(statement, build_copy_stream(rows, columns))
+	finally:
+		cursor.close()
+
+def insert_ignoring_conflicts(dialect_name: str, table: Table):
+	"""INSERT statement that skips rows whose key already exists"""
+	if dialect_name == "sqlite":
+		from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+		return sqlite_insert(table).on_conflict_do_nothing()
+	if dialect_name == "postgresql":
+		from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+		return postgresql_insert(table).on_conflict_do_nothing()
+	if dialect_name == "mysql":
+		return insert(table).prefix_with("IGNORE")
+	return insert(table)
+
+def _upsert_statement(dialect_name: str, table: Table, key_columns: List[str],
+					increment: List[str], earliest: List[str], latest: List[str]):
+	"""Dialect INSERT ... ON CONFLICT that adds, keeps the minimum or keeps the maximum per column"""
+	if dialect_name in ("sqlite", "postgresql"):
+		if dialect_name == "sqlite":
+			from sqlalchemy.dialects.sqlite import insert as dialect_insert
+		else:
+			from sqlalchemy.dialects.postgresql import insert as dialect_insert
+		statement = dialect_insert(table)
+		new = statement.excluded
+	elif dialect_name == "mysql":
+		from sqlalchemy.dialects.mysql import insert as dialect_insert
+		statement = dialect_insert(table)
+		new = statement.inserted
+	else:
+		return None
+
+	current = table.c
+	values = {}
+	for column in increment:
+		values[column] = current[column] + new[column]
+	for column in earliest:
+		values[column] = case((new[column] < current[column], new[column]), else_=current[column])
+	for column in latest:
+		values[column] = case((new[column] > current[column], new[column]), else_=current[column])
+
+	if dialect_name == "mysql":
+		return statement.on_duplicate_key_update(**values)
+	return statement.on_conflict_do_update(index_elements=key_columns, set_=values)
+
+def upsert_rows(db_session: Session, table: Table, rows: List[Dict[str, Any]], key_columns: List[str],
+				increment: List[str] = (), earliest: List[str] = (), latest: List[str] = ()) -> int:
+	"""
+	Insert rows or merge them into existing rows with the same key (does not commit)
+
+	Existing rows get the increment columns added, and keep the smaller of the
+	earliest columns and the larger of the latest columns. Rows must have
+	unique keys within one call.
+	"""
+	if not rows:
+		return 0
+
+	dialect_name = db_session.get_bind().dialect.name
+	statement = _upsert_statement(dialect_name, table, list(key_columns),
+								list(increment), list(earliest), list(latest))
+	if statement is None:
+		raise NotImplementedError(f"Upserts are not supported on {dialect_name}")
+
+	for start in range(0, len(rows), BULK_CHUNK_SIZE):
+		db_session.execute(statement, rows[start:start + BULK_CHUNK_SIZE])
+	return len(rows)
+
+def bulk_insert(db_session: Session, table: Table, rows: List[Dict[str, Any]],
+				ignore_conflicts: bool = False) -> int:
+	"""
+	Insert rows as part of the caller's transaction using the fastest path of the backend
+
+	With ignore_conflicts, rows whose key already exists are skipped instead of
+	failing the transaction, for content-addressed tables that concurrent
+	writers may fill with the same rows.
+	"""
+	if not rows:
+		return 0
+
+	dialect = db_session.get_bind().dialect
+	# COPY goes through psycopg2's cursor API; async drivers use executemany
+	use_copy = dialect.name == "postgresql" and dialect.driver == "psycopg2" and not ignore_conflicts
+	statement = insert_ignoring_conflicts(dialect.name, table) if ignore_conflicts else insert(table)
+	for start in range(0, len(rows), BULK_CHUNK_SIZE):
+		chunk = rows[start:start + BULK_CHUNK_SIZE]
+		if use_copy:
+			copy_rows(db_session, table, chunk)
+		else:
+			db_session.execute(statement, chunk)
+	return len(rows)
@@ -1,16 +1,22 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
-from dotenv import load_dotenv
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional
 import logging
 
-# Load environment variables
-load_dotenv()
+from .metrics import EngineMetrics
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def load_environment():
+	"""Load environment variables from .env once, when a setting is first read"""
+	from dotenv import load_dotenv
+	load_dotenv()
+
 class DatabaseConfig:
 	"""Database configuration management"""
 
@@ -24,6 +30,7 @@ class DatabaseConfig:
 	@staticmethod
 	def get_mysql_url() -> str:
 		"""Get MySQL database URL from environment variables"""
+		load_environment()
 		host = os.getenv('MYSQL_HOST', 'localhost')
 		port = os.getenv('MYSQL_PORT', '3306')
 		user = os.getenv('MYSQL_USER', 'root')
@@ -35,6 +42,7 @@ class DatabaseConfig:
 	@staticmethod
 	def get_postgresql_url() -> str:
 		"""Get PostgreSQL database URL from environment variables"""
+		load_environment()
 		host = os.getenv('POSTGRES_HOST', 'localhost')
 		port = os.getenv('POSTGRES_PORT', '5432')
 		user = os.getenv('POSTGRES_USER', 'postgres')
@@ -43,43 +51,122 @@ class DatabaseConfig:
 
 		return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{database}"
 
+	@staticmethod
+	def get_read_url(db_type: str = "sqlite", db_name: Optional[str] = None) -> Optional[str]:
+		"""
+		Get the URL of the read-only engine used for analytics queries
+
+		SQLite opens the same file with mode=ro. MySQL and PostgreSQL use the
+		replica configured through MYSQL_REPLICA_HOST / POSTGRES_REPLICA_HOST
+		(optionally *_REPLICA_PORT) with the primary's credentials; without a
+		replica, None is returned and reads share the primary engine.
+		"""
+		if db_type == "sqlite":
+			db_path = DatabaseConfig.get_sqlite_url(db_name or "web_scraper.db")[len("sqlite:///"):]
+			return f"sqlite:///file:{db_path}?mode=ro&uri=true"
+
+		load_environment()
+		prefix = {"mysql": "MYSQL", "postgresql": "POSTGRES"}.get(db_type)
+		if prefix is None or not os.getenv(f"{prefix}_REPLICA_HOST"):
+			return None
+
+		url = make_url(DatabaseConfig.get_mysql_url() if db_type == "mysql" else DatabaseConfig.get_postgresql_url())
+		url = url.set(host=os.getenv(f"{prefix}_REPLICA_HOST"),
+					port=int(os.getenv(f"{prefix}_REPLICA_PORT", url.port)))
+		return url.render_as_string(hide_password=False)
+
+	@staticmethod
+	def get_pool_settings() -> Dict[str, float]:
+		"""
+		Connection pool sizing and slow-query threshold from the environment
+
+		DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds) and
+		DB_SLOW_QUERY_MS, defaulting to 10, 20, 30 and 500.
+		"""
+		load_environment()
+		return {
+			"pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+			"max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+			"pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+			"slow_query_ms": float(os.getenv("DB_SLOW_QUERY_MS", "500")),
+		}
+
+	@staticmethod
+	def get_sqlite_shards() -> int:
+		"""Number of SQLite shard files from SQLITE_SHARDS (1 means unsharded)"""
+		load_environment()
+		return max(int(os.getenv("SQLITE_SHARDS", "1")), 1)
+
+	# Async driver used for each backend by the asyncio database layer
+	ASYNC_DRIVERS = {
+		"sqlite": "sqlite+aiosqlite",
+		"mysql": "mysql+aiomysql",
+		"postgresql": "postgresql+asyncpg",
+	}
+
+	@staticmethod
+	def get_async_url(db_type: str = "sqlite", db_name: Optional[str] = None) -> str:
+		"""Get the database URL with the backend's asyncio driver"""
+		if db_type == "sqlite":
+			url = DatabaseConfig.get_sqlite_url(db_name or "web_scraper.db")
+		elif db_type == "mysql":
+			url = DatabaseConfig.get_mysql_url()
+		elif db_type == "postgresql":
+			url = DatabaseConfig.get_postgresql_url()
+		else:
+			raise ValueError(f"Unsupported database type: {db_type}")
+
+		return make_url(url).set(drivername=DatabaseConfig.ASYNC_DRIVERS[db_type]).render_as_string(hide_password=False)
+
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+	cursor = dbapi_connection.cursor()
+	cursor.execute("PRAGMA journal_mode=WAL")
+	cursor.close()
+
 class DatabaseManager:
 	"""Manages database connections and sessions"""
 
 	def __init__(self, db_type: str = "sqlite", db_name: Optional[str] = None):
 		self.db_type = db_type.lower()
+		self.pool_settings = DatabaseConfig.get_pool_settings()
 		self.engine = None
+		self.read_engine = None
+		self.metrics = EngineMetrics(self.pool_settings["slow_query_ms"])
+		self.read_metrics = None
 		self.SessionLocal = None
+		self.ReadSessionLocal = None
 		self._initialize_database(db_name)
+		self._initialize_read_engine(db_name)
+
+	def _create_engine(self, url: str, metrics: EngineMetrics):
+		"""Create an engine with an instrumented, environment-sized connection pool"""
+		connect_args = {"check_same_thread": False} if self.db_type == "sqlite" else {}
+		engine = create_engine(
+			url,
+			connect_args=connect_args,
+			poolclass=metrics.pool_class(QueuePool),
+			pool_size=self.pool_settings["pool_size"],
+			max_overflow=self.pool_settings["max_overflow"],
+			pool_timeout=self.pool_settings["pool_timeout"],
+			echo=False
+		)
+		metrics.attach(engine)
+		return engine
 
 	def _initialize_database(self, db_name: Optional[str] = None):
 		"""Initialize database connection based on type"""
 		try:
 			if self.db_type == "sqlite":
 				url = DatabaseConfig.get_sqlite_url(db_name or "web_scraper.db")
-				self.engine = create_engine(
-					url,
-					connect_args={"check_same_thread": False},
-					echo=False
-				)
+				self.engine = self._create_engine(url, self.metrics)
+				# WAL lets the read-only engine query while scrapers write
+				event.listen(self.engine, "connect", _enable_sqlite_wal)
 			elif self.db_type == "mysql":
 				url = DatabaseConfig.get_mysql_url()
-				self.engine = create_engine(
-					url,
-					poolclass=QueuePool,
-					pool_size=10,
-					max_overflow=20,
-					echo=False
-				)
+				self.engine = self._create_engine(url, self.metrics)
 			elif self.db_type == "postgresql":
 				url = DatabaseConfig.get_postgresql_url()
-				self.engine = create_engine(
-					url,
-					poolclass=QueuePool,
-					pool_size=10,
-					max_overflow=20,
-					echo=False
-				)
+				self.engine = self._create_engine(url, self.metrics)
 			else:
 				raise ValueError(f"Unsupported database type: {self.db_type}")
 
@@ -90,15 +177,53 @@ class DatabaseManager:
 			logger.error(f"Failed to initialize database: {str(e)}")
 			raise
 
+	def _initialize_read_engine(self, db_name: Optional[str] = None):
+		"""Initialize the read-only engine for analytics, falling back to the primary engine"""
+		try:
+			url = DatabaseConfig.get_read_url(self.db_type, db_name)
+			if url is None:
+				self.read_engine = self.engine
+				self.read_metrics = self.metrics
+			else:
+				self.read_metrics = EngineMetrics(self.pool_settings["slow_query_ms"])
+				self.read_engine = self._create_engine(url, self.read_metrics)
+
+			self.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine)
+			if self.read_engine is not self.engine:
+				logger.info(f"Read-only database engine established: {self.db_type}")
+
+		except Exception as e:
+			logger.error(f"Failed to initialize read-only database engine: {str(e)}")
+			raise
+
 	def get_session(self):
 		"""Get a database session"""
 		return self.SessionLocal()
 
+	def get_read_session(self):
+		"""Get a session on the read-only engine (the primary if no replica is configured)"""
+		return self.ReadSessionLocal()
+
+	def dispose(self):
+		"""Close the pooled connections of both engines"""
+		self.engine.dispose()
+		if self.read_engine is not self.engine:
+			self.read_engine.dispose()
+
 	def create_tables(self):
-		"""Create all database tables"""
+		"""
+		Create all database tables and apply pending schema migrations
+
+		The schema version recorded by the migrations acts as the cache: a
+		database already at the latest version costs a single query.
+		"""
 		from .models import Base
+		from .migrations import run_migrations, schema_is_current
 		try:
+			if schema_is_current(self.engine):
+				return
 			Base.metadata.create_all(bind=self.engine)
+			run_migrations(self.engine)
 			logger.info("Database tables created successfully")
 		except Exception as e:
 			logger.error(f"Failed to create tables: {str(e)}")
@@ -0,0 +1,14 @@
+import hashlib
+from urllib.parse import urlparse
+
+def stable_hash64(value: str) -> int:
+	"""Deterministic signed 64-bit hash, stable across processes and Python versions"""
+	digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+	return int.from_bytes(digest, "big", signed=True)
+
+def url_domain(url: str) -> str:
+	"""Lower-cased network location of a URL ('' for relative URLs)"""
+	try:
+		return urlparse(url).netloc.lower()[:255]
+	except ValueError:
+		return ""
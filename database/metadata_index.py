@@ -0,0 +1,82 @@
+"""
+Indexed access to frequently queried session metadata
+
+ScrapingSession.extra_data is a JSON column, so filtering on one of its keys
+parses every row. The keys in INDEXED_METADATA get an index per backend:
+SQLite and PostgreSQL index the JSON extraction expression itself, MySQL
+indexes a virtual generated column. Queries must filter through
+metadata_field, which renders exactly the indexed expression, because the
+planners only match an expression index against an identical expression.
+"""
+
+from typing import List
+from sqlalchemy import inspect, literal_column, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import ColumnElement
+import logging
+
+from .models import ScrapingSession
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys with string values that get an index
+INDEXED_METADATA: List[str] = ["css_selector"]
+
+def _sqlite_expression(key: str) -> str:
+	return f"json_extract(extra_data, '$.{key}')"
+
+def _postgresql_expression(key: str) -> str:
+	return f"(extra_data ->> '{key}')"
+
+def _mysql_column(key: str) -> str:
+	return f"meta_{key}"
+
+def install_metadata_indexes(connection: Connection):
+	"""Create the backend's indexes over the INDEXED_METADATA keys (idempotent)"""
+	dialect = connection.dialect.name
+
+	if dialect == "sqlite":
+		for key in INDEXED_METADATA:
+			connection.execute(text(
+				f"CREATE INDEX IF NOT EXISTS ix_scraping_sessions_meta_{key} "
+				f"ON scraping_sessions ({_sqlite_expression(key)})"
+			))
+
+	elif dialect == "postgresql":
+		for key in INDEXED_METADATA:
+			connection.execute(text(
+				f"CREATE INDEX IF NOT EXISTS ix_scraping_sessions_meta_{key} "
+				f"ON scraping_sessions (({_postgresql_expression(key)}))"
+			))
+
+	elif dialect == "mysql":
+		inspector = inspect(connection)
+		columns = [column["name"] for column in inspector.get_columns("scraping_sessions")]
+		indexes = [index["name"] for index in inspector.get_indexes("scraping_sessions")]
+		for key in INDEXED_METADATA:
+			column = _mysql_column(key)
+			if column not in columns:
+				connection.execute(text(
+					f"ALTER TABLE scraping_sessions ADD COLUMN {column} VARCHAR(500) "
+					f"GENERATED ALWAYS AS (JSON_UNQUOTE(JSON_EXTRACT(extra_data, '$.{key}'))) VIRTUAL"
+				))
+			if f"ix_scraping_sessions_{column}" not in indexes:
+				connection.execute(text(
+					f"CREATE INDEX ix_scraping_sessions_{column} ON scraping_sessions ({column})"
+				))
+
+	else:
+		logger.warning(f"No metadata index support for {dialect}, metadata filters will scan")
+
+def metadata_field(dialect: str, key: str) -> ColumnElement:
+	"""SQL expression for a metadata key of scraping_sessions, matching its index"""
+	if key not in INDEXED_METADATA:
+		raise ValueError(f"Metadata key {key!r} is not indexed")
+
+	if dialect == "sqlite":
+		return literal_column(_sqlite_expression(key))
+	if dialect == "postgresql":
+		return literal_column(_postgresql_expression(key))
+	if dialect == "mysql":
+		return literal_column(_mysql_column(key))
+	return ScrapingSession.extra_data[key].as_string()
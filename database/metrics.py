@@ -0,0 +1,207 @@
+"""
+Connection pool and query instrumentation
+
+EngineMetrics hooks an engine's pool and cursor events to record how long
+callers wait for a pooled connection, how close the pool runs to its limit,
+per-statement latency histograms and slow queries. Checkout wait is timed by
+a QueuePool subclass around the pool's internal checkout, since SQLAlchemy
+emits no event before a caller starts waiting.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Type
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Slow queries kept for inspection through metrics()
+SLOW_QUERY_HISTORY = 20
+
+class LatencyHistogram:
+	"""Fixed-bucket latency histogram with count, sum and max"""
+
+	def __init__(self, buckets=LATENCY_BUCKETS_MS):
+		self.buckets = tuple(buckets)
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.count = 0
+		self.total_ms = 0.0
+		self.max_ms = 0.0
+
+	def observe(self, elapsed_ms: float):
+		index = len(self.buckets)
+		for i, bound in enumerate(self.buckets):
+			if elapsed_ms <= bound:
+				index = i
+				break
+		self.counts[index] += 1
+		self.count += 1
+		self.total_ms += elapsed_ms
+		self.max_ms = max(self.max_ms, elapsed_ms)
+
+	def percentile(self, fraction: float) -> float:
+		"""Upper bound of the bucket containing the given fraction of observations"""
+		if not self.count:
+			return 0.0
+		rank = fraction * self.count
+		seen = 0
+		for i, count in enumerate(self.counts):
+			seen += count
+			if seen >= rank:
+				return float(self.buckets[i]) if i < len(self.buckets) else self.max_ms
+		return self.max_ms
+
+	def snapshot(self) -> Dict:
+		labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+		return {
+			"count": self.count,
+			"mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+			"max_ms": round(self.max_ms, 3),
+			"p50_ms": self.percentile(0.50),
+			"p95_ms": self.percentile(0.95),
+			"p99_ms": self.percentile(0.99),
+			"buckets": dict(zip(labels, self.counts)),
+		}
+
+def _statement_kind(statement: str) -> str:
+	words = statement.lstrip().split(None, 1)
+	kind = words[0].upper() if words else ""
+	return kind if kind in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+class EngineMetrics:
+	"""Pool and statement metrics of one engine"""
+
+	def __init__(self, slow_query_ms: float = 500.0):
+		self.slow_query_ms = slow_query_ms
+		self._lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		"""Clear all recorded measurements"""
+		with self._lock:
+			self.checkout_wait = LatencyHistogram()
+			self.statements = {}
+			self.slow_queries = deque(maxlen=SLOW_QUERY_HISTORY)
+			self.checkouts = 0
+			self.checkout_timeouts = 0
+			self.connections_created = 0
+			self.peak_checked_out = 0
+			self.errors = 0
+
+	def pool_class(self, base: Type) -> Type:
+		"""QueuePool subclass that reports checkout wait and saturation to these metrics"""
+		metrics = self
+
+		class InstrumentedPool(base):
+			def _do_get(self):
+				start = time.perf_counter()
+				try:
+					connection = super()._do_get()
+				except PoolTimeoutError:
+					metrics._record_timeout((time.perf_counter() - start) * 1000)
+					raise
+				metrics._record_checkout((time.perf_counter() - start) * 1000, self.checkedout())
+				return connection
+
+		InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+		return InstrumentedPool
+
+	def attach(self, engine: Engine):
+		"""Listen to an engine's connection and cursor events"""
+		self.engine = engine
+		event.listen(engine, "connect", self._on_connect)
+		event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+		event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+		event.listen(engine, "handle_error", self._on_error)
+
+	def _record_checkout(self, wait_ms: float, checked_out: int):
+		with self._lock:
+			self.checkouts += 1
+			self.checkout_wait.observe(wait_ms)
+			self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+	def _record_timeout(self, wait_ms: float):
+		with self._lock:
+			self.checkout_timeouts += 1
+			self.checkout_wait.observe(wait_ms)
+		logger.warning("Timed out waiting for a pooled database connection")
+
+	def _on_connect(self, dbapi_connection, connection_record):
+		with self._lock:
+			self.connections_created += 1
+
+	def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+	def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+		elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+		kind = _statement_kind(statement)
+		with self._lock:
+			histogram = self.statements.get(kind)
+			if histogram is None:
+				histogram = self.statements[kind] = LatencyHistogram()
+			histogram.observe(elapsed_ms)
+
+			if elapsed_ms >= self.slow_query_ms:
+				self.slow_queries.append({
+					"statement": statement[:500],
+					"duration_ms": round(elapsed_ms, 3),
+					"executemany": executemany,
+					"at": time.time(),
+				})
+		if elapsed_ms >= self.slow_query_ms:
+			logger.warning(f"Slow query ({elapsed_ms:.1f}ms): {statement[:200]}")
+
+	def _on_error(self, exception_context):
+		connection = exception_context.connection
+		if connection is not None and connection.info.get("query_start_time"):
+			connection.info["query_start_time"].pop()
+		with self._lock:
+			self.errors += 1
+
+	def pool_status(self) -> Dict:
+		"""Current pool occupancy, where the pool reports it"""
+		pool = self.engine.pool
+		status = {"pool_class": type(pool).__name__}
+		if hasattr(pool, "checkedout"):
+			size = pool.size()
+			capacity = size + max(pool._max_overflow, 0)
+			checked_out = pool.checkedout()
+			status.update({
+				"size": size,
+				"max_overflow": pool._max_overflow,
+				"checked_out": checked_out,
+				"overflow": pool.overflow(),
+				"saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+			})
+		return status
+
+	def snapshot(self) -> Dict:
+		"""All recorded measurements as plain data"""
+		with self._lock:
+			pool = {
+				**self.pool_status(),
+				"checkouts": self.checkouts,
+				"checkout_timeouts": self.checkout_timeouts,
+				"connections_created": self.connections_created,
+				"peak_checked_out": self.peak_checked_out,
+				"checkout_wait": self.checkout_wait.snapshot(),
+			}
+			capacity = pool.get("size", 0) + max(pool.get("max_overflow", 0), 0)
+			if capacity:
+				pool["peak_saturation"] = round(self.peak_checked_out / capacity, 3)
+
+			return {
+				"pool": pool,
+				"statements": {kind: histogram.snapshot() for kind, histogram in self.statements.items()},
+				"slow_queries": list(self.slow_queries),
+				"slow_query_ms": self.slow_query_ms,
+				"errors": self.errors,
+			}
@@ -0,0 +1,241 @@
+"""
+Lightweight schema migrations
+
+Base.metadata.create_all only creates missing tables, so changes to existing
+tables are applied here. Every migration is idempotent (it inspects the live
+schema before altering it) and its version is recorded in schema_version.
+
+Databases at the latest version skip create_all entirely, so every schema
+change, including new tables, needs a migration entry.
+"""
+
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, text, select, func
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+import logging
+
+from .models import (
+	Base, SchemaVersion, ScrapingSession, ExtractedEmails, ExtractedImages, UrlDictionary,
+	SessionSnapshot, EntityIndex, EntitySighting, SessionRollup
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows rewritten per statement batch while backfilling
+BACKFILL_BATCH_SIZE = 5000
+
+def _column_names(connection: Connection, table: str) -> List[str]:
+	return [column["name"] for column in inspect(connection).get_columns(table)]
+
+def _add_column(connection: Connection, table: str, column: str, ddl_type: str, indexed: bool = False):
+	"""Add a nullable column (and optional index) if it does not exist yet"""
+	if column in _column_names(connection, table):
+		return
+	connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+	if indexed:
+		connection.execute(text(f"CREATE INDEX ix_{table}_{column} ON {table} ({column})"))
+	logger.info(f"Added column {table}.{column}")
+
+def _backfill_url_ids(connection: Connection, table: str, url_column: str, id_column: str,
+					clear_inline: bool):
+	"""Move inline URLs of a table into url_dictionary, walking the table by primary key"""
+	from .repository import UrlRepository
+
+	url_repo = UrlRepository(Session(bind=connection))
+	last_id = 0
+	while True:
+		rows = connection.execute(text(
+			f"SELECT id, {url_column} FROM {table} "
+			f"WHERE id > :last_id AND {id_column} IS NULL AND {url_column} != '' "
+			f"ORDER BY id LIMIT :batch_size"
+		), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).fetchall()
+		if not rows:
+			return
+
+		url_ids = url_repo.get_or_create_batch(url for _, url in rows)
+		assignment = f"{id_column} = :url_id" + (f", {url_column} = ''" if clear_inline else "")
+		connection.execute(
+			text(f"UPDATE {table} SET {assignment} WHERE id = :id"),
+			[{"id": row_id, "url_id": url_ids[url]} for row_id, url in rows]
+		)
+		last_id = rows[-1][0]
+
+def _normalize_urls(connection: Connection):
+	"""Reference url_dictionary from sessions, links and images"""
+	_add_column(connection, "scraping_sessions", "url_id", "BIGINT", indexed=True)
+	_add_column(connection, "extracted_links", "url_id", "BIGINT", indexed=True)
+	_add_column(connection, "extracted_images", "image_url_id", "BIGINT", indexed=True)
+
+	# Sessions keep their readable URL; the high-volume tables drop the inline copy
+	_backfill_url_ids(connection, "scraping_sessions", "url", "url_id", clear_inline=False)
+	_backfill_url_ids(connection, "extracted_links", "url", "url_id", clear_inline=True)
+	_backfill_url_ids(connection, "extracted_images", "image_url", "image_url_id", clear_inline=True)
+
+def _full_text_search(connection: Connection):
+	"""Full-text index over extracted element text"""
+	from .search import install_search_index
+	install_search_index(connection)
+
+def _create_missing_tables(connection: Connection):
+	"""Tables added to the models since the last migration (statistics, change tracking)"""
+	Base.metadata.create_all(connection)
+
+def _backfill_entities(connection: Connection, kind: str, query):
+	"""Feed (row id, session_id, value, timestamp) rows of an extraction table into the entity index"""
+	from .repository import EntityRepository
+
+	entity_repo = EntityRepository(Session(bind=connection))
+	row_id = query.selected_columns[0]
+	last_id = 0
+	while True:
+		rows = connection.execute(
+			query.where(row_id > last_id).order_by(row_id).limit(BACKFILL_BATCH_SIZE)
+		).fetchall()
+		if not rows:
+			return
+		entity_repo.record(kind, (
+			(session_id, value, timestamp or datetime.utcnow()) for _, session_id, value, timestamp in rows
+		))
+		last_id = rows[-1][0]
+
+def _entity_index(connection: Connection):
+	"""Deduplicated email/image index with per-session sightings, built from existing rows"""
+	from .repository import ChangeTrackingRepository, EntityRepository
+
+	Base.metadata.create_all(connection, tables=[EntityIndex.__table__, EntitySighting.__table__])
+
+	_backfill_entities(connection, "email", select(
+		ExtractedEmails.id, ExtractedEmails.session_id, ExtractedEmails.email, ScrapingSession.timestamp
+	).join(ScrapingSession, ScrapingSession.id == ExtractedEmails.session_id))
+
+	# Rows migrated by normalize_urls reference url_dictionary; older rows keep the inline URL
+	image_url = func.coalesce(UrlDictionary.url, ExtractedImages.stored_image_url)
+	_backfill_entities(connection, "image", select(
+		ExtractedImages.id, ExtractedImages.session_id, image_url, ScrapingSession.timestamp
+	).join(ScrapingSession, ScrapingSession.id == ExtractedImages.session_id)
+	.outerjoin(UrlDictionary, UrlDictionary.id == ExtractedImages.image_url_id))
+
+	# Change-tracked sessions keep their items in snapshots instead of the extraction tables
+	session = Session(bind=connection)
+	tracking_repo = ChangeTrackingRepository(session)
+	entity_repo = EntityRepository(session)
+	tracked = connection.execute(
+		select(ScrapingSession.id, ScrapingSession.scraper_type, ScrapingSession.timestamp)
+		.join(SessionSnapshot, SessionSnapshot.session_id == ScrapingSession.id)
+		.where(ScrapingSession.scraper_type.in_(["email_extraction", "image_extraction"]))
+	).fetchall()
+	for session_id, scraper_type, timestamp in tracked:
+		kind = "email" if scraper_type == "email_extraction" else "image"
+		entity_repo.record(kind, (
+			(session_id, value, timestamp or datetime.utcnow())
+			for value in tracking_repo.reconstruct(session_id)
+		))
+
+def _metadata_indexes(connection: Connection):
+	"""Indexes over the frequently filtered extra_data keys"""
+	from .metadata_index import install_metadata_indexes
+	install_metadata_indexes(connection)
+
+def _session_columns(connection: Connection):
+	"""Persisted domain, result_count and duration_ms columns on scraping_sessions"""
+	from .analytics import session_result_counts
+	from .hashing import url_domain
+
+	_add_column(connection, "scraping_sessions", "domain", "VARCHAR(255)", indexed=True)
+	_add_column(connection, "scraping_sessions", "result_count", "INTEGER", indexed=True)
+	# Durations of past sessions were never recorded and stay NULL
+	_add_column(connection, "scraping_sessions", "duration_ms", "INTEGER", indexed=True)
+
+	# result_count replaces the metadata key indexed by migration 5
+	dialect = connection.dialect.name
+	if dialect in ("sqlite", "postgresql"):
+		connection.execute(text("DROP INDEX IF EXISTS ix_scraping_sessions_meta_result_count"))
+	elif dialect == "mysql" and "meta_result_count" in _column_names(connection, "scraping_sessions"):
+		connection.execute(text("ALTER TABLE scraping_sessions DROP COLUMN meta_result_count"))
+
+	connection.execute(text(
+		"UPDATE scraping_sessions SET domain = "
+		"(SELECT domain FROM url_dictionary WHERE url_dictionary.id = scraping_sessions.url_id) "
+		"WHERE domain IS NULL AND url_id IS NOT NULL"
+	))
+
+	session = Session(bind=connection)
+	last_id = 0
+	while True:
+		rows = connection.execute(
+			select(ScrapingSession.id, ScrapingSession.url, ScrapingSession.domain, ScrapingSession.result_count)
+			.where(ScrapingSession.id > last_id)
+			.where((ScrapingSession.domain.is_(None)) | (ScrapingSession.result_count.is_(None)))
+			.order_by(ScrapingSession.id).limit(BACKFILL_BATCH_SIZE)
+		).fetchall()
+		if not rows:
+			return
+
+		counts = session_result_counts(session, [row_id for row_id, _, _, count in rows if count is None])
+		connection.execute(
+			text("UPDATE scraping_sessions SET domain = :domain, result_count = :result_count WHERE id = :id"),
+			[{
+				"id": row_id,
+				"domain": domain if domain is not None else url_domain(url or ""),
+				"result_count": count if count is not None else counts[row_id],
+			} for row_id, url, domain, count in rows]
+		)
+		last_id = rows[-1][0]
+
+def _session_rollups(connection: Connection):
+	"""Hourly and daily session rollups, built from the existing sessions"""
+	from .repository import RollupRepository
+
+	Base.metadata.create_all(connection, tables=[SessionRollup.__table__])
+	RollupRepository(Session(bind=connection)).catch_up(BACKFILL_BATCH_SIZE)
+
+# Ordered (version, name, migration) entries; never renumber applied versions
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+	(1, "normalize_urls", _normalize_urls),
+	(2, "full_text_search", _full_text_search),
+	(3, "create_missing_tables", _create_missing_tables),
+	(4, "entity_index", _entity_index),
+	(5, "metadata_indexes", _metadata_indexes),
+	(6, "session_columns", _session_columns),
+	(7, "session_rollups", _session_rollups),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(connection: Connection) -> int:
+	"""Highest applied migration version (0 for an unversioned database)"""
+	versions = connection.execute(select(SchemaVersion.version)).scalars().all()
+	return max(versions, default=0)
+
+def schema_is_current(engine: Engine) -> bool:
+	"""Whether the database is at the latest schema version (False if unversioned or missing)"""
+	try:
+		with engine.connect() as connection:
+			return current_version(connection) >= LATEST_VERSION
+	except SQLAlchemyError:
+		return False
+
+def run_migrations(engine: Engine) -> int:
+	"""Apply pending migrations, each in its own transaction, and return the schema version"""
+	with engine.connect() as connection:
+		version = current_version(connection)
+
+	for migration_version, name, migrate in MIGRATIONS:
+		if migration_version <= version:
+			continue
+		try:
+			with engine.begin() as connection:
+				migrate(connection)
+				connection.execute(SchemaVersion.__table__.insert().values(
+					version=migration_version, name=name
+				))
+			version = migration_version
+			logger.info(f"Applied schema migration {migration_version} ({name})")
+		except Exception as e:
+			logger.error(f"Schema migration {migration_version} ({name}) failed: {str(e)}")
+			raise
+
+	return version
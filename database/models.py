@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, JSON, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,14 +11,20 @@ class ScrapingSession(Base):
 
 	id = Column(Integer, primary_key=True, autoincrement=True)
 	url = Column(String(2048), nullable=False)
+	url_id = Column(BigInteger, ForeignKey('url_dictionary.id'), nullable=True, index=True)
 	scraper_type = Column(String(100), nullable=False)  # element, link, email, image
 	timestamp = Column(DateTime, default=datetime.utcnow)
 	status = Column(String(50), default='success')  # success, failed, partial
 	error_message = Column(Text, nullable=True)
 	extra_data = Column(JSON, nullable=True)  # Store additional scraping parameters (renamed from metadata)
+	domain = Column(String(255), nullable=True, index=True)  # lower-cased host of url
+	result_count = Column(Integer, nullable=True, index=True)  # rows stored by the session
+	duration_ms = Column(Integer, nullable=True, index=True)  # time spent scraping, when measured
 
 	# Relationships
 	scraped_data = relationship("ScrapedData", back_populates="session", cascade="all, delete-orphan")
+	snapshot = relationship("SessionSnapshot", uselist=False, viewonly=True,
+							foreign_keys="SessionSnapshot.session_id")  # set in change-tracking mode
 
 class ScrapedData(Base):
 	"""Stores the actual scraped data"""
@@ -52,12 +58,20 @@ class ExtractedLinks(Base):
 
 	id = Column(Integer, primary_key=True, autoincrement=True)
 	session_id = Column(Integer, ForeignKey('scraping_sessions.id'), nullable=False)
-	url = Column(String(2048), nullable=False)
+	# Legacy inline URL; new rows reference url_dictionary and leave this empty
+	stored_url = Column('url', String(2048), nullable=False, default='')
+	url_id = Column(BigInteger, ForeignKey('url_dictionary.id'), nullable=True, index=True)
 	link_text = Column(Text, nullable=True)
 	is_external = Column(Boolean, default=False)
 	is_valid = Column(Boolean, default=True)
 	created_at = Column(DateTime, default=datetime.utcnow)
 
+	url_entry = relationship("UrlDictionary", lazy="joined")
+
+	@property
+	def url(self) -> str:
+		return self.url_entry.url if self.url_entry is not None else self.stored_url
+
 class ExtractedEmails(Base):
 	"""Specialized table for email extraction results"""
 	__tablename__ = 'extracted_emails'
@@ -75,10 +89,114 @@ class ExtractedImages(Base):
 
 	id = Column(Integer, primary_key=True, autoincrement=True)
 	session_id = Column(Integer, ForeignKey('scraping_sessions.id'), nullable=False)
-	image_url = Column(String(2048), nullable=False)
+	# Legacy inline URL; new rows reference url_dictionary and leave this empty
+	stored_image_url = Column('image_url', String(2048), nullable=False, default='')
+	image_url_id = Column(BigInteger, ForeignKey('url_dictionary.id'), nullable=True, index=True)
 	alt_text = Column(Text, nullable=True)
 	title = Column(Text, nullable=True)
 	width = Column(Integer, nullable=True)
 	height = Column(Integer, nullable=True)
 	file_size = Column(Integer, nullable=True)
 	created_at = Column(DateTime, default=datetime.utcnow)
+
+	image_url_entry = relationship("UrlDictionary", lazy="joined")
+
+	@property
+	def image_url(self) -> str:
+		return self.image_url_entry.url if self.image_url_entry is not None else self.stored_image_url
+
+class StatisticsCounter(Base):
+	"""Incrementally maintained counters backing the statistics view"""
+	__tablename__ = 'statistics_counters'
+
+	name = Column(String(100), primary_key=True)
+	value = Column(BigInteger, nullable=False, default=0)
+	updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class UrlDictionary(Base):
+	"""Deduplicated URLs shared by sessions, links and images"""
+	__tablename__ = 'url_dictionary'
+
+	# Signed 64-bit hash of the URL (see database.hashing.stable_hash64), so IDs
+	# can be computed client-side without a round trip
+	id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False)
+	url = Column(String(2048), nullable=False)
+	domain = Column(String(255), nullable=False, default='', index=True)
+
+class SchemaVersion(Base):
+	"""Applied schema migrations"""
+	__tablename__ = 'schema_version'
+
+	version = Column(Integer, primary_key=True, autoincrement=False)
+	name = Column(String(100), nullable=False)
+	applied_at = Column(DateTime, default=datetime.utcnow)
+
+class SessionSnapshot(Base):
+	"""Change-tracking state of a session stored as a delta against an earlier one"""
+	__tablename__ = 'session_snapshots'
+
+	session_id = Column(Integer, ForeignKey('scraping_sessions.id'), primary_key=True, autoincrement=False)
+	target_hash = Column(BigInteger, nullable=False, index=True)  # hash of (url, scraper_type, css_selector)
+	fingerprint = Column(String(64), nullable=False)  # sha256 over the ordered item keys
+	parent_session_id = Column(Integer, ForeignKey('scraping_sessions.id'), nullable=True)  # None for keyframes
+	chain_length = Column(Integer, nullable=False, default=0)  # deltas since the last keyframe
+	item_count = Column(Integer, nullable=False, default=0)
+	added_count = Column(Integer, nullable=False, default=0)
+	removed_count = Column(Integer, nullable=False, default=0)
+	created_at = Column(DateTime, default=datetime.utcnow)
+
+class SnapshotDelta(Base):
+	"""Item added to or removed from a tracked target between two sessions"""
+	__tablename__ = 'snapshot_deltas'
+
+	id = Column(Integer, primary_key=True, autoincrement=True)
+	session_id = Column(Integer, ForeignKey('scraping_sessions.id'), nullable=False, index=True)
+	item_key = Column(BigInteger, nullable=False)  # hash of the item and its occurrence number
+	change = Column(String(10), nullable=False)  # added, removed
+	content = Column(Text, nullable=False)
+	position = Column(Integer, nullable=True)  # position in the new list for additions
+
+class EntityIndex(Base):
+	"""Globally deduplicated email address or image URL with its sighting totals"""
+	__tablename__ = 'entity_index'
+	__table_args__ = (
+		Index('ix_entity_index_kind_domain_value', 'kind', 'domain', 'value', mysql_length={'value': 191}),
+	)
+
+	# Signed 64-bit hash of kind and value (see database.repository.entity_key)
+	id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False)
+	kind = Column(String(10), nullable=False)  # email, image
+	value = Column(String(2048), nullable=False)  # lower-cased email address or image URL
+	domain = Column(String(255), nullable=False, default='')  # email domain or image host
+	first_seen = Column(DateTime, nullable=False)
+	last_seen = Column(DateTime, nullable=False)
+	occurrence_count = Column(BigInteger, nullable=False, default=0)
+
+class EntitySighting(Base):
+	"""Sessions an indexed entity was found in"""
+	__tablename__ = 'entity_sightings'
+
+	entity_id = Column(BigInteger, ForeignKey('entity_index.id'), primary_key=True, autoincrement=False)
+	session_id = Column(Integer, ForeignKey('scraping_sessions.id'), primary_key=True,
+						autoincrement=False, index=True)
+	occurrence_count = Column(Integer, nullable=False, default=1)
+
+class SessionRollup(Base):
+	"""Session totals per hour or day, domain, scraper type and status, maintained as sessions are written"""
+	__tablename__ = 'session_rollups'
+	__table_args__ = (
+		Index('ix_session_rollups_granularity_bucket', 'granularity', 'bucket'),
+	)
+
+	# Signed 64-bit hash of the group key (see database.repository.rollup_key)
+	id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False)
+	granularity = Column(String(4), nullable=False)  # hour, day
+	bucket = Column(DateTime, nullable=False)  # start of the hour or day
+	domain = Column(String(255), nullable=False, default='')
+	scraper_type = Column(String(100), nullable=False)
+	status = Column(String(50), nullable=False)
+	sessions = Column(BigInteger, nullable=False, default=0)
+	failures = Column(BigInteger, nullable=False, default=0)
+	results = Column(BigInteger, nullable=False, default=0)
+	duration_ms_sum = Column(BigInteger, nullable=False, default=0)
+	timed_sessions = Column(BigInteger, nullable=False, default=0)  # sessions with a duration_ms
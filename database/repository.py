@@ -1,16 +1,39 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
+from sqlalchemy import select, func, case, and_, or_
+from sqlalchemy.orm import Session, aliased, joinedload
 from datetime import datetime
+import hashlib
 import logging
 
 from .models import (
 	ScrapingSession, ScrapedData, ExtractedElements,
-	ExtractedLinks, ExtractedEmails, ExtractedImages
+	ExtractedLinks, ExtractedEmails, ExtractedImages, StatisticsCounter,
+	UrlDictionary, SessionSnapshot, SnapshotDelta, EntityIndex, EntitySighting, SessionRollup
 )
+from .hashing import stable_hash64, url_domain
+from .bulk import bulk_insert, upsert_rows
+from .metadata_index import metadata_field
 
 logger = logging.getLogger(__name__)
 
+# Keep IN-lists well below SQLite's bound parameter limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# Default page size for streaming iteration
+STREAM_BATCH_SIZE = 1000
+
+def chunked(values: Iterable, size: int = IN_CLAUSE_CHUNK_SIZE) -> Iterable[List]:
+	"""Split values into lists of at most size items"""
+	chunk = []
+	for value in values:
+		chunk.append(value)
+		if len(chunk) >= size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
 class BaseRepository(ABC):
 	"""Base repository interface"""
 
@@ -25,23 +48,111 @@ class BaseRepository(ABC):
 	def find_by_id(self, id: int) -> Optional[Any]:
 		pass
 
+class ExtractionRepository(BaseRepository):
+	"""Base repository for tables holding per-session extraction rows"""
+
+	model = None
+
+	def add_batch(self, session_id: int, *args) -> int:
+		"""Insert a session's extracted rows and update their counter (does not commit)"""
+		raise NotImplementedError
+
+	def save_batch(self, session_id: int, *args) -> int:
+		"""Save a batch of extracted rows for a session; returns the number of rows inserted"""
+		try:
+			count = self.add_batch(session_id, *args)
+			self.db_session.commit()
+			logger.info(f"Saved {count} {self.model.__tablename__} rows for session {session_id}")
+			return count
+
+		except Exception as e:
+			self.db_session.rollback()
+			logger.error(f"Failed to save {self.model.__tablename__}: {str(e)}")
+			raise
+
+	def _row_order(self) -> List:
+		"""Ordering of rows within a session"""
+		return [self.model.id]
+
+	def find_by_sessions(self, session_ids: List[int],
+						limit_per_session: Optional[int] = None) -> Dict[int, List[Any]]:
+		"""Find rows for many sessions with one IN-list query per chunk of IDs"""
+		rows_by_session = {session_id: [] for session_id in session_ids}
+
+		for chunk in chunked(session_ids):
+			if limit_per_session is None:
+				query = (self.db_session.query(self.model)
+						.filter(self.model.session_id.in_(chunk))
+						.order_by(self.model.session_id, *self._row_order()))
+			else:
+				# Rank rows inside each session so the limit applies per session
+				row_number = func.row_number().over(
+					partition_by=self.model.session_id,
+					order_by=self._row_order()
+				).label("row_number")
+				ranked = (select(self.model, row_number)
+						.where(self.model.session_id.in_(chunk))
+						.subquery())
+				ranked_model = aliased(self.model, ranked)
+				query = (self.db_session.query(ranked_model)
+						.filter(ranked.c.row_number <= limit_per_session)
+						.order_by(ranked.c.session_id, ranked.c.row_number))
+
+			for row in query:
+				rows_by_session[row.session_id].append(row)
+
+		return rows_by_session
+
+	def count_by_sessions(self, session_ids: List[int]) -> Dict[int, int]:
+		"""Count rows for many sessions with a grouped query per chunk of IDs"""
+		counts = {session_id: 0 for session_id in session_ids}
+
+		for chunk in chunked(session_ids):
+			rows = (self.db_session.query(self.model.session_id, func.count(self.model.id))
+					.filter(self.model.session_id.in_(chunk))
+					.group_by(self.model.session_id))
+			for session_id, count in rows:
+				counts[session_id] = count
+
+		return counts
+
+	def iter_by_session(self, session_id: int, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+		"""Stream the rows of a session through a server-side cursor"""
+		query = (self.db_session.query(self.model)
+				.filter(self.model.session_id == session_id)
+				.order_by(*self._row_order())
+				.execution_options(stream_results=True)
+				.yield_per(batch_size))
+		yield from query
+
+	def iter_all(self, session_ids: Optional[List[int]] = None, after_id: Optional[int] = None,
+				batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+		"""Walk the whole table in ID order using keyset pagination"""
+		while True:
+			query = self.db_session.query(self.model)
+			if session_ids is not None:
+				query = query.filter(self.model.session_id.in_(session_ids))
+			if after_id is not None:
+				query = query.filter(self.model.id > after_id)
+
+			batch = query.order_by(self.model.id).limit(batch_size).all()
+			yield from batch
+
+			if len(batch) < batch_size:
+				return
+			after_id = batch[-1].id
+
 class ScrapingSessionRepository(BaseRepository):
 	"""Repository for scraping sessions"""
 
 	def save(self, url: str, scraper_type: str, status: str = "success",
-			error_message: str = None, metadata: Dict = None) -> ScrapingSession:
+			error_message: str = None, metadata: Dict = None, result_count: int = 0,
+			duration_ms: Optional[int] = None) -> ScrapingSession:
 		"""Create and save a new scraping session"""
 		try:
-			session = ScrapingSession(
-				url=url,
-				scraper_type=scraper_type,
-				status=status,
-				error_message=error_message,
-				extra_data=metadata,  # Using extra_data instead of metadata
-				timestamp=datetime.utcnow()
-			)
+			session = self.add(url, scraper_type, status, error_message, metadata, duration_ms)
+			self.complete(session, result_count)
 
-			self.db_session.add(session)
 			self.db_session.commit()
 			self.db_session.refresh(session)
 
@@ -53,13 +164,78 @@ class ScrapingSessionRepository(BaseRepository):
 			logger.error(f"Failed to save scraping session: {str(e)}")
 			raise
 
+	def add(self, url: str, scraper_type: str, status: str = "success",
+			error_message: str = None, metadata: Dict = None,
+			duration_ms: Optional[int] = None) -> ScrapingSession:
+		"""Add a new scraping session and flush it for its ID (does not commit)"""
+		url_id = UrlRepository(self.db_session).get_or_create_batch([url])[url]
+		session = ScrapingSession(
+			url=url,
+			url_id=url_id,
+			domain=url_domain(url),
+			scraper_type=scraper_type,
+			status=status,
+			error_message=error_message,
+			extra_data=metadata,  # Using extra_data instead of metadata
+			result_count=0,
+			duration_ms=duration_ms,
+			timestamp=datetime.utcnow()
+		)
+		self.db_session.add(session)
+		self.db_session.flush()
+		return session
+
+	def complete(self, session: ScrapingSession, result_count: int):
+		"""
+		Record an added session's result count, statistics counters and rollups (does not commit)
+
+		Called once the session's rows are stored, with the number actually
+		inserted, so the count matches the rows like the migration's backfill.
+		"""
+		session.result_count = result_count
+
+		counters = {"total_sessions": 1}
+		if session.status in StatisticsRepository.STATUS_COUNTERS:
+			counters[StatisticsRepository.STATUS_COUNTERS[session.status]] = 1
+		StatisticsRepository(self.db_session).increment(counters)
+
+		self.db_session.flush()
+		RollupRepository(self.db_session).save(session)
+
+	def watermark(self) -> Tuple[int, int, int]:
+		"""
+		Newest session ID, session count and rollup version
+
+		Together they change whenever sessions are written or archived or the
+		rollups are caught up or rebuilt.
+		"""
+		newest_id = select(func.max(ScrapingSession.id)).scalar_subquery()
+		# The maintained counters avoid a COUNT(*) scan of the sessions
+		count, rollup_version = [
+			select(StatisticsCounter.value).where(StatisticsCounter.name == name).scalar_subquery()
+			for name in ("total_sessions", RollupRepository.VERSION)
+		]
+		newest, total, version = self.db_session.execute(select(newest_id, count, rollup_version)).one()
+		return int(newest or 0), int(total or 0), int(version or 0)
+
 	def find_by_id(self, id: int) -> Optional[ScrapingSession]:
 		"""Find scraping session by ID"""
 		return self.db_session.query(ScrapingSession).filter(ScrapingSession.id == id).first()
 
 	def find_by_url(self, url: str) -> List[ScrapingSession]:
 		"""Find scraping sessions by URL"""
-		return self.db_session.query(ScrapingSession).filter(ScrapingSession.url == url).all()
+		return (self.db_session.query(ScrapingSession)
+				.filter(ScrapingSession.url_id == stable_hash64(url), ScrapingSession.url == url)
+				.all())
+
+	def find_by_ids(self, ids: List[int]) -> List[ScrapingSession]:
+		"""Find scraping sessions by a list of IDs"""
+		sessions = []
+		for chunk in chunked(ids):
+			sessions.extend(self.db_session.query(ScrapingSession)
+							.options(joinedload(ScrapingSession.snapshot))
+							.filter(ScrapingSession.id.in_(chunk)).all())
+		return sessions
 
 	def find_recent(self, limit: int = 10) -> List[ScrapingSession]:
 		"""Find recent scraping sessions"""
@@ -67,35 +243,75 @@ class ScrapingSessionRepository(BaseRepository):
 				.order_by(ScrapingSession.timestamp.desc())
 				.limit(limit).all())
 
-class ElementRepository(BaseRepository):
+	def iter_sessions(self, url: Optional[str] = None, since: Optional[datetime] = None,
+					until: Optional[datetime] = None, css_selector: Optional[str] = None,
+					min_results: Optional[int] = None, max_results: Optional[int] = None,
+					batch_size: int = STREAM_BATCH_SIZE) -> Iterator[ScrapingSession]:
+		"""
+		Stream sessions newest first using keyset pagination on (timestamp, id)
+
+		Each page is a bounded query that resumes after the last row of the previous
+		page, so memory use stays constant and deep pages cost the same as the first.
+		Selector and result-count filters use the metadata and result_count indexes.
+		"""
+		dialect = self.db_session.get_bind().dialect.name
+		last_key = None
+		while True:
+			query = self.db_session.query(ScrapingSession)
+			if url:
+				query = query.filter(ScrapingSession.url_id == stable_hash64(url), ScrapingSession.url == url)
+			if css_selector is not None:
+				query = query.filter(metadata_field(dialect, "css_selector") == css_selector)
+			if min_results is not None:
+				query = query.filter(ScrapingSession.result_count >= min_results)
+			if max_results is not None:
+				query = query.filter(ScrapingSession.result_count <= max_results)
+			if since:
+				query = query.filter(ScrapingSession.timestamp >= since)
+			if until:
+				query = query.filter(ScrapingSession.timestamp < until)
+			if last_key:
+				last_timestamp, last_id = last_key
+				query = query.filter(or_(
+					ScrapingSession.timestamp < last_timestamp,
+					and_(ScrapingSession.timestamp == last_timestamp, ScrapingSession.id < last_id)
+				))
+
+			batch = (query.order_by(ScrapingSession.timestamp.desc(), ScrapingSession.id.desc())
+					.limit(batch_size).all())
+			yield from batch
+
+			if len(batch) < batch_size:
+				return
+			last_key = (batch[-1].timestamp, batch[-1].id)
+
+class ElementRepository(ExtractionRepository):
 	"""Repository for extracted elements"""
 
+	model = ExtractedElements
+
+	def _row_order(self) -> List:
+		return [ExtractedElements.position, ExtractedElements.id]
+
 	def save(self, data: Any) -> Any:
 		"""Generic save method (not used for elements, use save_batch instead)"""
 		raise NotImplementedError("Use save_batch method for elements")
 
-	def save_batch(self, session_id: int, css_selector: str, elements: List[str]) -> List[ExtractedElements]:
-		"""Save a batch of extracted elements"""
-		try:
-			element_records = []
-			for position, element_text in enumerate(elements):
-				element_record = ExtractedElements(
-					session_id=session_id,
-					css_selector=css_selector,
-					element_text=element_text,
-					position=position
-				)
-				element_records.append(element_record)
-				self.db_session.add(element_record)
-
-			self.db_session.commit()
-			logger.info(f"Saved {len(element_records)} elements for session {session_id}")
-			return element_records
-
-		except Exception as e:
-			self.db_session.rollback()
-			logger.error(f"Failed to save elements: {str(e)}")
-			raise
+	def add_batch(self, session_id: int, css_selector: str, elements: List[str]) -> int:
+		"""Insert a batch of extracted elements (does not commit)"""
+		element_rows = [
+			{
+				"session_id": session_id,
+				"css_selector": css_selector,
+				"element_text": element_text,
+				"position": position
+			}
+			for position, element_text in enumerate(elements)
+		]
+		inserted = bulk_insert(self.db_session, ExtractedElements.__table__, element_rows)
+
+		StatisticsRepository(self.db_session).increment({"total_elements": inserted})
+		return inserted
 
 	def find_by_id(self, id: int) -> Optional[ExtractedElements]:
 		return self.db_session.query(ExtractedElements).filter(ExtractedElements.id == id).first()
@@ -106,37 +322,33 @@ class ElementRepository(BaseRepository):
 				.filter(ExtractedElements.session_id == session_id)
 				.order_by(ExtractedElements.position).all())
 
-class LinkRepository(BaseRepository):
+class LinkRepository(ExtractionRepository):
 	"""Repository for extracted links"""
 
+	model = ExtractedLinks
+
 	def save(self, data: Any) -> Any:
 		"""Generic save method (not used for links, use save_batch instead)"""
 		raise NotImplementedError("Use save_batch method for links")
 
-	def save_batch(self, session_id: int, links: List[str]) -> List[ExtractedLinks]:
-		"""Save a batch of extracted links"""
-		try:
-			link_records = []
-			for link_url in links:
-				# Basic external link detection
-				is_external = not (link_url.startswith('/') or 'localhost' in link_url)
-
-				link_record = ExtractedLinks(
-					session_id=session_id,
-					url=link_url,
-					is_external=is_external
-				)
-				link_records.append(link_record)
-				self.db_session.add(link_record)
+	def add_batch(self, session_id: int, links: List[str]) -> int:
+		"""Insert a batch of extracted links (does not commit)"""
+		url_ids = UrlRepository(self.db_session).get_or_create_batch(links)
 
-			self.db_session.commit()
-			logger.info(f"Saved {len(link_records)} links for session {session_id}")
-			return link_records
+		link_rows = []
+		for link_url in links:
+			# Basic external link detection
+			is_external = not (link_url.startswith('/') or 'localhost' in link_url)
 
-		except Exception as e:
-			self.db_session.rollback()
-			logger.error(f"Failed to save links: {str(e)}")
-			raise
+			link_rows.append({
+				"session_id": session_id,
+				"url_id": url_ids[link_url],
+				"is_external": is_external
+			})
+		inserted = bulk_insert(self.db_session, ExtractedLinks.__table__, link_rows)
+
+		StatisticsRepository(self.db_session).increment({"total_links": inserted})
+		return inserted
 
 	def find_by_id(self, id: int) -> Optional[ExtractedLinks]:
 		return self.db_session.query(ExtractedLinks).filter(ExtractedLinks.id == id).first()
@@ -146,33 +358,23 @@ class LinkRepository(BaseRepository):
 		return (self.db_session.query(ExtractedLinks)
 				.filter(ExtractedLinks.session_id == session_id).all())
 
-class EmailRepository(BaseRepository):
+class EmailRepository(ExtractionRepository):
 	"""Repository for extracted emails"""
 
+	model = ExtractedEmails
+
 	def save(self, data: Any) -> Any:
 		"""Generic save method (not used for emails, use save_batch instead)"""
 		raise NotImplementedError("Use save_batch method for emails")
 
-	def save_batch(self, session_id: int, emails: List[str]) -> List[ExtractedEmails]:
-		"""Save a batch of extracted emails"""
-		try:
-			email_records = []
-			for email in emails:
-				email_record = ExtractedEmails(
-					session_id=session_id,
-					email=email
-				)
-				email_records.append(email_record)
-				self.db_session.add(email_record)
+	def add_batch(self, session_id: int, emails: List[str]) -> int:
+		"""Insert a batch of extracted emails (does not commit)"""
+		email_rows = [{"session_id": session_id, "email": email} for email in emails]
+		inserted = bulk_insert(self.db_session, ExtractedEmails.__table__, email_rows)
+		EntityRepository(self.db_session).save("email", session_id, emails)
 
-			self.db_session.commit()
-			logger.info(f"Saved {len(email_records)} emails for session {session_id}")
-			return email_records
-
-		except Exception as e:
-			self.db_session.rollback()
-			logger.error(f"Failed to save emails: {str(e)}")
-			raise
+		StatisticsRepository(self.db_session).increment({"total_emails": inserted})
+		return inserted
 
 	def find_by_id(self, id: int) -> Optional[ExtractedEmails]:
 		return self.db_session.query(ExtractedEmails).filter(ExtractedEmails.id == id).first()
@@ -182,33 +384,28 @@ class EmailRepository(BaseRepository):
 		return (self.db_session.query(ExtractedEmails)
 				.filter(ExtractedEmails.session_id == session_id).all())
 
-class ImageRepository(BaseRepository):
+class ImageRepository(ExtractionRepository):
 	"""Repository for extracted images"""
 
+	model = ExtractedImages
+
 	def save(self, data: Any) -> Any:
 		"""Generic save method (not used for images, use save_batch instead)"""
 		raise NotImplementedError("Use save_batch method for images")
 
-	def save_batch(self, session_id: int, images: List[str]) -> List[ExtractedImages]:
-		"""Save a batch of extracted images"""
-		try:
-			image_records = []
-			for image_url in images:
-				image_record = ExtractedImages(
-					session_id=session_id,
-					image_url=image_url
-				)
-				image_records.append(image_record)
-				self.db_session.add(image_record)
+	def add_batch(self, session_id: int, images: List[str]) -> int:
+		"""Insert a batch of extracted images (does not commit)"""
+		url_ids = UrlRepository(self.db_session).get_or_create_batch(images)
 
-			self.db_session.commit()
-			logger.info(f"Saved {len(image_records)} images for session {session_id}")
-			return image_records
+		image_rows = [
+			{"session_id": session_id, "image_url_id": url_ids[image_url]}
+			for image_url in images
+		]
+		inserted = bulk_insert(self.db_session, ExtractedImages.__table__, image_rows)
+		EntityRepository(self.db_session).save("image", session_id, images)
 
-		except Exception as e:
-			self.db_session.rollback()
-			logger.error(f"Failed to save images: {str(e)}")
-			raise
+		StatisticsRepository(self.db_session).increment({"total_images": inserted})
+		return inserted
 
 	def find_by_id(self, id: int) -> Optional[ExtractedImages]:
 		return self.db_session.query(ExtractedImages).filter(ExtractedImages.id == id).first()
@@ -217,3 +414,598 @@ class ImageRepository(BaseRepository):
 		"""Find all images for a session"""
 		return (self.db_session.query(ExtractedImages)
 				.filter(ExtractedImages.session_id == session_id).all())
+
+class StatisticsRepository(BaseRepository):
+	"""Repository for the incrementally maintained statistics counters"""
+
+	COUNTERS = (
+		"total_sessions", "successful_sessions", "failed_sessions",
+		"total_elements", "total_links", "total_emails", "total_images"
+	)
+	INITIALIZED_MARKER = "counters_initialized"
+	# Session status -> counter of the sessions with that status
+	STATUS_COUNTERS = {"success": "successful_sessions", "failed": "failed_sessions"}
+
+	def save(self, name: str, value: int) -> StatisticsCounter:
+		"""Set a counter to an absolute value (does not commit)"""
+		counter = self.find_by_id(name)
+		if counter is None:
+			counter = StatisticsCounter(name=name, value=value)
+			self.db_session.add(counter)
+		else:
+			counter.value = value
+		self.db_session.flush()
+		return counter
+
+	def find_by_id(self, id: str) -> Optional[StatisticsCounter]:
+		return self.db_session.query(StatisticsCounter).filter(StatisticsCounter.name == id).first()
+
+	def increment(self, deltas: Dict[str, int]):
+		"""Add deltas to counters as part of the caller's transaction (does not commit)"""
+		now = datetime.utcnow()
+		# One upsert, so concurrent writers creating the same counter cannot collide on its key
+		rows = [{"name": name, "value": delta, "updated_at": now}
+				for name, delta in sorted(deltas.items()) if delta]
+		upsert_rows(self.db_session, StatisticsCounter.__table__, rows, ["name"],
+					increment=["value"], latest=["updated_at"])
+
+	def get_all(self) -> Dict[str, int]:
+		"""Get all counters as a name -> value mapping"""
+		rows = self.db_session.query(StatisticsCounter.name, StatisticsCounter.value).all()
+		return {name: value for name, value in rows}
+
+	def compute_totals(self) -> Dict[str, int]:
+		"""Compute all statistics from the base tables in a single aggregated query"""
+		def table_count(model):
+			return select(func.count()).select_from(model).scalar_subquery()
+
+		session_totals = select(
+			func.count(ScrapingSession.id).label("total_sessions"),
+			func.sum(case((ScrapingSession.status == "success", 1), else_=0)).label("successful_sessions"),
+			func.sum(case((ScrapingSession.status == "failed", 1), else_=0)).label("failed_sessions")
+		).subquery()
+
+		row = self.db_session.execute(select(
+			session_totals.c.total_sessions,
+			session_totals.c.successful_sessions,
+			session_totals.c.failed_sessions,
+			table_count(ExtractedElements).label("total_elements"),
+			table_count(ExtractedLinks).label("total_links"),
+			table_count(ExtractedEmails).label("total_emails"),
+			table_count(ExtractedImages).label("total_images")
+		)).one()
+
+		return {name: int(getattr(row, name) or 0) for name in self.COUNTERS}
+
+	def rebuild(self) -> Dict[str, int]:
+		"""Recompute all counters from the base tables and store them"""
+		try:
+			totals = self.compute_totals()
+			for name, value in totals.items():
+				self.save(name, value)
+			self.save(self.INITIALIZED_MARKER, 1)
+			self.db_session.commit()
+			logger.info("Rebuilt statistics counters")
+			return totals
+
+		except Exception as e:
+			self.db_session.rollback()
+			logger.error(f"Failed to rebuild statistics counters: {str(e)}")
+			raise
+
+	def get_statistics(self) -> Dict[str, int]:
+		"""Get statistics from the counters, seeding them from the base tables on first use"""
+		counters = self.get_all()
+		if self.INITIALIZED_MARKER not in counters:
+			return self.rebuild()
+		return {name: int(counters.get(name, 0)) for name in self.COUNTERS}
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+def rollup_bucket(granularity: str, timestamp: datetime) -> datetime:
+	"""Start of the hour or day a timestamp falls into"""
+	if granularity == "hour":
+		return timestamp.replace(minute=0, second=0, microsecond=0)
+	return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def rollup_key(granularity: str, bucket: datetime, domain: str, scraper_type: str, status: str) -> int:
+	"""Hash identifying one group of the session rollups"""
+	return stable_hash64("\x00".join([granularity, bucket.isoformat(), domain, scraper_type, status]))
+
+class RollupRepository(BaseRepository):
+	"""
+	Repository for the hourly and daily session rollups
+
+	Sessions are added to their rollup groups in the transaction that writes
+	them, and the id of the newest rolled-up session is kept as a high-water
+	mark so catch_up only has to read sessions written without a rollup.
+	Archiving sessions leaves the rollups untouched, so they keep the full
+	history.
+	"""
+
+	HIGH_WATER_MARK = "rollup_high_water_mark"
+	# Bumped whenever rollups change other than by a session write, for caches derived from them
+	VERSION = "rollup_version"
+	MEASURES = ("sessions", "failures", "results", "duration_ms_sum", "timed_sessions")
+
+	def save(self, session: ScrapingSession) -> int:
+		"""Add one flushed session to the rollups (does not commit)"""
+		return self.record([session])
+
+	def find_by_id(self, id: int) -> Optional[SessionRollup]:
+		return self.db_session.query(SessionRollup).filter(SessionRollup.id == id).first()
+
+	def record(self, sessions: Iterable[Any]) -> int:
+		"""
+		Upsert the rollup groups of sessions and advance the high-water mark (does not commit)
+
+		Args:
+			sessions: Objects with the id, timestamp, domain, scraper_type, status,
+				result_count and duration_ms of ScrapingSession
+
+		Returns:
+			Number of sessions recorded
+		"""
+		groups = {}
+		last_id = None
+		count = 0
+		for s in sessions:
+			count += 1
+			last_id = s.id if last_id is None else max(last_id, s.id)
+			timestamp = s.timestamp or datetime.utcnow()
+			status = s.status or ""
+			for granularity in ROLLUP_GRANULARITIES:
+				bucket = rollup_bucket(granularity, timestamp)
+				key = rollup_key(granularity, bucket, s.domain or "", s.scraper_type, status)
+				group = groups.get(key)
+				if group is None:
+					group = groups[key] = {
+						"id": key, "granularity": granularity, "bucket": bucket, "domain": s.domain or "",
+						"scraper_type": s.scraper_type, "status": status,
+						**{measure: 0 for measure in self.MEASURES}
+					}
+				group["sessions"] += 1
+				group["failures"] += status == "failed"
+				group["results"] += s.result_count or 0
+				if s.duration_ms is not None:
+					group["duration_ms_sum"] += s.duration_ms
+					group["timed_sessions"] += 1
+
+		if not count:
+			return 0
+		# Key order keeps concurrent upserts from locking rows in opposite orders
+		upsert_rows(self.db_session, SessionRollup.__table__, sorted(groups.values(), key=lambda g: g["id"]),
+					["id"], increment=list(self.MEASURES))
+		upsert_rows(self.db_session, StatisticsCounter.__table__,
+					[{"name": self.HIGH_WATER_MARK, "value": last_id}], ["name"], latest=["value"])
+		return count
+
+	def high_water_mark(self) -> int:
+		"""ID of the newest session included in the rollups"""
+		counter = StatisticsRepository(self.db_session).find_by_id(self.HIGH_WATER_MARK)
+		return counter.value if counter is not None else 0
+
+	def catch_up(self, batch_size: int = STREAM_BATCH_SIZE) -> int:
+		"""Roll up sessions newer than the high-water mark, committing per batch"""
+		try:
+			last_id = self.high_water_mark()
+			# Sessions written while catching up roll themselves up in their own transaction
+			newest_id = self.db_session.execute(select(func.max(ScrapingSession.id))).scalar() or 0
+			recorded = 0
+			while True:
+				rows = self.db_session.execute(
+					select(ScrapingSession.id, ScrapingSession.timestamp, ScrapingSession.domain,
+						ScrapingSession.scraper_type, ScrapingSession.status,
+						ScrapingSession.result_count, ScrapingSession.duration_ms)
+					.where(ScrapingSession.id > last_id, ScrapingSession.id <= newest_id)
+					.order_by(ScrapingSession.id)
+					.limit(batch_size)
+				).fetchall()
+				if not rows:
+					return recorded
+				recorded += self.record(rows)
+				StatisticsRepository(self.db_session).increment({self.VERSION: 1})
+				self.db_session.commit()
+				last_id = rows[-1].id
+
+		except Exception as e:
+			self.db_session.rollback()
+			logger.error(f"Failed to catch up session rollups: {str(e)}")
+			raise
+
+	def rebuild(self, batch_size: int = STREAM_BATCH_SIZE) -> int:
+		"""Drop the rollups and recompute them from the sessions still in the database"""
+		try:
+			self.db_session.query(SessionRollup).delete(synchronize_session=False)
+			statistics_repo = StatisticsRepository(self.db_session)
+			statistics_repo.save(self.HIGH_WATER_MARK, 0)
+			statistics_repo.increment({self.VERSION: 1})
+			self.db_session.commit()
+		except Exception as e:
+			self.db_session.rollback()
+			logger.error(f"Failed to reset session rollups: {str(e)}")
+			raise
+		recorded = self.catch_up(batch_size)
+		logger.info(f"Rebuilt session rollups from {recorded} sessions")
+		return recorded
+
+class UrlRepository(BaseRepository):
+	"""Repository for the deduplicated URL dictionary"""
+
+	def save(self, url: str) -> int:
+		"""Get or create a single URL entry and return its ID (does not commit)"""
+		return self.get_or_create_batch([url])[url]
+
+	def find_by_id(self, id: int) -> Optional[UrlDictionary]:
+		return self.db_session.query(UrlDictionary).filter(UrlDictionary.id == id).first()
+
+	def find_by_domain(self, domain: str) -> List[UrlDictionary]:
+		"""Find all known URLs of a domain"""
+		return self.db_session.query(UrlDictionary).filter(UrlDictionary.domain == domain.lower()).all()
+
+	def get_or_create_batch(self, urls: Iterable[str]) -> Dict[str, int]:
+		"""
+		Resolve many URLs to dictionary IDs in one round trip per chunk (does not commit)
+
+		IDs are content hashes, so only the existence check touches the database and
+		all missing entries are written with a single multi-row insert.
+		"""
+		ids = {url: stable_hash64(url) for url in dict.fromkeys(urls)}
+
+		existing = {}
+		for chunk in chunked(list(ids.values())):
+			rows = (self.db_session.query(UrlDictionary.id, UrlDictionary.url)
+					.filter(UrlDictionary.id.in_(chunk)))
+			existing.update({id_: url for id_, url in rows})
+
+		missing = []
+		for url, id_ in ids.items():
+			if id_ not in existing:
+				missing.append({"id": id_, "url": url, "domain": url_domain(url)})
+			elif existing[id_] != url:
+				raise ValueError(f"URL hash collision between {url!r} and {existing[id_]!r}")
+
+		# Concurrent writers may add the same URLs; the rows are identical, so keep the first
+		bulk_insert(self.db_session, UrlDictionary.__table__, missing, ignore_conflicts=True)
+
+		return ids
+
+class EntityRepository(BaseRepository):
+	"""Repository for the deduplicated email and image entity index"""
+
+	KINDS = ("email", "image")
+
+	def save(self, kind: str, session_id: int, values: List[str]) -> int:
+		"""Record the entities found by one session (does not commit)"""
+		seen_at = datetime.utcnow()
+		return self.record(kind, ((session_id, value, seen_at) for value in values))
+
+	def find_by_id(self, id: int) -> Optional[EntityIndex]:
+		return self.db_session.query(EntityIndex).filter(EntityIndex.id == id).first()
+
+	def find_by_value(self, kind: str, value: str) -> Optional[EntityIndex]:
+		"""Find the index entry of one email address or image URL"""
+		return self.find_by_id(entity_key(kind, value))
+
+	def record(self, kind: str, sightings: Iterable[Tuple[int, str, datetime]]) -> int:
+		"""
+		Upsert entities and their per-session sightings (does not commit)
+
+		Sightings are aggregated client-side first, so each entity and each
+		(entity, session) pair costs one row in a single multi-row upsert.
+
+		Args:
+			kind: "email" or "image"
+			sightings: (session_id, value, seen_at) tuples, one per occurrence
+
+		Returns:
+			Number of occurrences recorded
+		"""
+		entities = {}
+		per_session = {}
+		occurrences = 0
+		for session_id, value, seen_at in sightings:
+			value = normalize_entity(kind, value)
+			if not value:
+				continue
+			occurrences += 1
+			entity_id = entity_key(kind, value)
+
+			entity = entities.get(entity_id)
+			if entity is None:
+				entities[entity_id] = {
+					"id": entity_id, "kind": kind, "value": value, "domain": entity_domain(kind, value),
+					"first_seen": seen_at, "last_seen": seen_at, "occurrence_count": 1
+				}
+			else:
+				entity["first_seen"] = min(entity["first_seen"], seen_at)
+				entity["last_seen"] = max(entity["last_seen"], seen_at)
+				entity["occurrence_count"] += 1
+
+			key = (entity_id, session_id)
+			per_session[key] = per_session.get(key, 0) + 1
+
+		# Key order keeps concurrent upserts from locking rows in opposite orders
+		entity_rows = sorted(entities.values(), key=lambda entity: entity["id"])
+		upsert_rows(self.db_session, EntityIndex.__table__, entity_rows, ["id"],
+					increment=["occurrence_count"], earliest=["first_seen"], latest=["last_seen"])
+		upsert_rows(self.db_session, EntitySighting.__table__, [
+			{"entity_id": entity_id, "session_id": session_id, "occurrence_count": count}
+			for (entity_id, session_id), count in sorted(per_session.items())
+		], ["entity_id", "session_id"], increment=["occurrence_count"])
+		return occurrences
+
+	def _unique_query(self, kind: str, domain: Optional[str], site: Optional[str]):
+		query = self.db_session.query(EntityIndex).filter(EntityIndex.kind == kind)
+		if domain is not None:
+			query = query.filter(EntityIndex.domain == domain.lower())
+		if site is not None:
+			# Entities seen on pages of a site: sessions by url_dictionary domain, then sightings
+			seen_on_site = (select(EntitySighting.entity_id)
+							.join(ScrapingSession, ScrapingSession.id == EntitySighting.session_id)
+							.join(UrlDictionary, UrlDictionary.id == ScrapingSession.url_id)
+							.where(UrlDictionary.domain == site.lower()))
+			query = query.filter(EntityIndex.id.in_(seen_on_site))
+		return query
+
+	def find_unique(self, kind: str, domain: Optional[str] = None, site: Optional[str] = None,
+					limit: Optional[int] = 100, offset: int = 0) -> List[EntityIndex]:
+		"""
+		Page through unique entities ordered by value
+
+		Args:
+			kind: "email" or "image"
+			domain: Only entities of this email domain or image host
+			site: Only entities found on pages of this domain
+		"""
+		query = self._unique_query(kind, domain, site).order_by(EntityIndex.value).offset(offset)
+		if limit is not None:
+			query = query.limit(limit)
+		return query.all()
+
+	def count_unique(self, kind: str, domain: Optional[str] = None, site: Optional[str] = None) -> int:
+		"""Number of unique entities matching the find_unique filters"""
+		return self._unique_query(kind, domain, site).count()
+
+	def find_session_ids(self, kind: str, value: str) -> List[int]:
+		"""Sessions an email address or image URL was found in, oldest first"""
+		rows = (self.db_session.query(EntitySighting.session_id)
+				.filter(EntitySighting.entity_id == entity_key(kind, value))
+				.order_by(EntitySighting.session_id))
+		return [session_id for session_id, in rows]
+
+def normalize_entity(kind: str, value: str) -> str:
+	"""Canonical form of an entity: emails are matched case-insensitively, URLs exactly"""
+	value = (value or "").strip()
+	return value.lower() if kind == "email" else value
+
+def entity_key(kind: str, value: str) -> int:
+	"""ID of an email address or image URL in the entity index"""
+	return stable_hash64(f"{kind}\x00{normalize_entity(kind, value)}")
+
+def entity_domain(kind: str, value: str) -> str:
+	"""Domain part of an email address or host of an image URL"""
+	if kind == "email":
+		return value.rpartition("@")[2].lower()[:255]
+	return url_domain(value)
+
+def target_key(url: str, scraper_type: str, css_selector: Optional[str] = None) -> int:
+	"""Hash identifying a repeatedly scraped (url, scraper_type, css_selector) target"""
+	return stable_hash64("\x00".join([url, scraper_type, css_selector or ""]))
+
+def item_keys(items: List[str]) -> List[int]:
+	"""
+	Hash each item together with its occurrence number
+
+	Repeated items ("Read more", duplicate links) get distinct keys, which turns
+	the list into a set and makes add/remove diffs exact for duplicates too.
+	"""
+	seen = {}
+	keys = []
+	for item in items:
+		occurrence = seen.get(item, 0)
+		seen[item] = occurrence + 1
+		keys.append(stable_hash64(f"{occurrence}\x00{item}"))
+	return keys
+
+def fingerprint(keys: List[int]) -> str:
+	"""Content fingerprint over the ordered item keys"""
+	return hashlib.sha256(",".join(map(str, keys)).encode("ascii")).hexdigest()
+
+class ChangeTrackingRepository(BaseRepository):
+	"""
+	Repository for delta-encoded sessions of repeatedly scraped targets
+
+	Each tracked session stores only the items added and removed relative to the
+	previous session of the same target. A full keyframe is written when the
+	chain reaches keyframe_interval or retained items changed order, so any
+	snapshot is rebuilt from at most keyframe_interval deltas.
+	"""
+
+	def __init__(self, db_session: Session, keyframe_interval: int = 50):
+		super().__init__(db_session)
+		self.keyframe_interval = keyframe_interval
+
+	def save(self, session_id: int, target_hash: int, items: List[str]) -> SessionSnapshot:
+		"""Store a session's items as a delta against the target's previous session"""
+		try:
+			snapshot = self.add(session_id, target_hash, items)
+			self.db_session.commit()
+
+			logger.info(f"Saved snapshot for session {session_id}: "
+						f"+{snapshot.added_count} -{snapshot.removed_count}")
+			return snapshot
+
+		except Exception as e:
+			self.db_session.rollback()
+			logger.error(f"Failed to save snapshot: {str(e)}")
+			raise
+
+	def add(self, session_id: int, target_hash: int, items: List[str]) -> SessionSnapshot:
+		"""Insert a session's snapshot and deltas (does not commit)"""
+		keys = item_keys(items)
+		snapshot = SessionSnapshot(
+			session_id=session_id,
+			target_hash=target_hash,
+			fingerprint=fingerprint(keys),
+			item_count=len(items)
+		)
+
+		previous = self.find_previous(snapshot)
+
+		deltas = None
+		if previous is not None and previous.chain_length + 1 < self.keyframe_interval:
+			if previous.fingerprint == snapshot.fingerprint:
+				# Unchanged content: nothing but the snapshot row is written
+				deltas = []
+			else:
+				deltas = self._diff(session_id, self._reconstruct_keyed(previous.session_id), keys, items)
+			if deltas is not None:
+				snapshot.parent_session_id = previous.session_id
+				snapshot.chain_length = previous.chain_length + 1
+
+		if snapshot.parent_session_id is None:
+			deltas = self._keyframe(session_id, keys, items)
+
+		snapshot.added_count = sum(1 for d in deltas if d["change"] == "added")
+		snapshot.removed_count = len(deltas) - snapshot.added_count
+
+		self.db_session.add(snapshot)
+		bulk_insert(self.db_session, SnapshotDelta.__table__, deltas)
+		self.db_session.flush()
+		return snapshot
+
+	def _keyframe(self, session_id: int, keys: List[int], items: List[str]) -> List[Dict]:
+		return [
+			{"session_id": session_id, "item_key": key, "change": "added", "content": item, "position": position}
+			for position, (key, item) in enumerate(zip(keys, items))
+		]
+
+	def _diff(self, session_id: int, previous: List[Tuple[int, str]], keys: List[int],
+			items: List[str]) -> Optional[List[Dict]]:
+		"""Added/removed rows, or None when retained items were reordered"""
+		previous_keys = {key for key, _ in previous}
+		new_keys = set(keys)
+
+		retained_before = [key for key, _ in previous if key in new_keys]
+		retained_after = [key for key in keys if key in previous_keys]
+		if retained_before != retained_after:
+			return None
+
+		deltas = [
+			{"session_id": session_id, "item_key": key, "change": "removed", "content": item, "position": None}
+			for key, item in previous if key not in new_keys
+		]
+		deltas += [
+			{"session_id": session_id, "item_key": key, "change": "added", "content": item, "position": position}
+			for position, (key, item) in enumerate(zip(keys, items)) if key not in previous_keys
+		]
+		return deltas
+
+	def find_by_id(self, id: int) -> Optional[SessionSnapshot]:
+		return self.db_session.query(SessionSnapshot).filter(SessionSnapshot.session_id == id).first()
+
+	def find_by_sessions(self, session_ids: List[int]) -> Dict[int, SessionSnapshot]:
+		"""Find the snapshots of the tracked sessions among session_ids"""
+		snapshots = {}
+		for chunk in chunked(session_ids):
+			for snapshot in self.db_session.query(SessionSnapshot).filter(SessionSnapshot.session_id.in_(chunk)):
+				snapshots[snapshot.session_id] = snapshot
+		return snapshots
+
+	def find_deltas(self, session_id: int) -> List[SnapshotDelta]:
+		"""Find the added and removed items recorded for a session"""
+		return (self.db_session.query(SnapshotDelta)
+				.filter(SnapshotDelta.session_id == session_id)
+				.order_by(SnapshotDelta.id).all())
+
+	def find_previous(self, snapshot: SessionSnapshot) -> Optional[SessionSnapshot]:
+		"""Find the snapshot of the same target's preceding session"""
+		return (self.db_session.query(SessionSnapshot)
+				.filter(SessionSnapshot.target_hash == snapshot.target_hash,
+						SessionSnapshot.session_id < snapshot.session_id)
+				.order_by(SessionSnapshot.session_id.desc())
+				.first())
+
+	def changes(self, session_id: int) -> Optional[Tuple[Optional[int], List[str], List[str]]]:
+		"""(previous session ID, added items, removed items) of a tracked session"""
+		snapshot = self.find_by_id(session_id)
+		if snapshot is None:
+			return None
+
+		if snapshot.parent_session_id is not None:
+			deltas = self.find_deltas(session_id)
+			return (
+				snapshot.parent_session_id,
+				[d.content for d in deltas if d.change == "added"],
+				[d.content for d in deltas if d.change == "removed"]
+			)
+
+		# Keyframes store full content, so compare against the preceding snapshot
+		previous = self.find_previous(snapshot)
+		current = self._reconstruct_keyed(session_id)
+		if previous is None:
+			return None, [item for _, item in current], []
+
+		before = self._reconstruct_keyed(previous.session_id)
+		before_keys = {key for key, _ in before}
+		current_keys = {key for key, _ in current}
+		return (
+			previous.session_id,
+			[item for key, item in current if key not in before_keys],
+			[item for key, item in before if key not in current_keys]
+		)
+
+	def _reconstruct_keyed(self, session_id: int) -> List[Tuple[int, str]]:
+		"""Rebuild the ordered (key, item) list of a tracked session"""
+		chain = []
+		current = self.find_by_id(session_id)
+		while current is not None:
+			chain.append(current.session_id)
+			if current.parent_session_id is None:
+				break
+			parent = self.find_by_id(current.parent_session_id)
+			if parent is None:
+				# Without the parent's items the deltas cannot be replayed
+				raise ValueError(f"Snapshot of session {current.session_id} builds on session "
+								f"{current.parent_session_id}, which has no snapshot")
+			current = parent
+		chain.reverse()
+
+		deltas_by_session = {sid: [] for sid in chain}
+		for chunk in chunked(chain):
+			for delta in (self.db_session.query(SnapshotDelta)
+						.filter(SnapshotDelta.session_id.in_(chunk))
+						.order_by(SnapshotDelta.id)):
+				deltas_by_session[delta.session_id].append(delta)
+
+		state = []
+		for sid in chain:
+			removed = {d.item_key for d in deltas_by_session[sid] if d.change == "removed"}
+			added = {d.position: (d.item_key, d.content) for d in deltas_by_session[sid] if d.change == "added"}
+
+			# Retained items keep their relative order around the inserted positions
+			retained = iter([entry for entry in state if entry[0] not in removed])
+			size = len(state) - len(removed) + len(added)
+			state = [added[position] if position in added else next(retained) for position in range(size)]
+
+		return state
+
+	def reconstruct(self, session_id: int) -> List[str]:
+		"""Rebuild the full item list of a tracked session"""
+		return [item for _, item in self._reconstruct_keyed(session_id)]
+
+	def materialize(self, session_id: int):
+		"""Rewrite a tracked session as a keyframe so it no longer depends on its parents (does not commit)"""
+		snapshot = self.find_by_id(session_id)
+		if snapshot is None or snapshot.parent_session_id is None:
+			return
+
+		state = self._reconstruct_keyed(session_id)
+		self.db_session.query(SnapshotDelta).filter(SnapshotDelta.session_id == session_id).delete(
+			synchronize_session=False)
+		bulk_insert(self.db_session, SnapshotDelta.__table__, self._keyframe(
+			session_id, [key for key, _ in state], [item for _, item in state]))
+		snapshot.parent_session_id = None
+		snapshot.chain_length = 0
+		self.db_session.flush()
@@ -0,0 +1,149 @@
+"""
+Full-text search over extracted element text
+
+SQLite uses an FTS5 table with extracted_elements as its external content,
+kept in sync by triggers. PostgreSQL uses a generated tsvector column with a
+GIN index, and MySQL a FULLTEXT index. Other backends fall back to LIKE.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import text, inspect, bindparam, DateTime
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "extracted_elements_fts"
+
+_SQLITE_TRIGGERS = [
+	f"""CREATE TRIGGER IF NOT EXISTS extracted_elements_fts_insert AFTER INSERT ON extracted_elements BEGIN
+		INSERT INTO {FTS_TABLE}(rowid, element_text) VALUES (new.id, new.element_text);
+	END""",
+	f"""CREATE TRIGGER IF NOT EXISTS extracted_elements_fts_delete AFTER DELETE ON extracted_elements BEGIN
+		INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, element_text) VALUES ('delete', old.id, old.element_text);
+	END""",
+	f"""CREATE TRIGGER IF NOT EXISTS extracted_elements_fts_update AFTER UPDATE OF element_text ON extracted_elements BEGIN
+		INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, element_text) VALUES ('delete', old.id, old.element_text);
+		INSERT INTO {FTS_TABLE}(rowid, element_text) VALUES (new.id, new.element_text);
+	END""",
+]
+
+def install_search_index(connection: Connection):
+	"""Create the backend's full-text index over extracted_elements.element_text (idempotent)"""
+	dialect = connection.dialect.name
+
+	if dialect == "sqlite":
+		exists = connection.execute(text(
+			"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+		), {"name": FTS_TABLE}).first()
+		if not exists:
+			connection.execute(text(
+				f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(element_text, "
+				f"content='extracted_elements', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+			))
+			# Index rows that were written before the index existed
+			connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+		for trigger in _SQLITE_TRIGGERS:
+			connection.execute(text(trigger))
+
+	elif dialect == "postgresql":
+		connection.execute(text(
+			"ALTER TABLE extracted_elements ADD COLUMN IF NOT EXISTS search_vector tsvector "
+			"GENERATED ALWAYS AS (to_tsvector('simple', coalesce(element_text, ''))) STORED"
+		))
+		connection.execute(text(
+			"CREATE INDEX IF NOT EXISTS ix_extracted_elements_search_vector "
+			"ON extracted_elements USING GIN (search_vector)"
+		))
+
+	elif dialect == "mysql":
+		indexes = [index["name"] for index in inspect(connection).get_indexes("extracted_elements")]
+		if "ix_extracted_elements_fulltext" not in indexes:
+			connection.execute(text(
+				"ALTER TABLE extracted_elements ADD FULLTEXT INDEX ix_extracted_elements_fulltext (element_text)"
+			))
+
+	else:
+		logger.warning(f"No full-text index support for {dialect}, search will scan")
+
+def _fts5_query(query: str) -> str:
+	"""Quote each term so user input is never parsed as FTS5 syntax (terms are ANDed)"""
+	return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def search_elements(db_session: Session, query: str, url_prefix: Optional[str] = None,
+					since: Optional[datetime] = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+	"""Ranked full-text search over extracted elements, best matches first"""
+	dialect = db_session.get_bind().dialect.name
+	params = {"query": query, "limit": limit, "offset": offset}
+	filters = ""
+	if url_prefix:
+		escaped = url_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+		params["url_prefix"] = escaped + "%"
+		filters += " AND s.url LIKE :url_prefix ESCAPE '\\'"
+	if since:
+		params["since"] = since
+		filters += " AND s.timestamp >= :since"
+
+	columns = "e.id, e.session_id, e.css_selector, e.element_text, s.url, s.timestamp"
+	if dialect == "sqlite":
+		params["query"] = _fts5_query(query)
+		if not params["query"]:
+			return []
+		statement = (
+			f"SELECT {columns}, -bm25({FTS_TABLE}) AS score, "
+			f"snippet({FTS_TABLE}, 0, '[', ']', '...', 16) AS snippet "
+			f"FROM {FTS_TABLE} "
+			f"JOIN extracted_elements e ON e.id = {FTS_TABLE}.rowid "
+			f"JOIN scraping_sessions s ON s.id = e.session_id "
+			f"WHERE {FTS_TABLE} MATCH :query{filters} "
+			f"ORDER BY bm25({FTS_TABLE}) LIMIT :limit OFFSET :offset"
+		)
+	elif dialect == "postgresql":
+		statement = (
+			f"SELECT {columns}, ts_rank(e.search_vector, q) AS score, "
+			f"ts_headline('simple', e.element_text, q, 'StartSel=[, StopSel=], MaxFragments=1') AS snippet "
+			f"FROM extracted_elements e "
+			f"JOIN scraping_sessions s ON s.id = e.session_id, "
+			f"websearch_to_tsquery('simple', :query) q "
+			f"WHERE e.search_vector @@ q{filters} "
+			f"ORDER BY score DESC, e.id LIMIT :limit OFFSET :offset"
+		)
+	elif dialect == "mysql":
+		statement = (
+			f"SELECT {columns}, MATCH(e.element_text) AGAINST (:query IN NATURAL LANGUAGE MODE) AS score, "
+			f"NULL AS snippet "
+			f"FROM extracted_elements e "
+			f"JOIN scraping_sessions s ON s.id = e.session_id "
+			f"WHERE MATCH(e.element_text) AGAINST (:query IN NATURAL LANGUAGE MODE){filters} "
+			f"ORDER BY score DESC, e.id LIMIT :limit OFFSET :offset"
+		)
+	else:
+		params["query"] = f"%{query}%"
+		statement = (
+			f"SELECT {columns}, 0 AS score, NULL AS snippet "
+			f"FROM extracted_elements e "
+			f"JOIN scraping_sessions s ON s.id = e.session_id "
+			f"WHERE e.element_text LIKE :query{filters} "
+			f"ORDER BY e.id LIMIT :limit OFFSET :offset"
+		)
+
+	statement = text(statement)
+	if since:
+		statement = statement.bindparams(bindparam("since", type_=DateTime))
+	statement = statement.columns(timestamp=DateTime)
+
+	return [
+		{
+			"element_id": row.id,
+			"session_id": row.session_id,
+			"url": row.url,
+			"timestamp": row.timestamp,
+			"css_selector": row.css_selector,
+			"text": row.element_text,
+			"snippet": row.snippet or row.element_text[:200],
+			"score": float(row.score or 0)
+		}
+		for row in db_session.execute(statement, params)
+	]
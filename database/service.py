@@ -1,26 +1,130 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Callable
+from datetime import datetime
 from contextlib import contextmanager
+from itertools import islice
 import logging
+import time
 
 from .config import DatabaseManager
 from .repository import (
 	ScrapingSessionRepository, ElementRepository, LinkRepository,
-	EmailRepository, ImageRepository
+	EmailRepository, ImageRepository, StatisticsRepository, ChangeTrackingRepository,
+	EntityRepository, RollupRepository, STREAM_BATCH_SIZE, chunked, target_key
 )
 
 logger = logging.getLogger(__name__)
 
+def _serialize_session(s) -> Dict:
+	return {
+		"id": s.id,
+		"url": s.url,
+		"scraper_type": s.scraper_type,
+		"timestamp": s.timestamp,
+		"status": s.status,
+		"error_message": s.error_message,
+		"metadata": s.extra_data,  # Using extra_data field
+		"domain": s.domain,
+		"result_count": s.result_count,
+		"duration_ms": s.duration_ms
+	}
+
+def _serialize_element(e) -> Dict:
+	return {
+		"text": e.element_text,
+		"css_selector": e.css_selector,
+		"position": e.position
+	}
+
+def _serialize_link(l) -> Dict:
+	return {
+		"url": l.url,
+		"is_external": l.is_external,
+		"is_valid": l.is_valid
+	}
+
+def _serialize_email(e) -> str:
+	return e.email
+
+def _serialize_image(i) -> Dict:
+	return {
+		"url": i.image_url,
+		"alt_text": i.alt_text,
+		"title": i.title
+	}
+
+def _tracked_element(text: str, position: int, css_selector: Optional[str]) -> Dict:
+	return {"text": text, "css_selector": css_selector, "position": position}
+
+def _tracked_link(url: str, position: int, css_selector: Optional[str]) -> Dict:
+	# Same classification LinkRepository.save_batch stores
+	return {"url": url, "is_external": not (url.startswith('/') or 'localhost' in url), "is_valid": True}
+
+def _tracked_email(email: str, position: int, css_selector: Optional[str]) -> str:
+	return email
+
+def _tracked_image(url: str, position: int, css_selector: Optional[str]) -> Dict:
+	return {"url": url, "alt_text": None, "title": None}
+
+# scraper_type -> serializer for items reconstructed from change-tracking snapshots
+TRACKED_SERIALIZERS = {
+	"element_extraction": _tracked_element,
+	"link_extraction": _tracked_link,
+	"email_extraction": _tracked_email,
+	"image_extraction": _tracked_image,
+}
+
+# scraper_type -> (repository, key in the "data" dict, row serializer)
+EXTRACTION_TYPES = {
+	"element_extraction": (ElementRepository, "elements", _serialize_element),
+	"link_extraction": (LinkRepository, "links", _serialize_link),
+	"email_extraction": (EmailRepository, "emails", _serialize_email),
+	"image_extraction": (ImageRepository, "images", _serialize_image),
+}
+
+# scraper_type -> kind of the entities it records in the entity index
+ENTITY_KINDS = {
+	"email_extraction": "email",
+	"image_extraction": "image",
+}
+
+def _serialize_entity(e) -> Dict:
+	return {
+		"value": e.value,
+		"domain": e.domain,
+		"first_seen": e.first_seen,
+		"last_seen": e.last_seen,
+		"occurrence_count": e.occurrence_count
+	}
+
 class DatabaseService:
 	"""Service layer for database operations"""
 
-	def __init__(self, db_type: str = "sqlite", db_name: Optional[str] = None):
-		self.db_manager = DatabaseManager(db_type, db_name)
-		self.db_manager.create_tables()
+	def __init__(self, db_type: str = "sqlite", db_name: Optional[str] = None,
+				stats_cache_ttl: float = 10.0, track_changes: bool = False,
+				use_read_engine: bool = True, db_manager: Optional[Any] = None):
+		# An injected manager (e.g. the async service's session wrapper) already has its tables
+		if db_manager is None:
+			db_manager = DatabaseManager(db_type, db_name)
+			db_manager.create_tables()
+		self.db_manager = db_manager
+
+		# Route history, analytics and search queries to the read-only engine
+		self.use_read_engine = use_read_engine
+
+		# Store successful extractions as deltas against the target's previous session
+		self.track_changes = track_changes
+
+		# Short-lived cache in front of the statistics counters
+		self.stats_cache_ttl = stats_cache_ttl
+		self._stats_cache = None
 
 	@contextmanager
-	def get_db_session(self):
-		"""Context manager for database sessions"""
-		session = self.db_manager.get_session()
+	def get_db_session(self, read_only: bool = False):
+		"""Context manager for database sessions, optionally on the read-only engine"""
+		if read_only and self.use_read_engine:
+			session = self.db_manager.get_read_session()
+		else:
+			session = self.db_manager.get_session()
 		try:
 			yield session
 		except Exception as e:
@@ -31,91 +135,81 @@ class DatabaseService:
 			session.close()
 
 	def save_element_extraction(self, url: str, css_selector: str, elements: List[str],
-							metadata: Dict = None) -> int:
+							metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
 		"""Save element extraction results to database"""
-		with self.get_db_session() as session:
-			# Create repositories
-			session_repo = ScrapingSessionRepository(session)
-			element_repo = ElementRepository(session)
-
-			# Create scraping session
-			scraping_session = session_repo.save(
-				url=url,
-				scraper_type="element_extraction",
-				metadata={"css_selector": css_selector, **(metadata or {})}
-			)
-
-			# Save extracted elements
-			if elements:
-				element_repo.save_batch(scraping_session.id, css_selector, elements)
-
-			return scraping_session.id
+		return self._save_extraction(
+			url, "element_extraction", elements, {"css_selector": css_selector, **(metadata or {})},
+			duration_ms, lambda session, session_id, items: ElementRepository(session).add_batch(
+				session_id, css_selector, items),
+			css_selector
+		)
 
 	def save_link_extraction(self, url: str, links: List[str],
-						metadata: Dict = None) -> int:
+						metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
 		"""Save link extraction results to database"""
-		with self.get_db_session() as session:
-			# Create repositories
-			session_repo = ScrapingSessionRepository(session)
-			link_repo = LinkRepository(session)
-
-			# Create scraping session
-			scraping_session = session_repo.save(
-				url=url,
-				scraper_type="link_extraction",
-				metadata=metadata
-			)
-
-			# Save extracted links
-			if links:
-				link_repo.save_batch(scraping_session.id, links)
-
-			return scraping_session.id
+		return self._save_extraction(
+			url, "link_extraction", links, metadata, duration_ms,
+			lambda session, session_id, items: LinkRepository(session).add_batch(session_id, items)
+		)
 
 	def save_email_extraction(self, url: str, emails: List[str],
-							metadata: Dict = None) -> int:
+							metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
 		"""Save email extraction results to database"""
-		with self.get_db_session() as session:
-			# Create repositories
-			session_repo = ScrapingSessionRepository(session)
-			email_repo = EmailRepository(session)
-
-			# Create scraping session
-			scraping_session = session_repo.save(
-				url=url,
-				scraper_type="email_extraction",
-				metadata=metadata
-			)
-
-			# Save extracted emails
-			if emails:
-				email_repo.save_batch(scraping_session.id, emails)
-
-			return scraping_session.id
+		return self._save_extraction(
+			url, "email_extraction", emails, metadata, duration_ms,
+			lambda session, session_id, items: EmailRepository(session).add_batch(session_id, items)
+		)
 
 	def save_image_extraction(self, url: str, images: List[str],
-							metadata: Dict = None) -> int:
+							metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
 		"""Save image extraction results to database"""
+		return self._save_extraction(
+			url, "image_extraction", images, metadata, duration_ms,
+			lambda session, session_id, items: ImageRepository(session).add_batch(session_id, items)
+		)
+
+	def _save_extraction(self, url: str, scraper_type: str, items: List[str], metadata: Optional[Dict],
+						duration_ms: Optional[int], add_rows: Callable[[Any, int, List[str]], int],
+						css_selector: Optional[str] = None) -> int:
+		"""
+		Save a successful session and its items in one transaction
+
+		The session's result_count is the number of rows actually stored, so it
+		matches the rows whether or not they are change-tracked.
+		"""
+		items = list(items or [])
 		with self.get_db_session() as session:
-			# Create repositories
 			session_repo = ScrapingSessionRepository(session)
-			image_repo = ImageRepository(session)
+			scraping_session = session_repo.add(url=url, scraper_type=scraper_type,
+												metadata=metadata, duration_ms=duration_ms)
 
-			# Create scraping session
-			scraping_session = session_repo.save(
-				url=url,
-				scraper_type="image_extraction",
-				metadata=metadata
-			)
+			if self.track_changes:
+				stored = self._add_snapshot(session, scraping_session, items, css_selector)
+			else:
+				stored = add_rows(session, scraping_session.id, items)
 
-			# Save extracted images
-			if images:
-				image_repo.save_batch(scraping_session.id, images)
+			session_repo.complete(scraping_session, stored)
+			session.commit()
+			logger.info(f"Created scraping session {scraping_session.id} for {url} with {stored} results")
 
+			self._stats_cache = None
 			return scraping_session.id
 
+	def _add_snapshot(self, session, scraping_session, items: List[str], css_selector: Optional[str]) -> int:
+		"""Record a successful extraction as a change-tracking snapshot (does not commit)"""
+		kind = ENTITY_KINDS.get(scraping_session.scraper_type)
+		if kind:
+			EntityRepository(session).save(kind, scraping_session.id, items)
+		snapshot = ChangeTrackingRepository(session).add(
+			scraping_session.id,
+			target_key(scraping_session.url, scraping_session.scraper_type, css_selector),
+			items
+		)
+		return snapshot.item_count
+
 	def save_failed_extraction(self, url: str, scraper_type: str,
-							error_message: str, metadata: Dict = None) -> int:
+							error_message: str, metadata: Dict = None,
+							duration_ms: Optional[int] = None) -> int:
 		"""Save failed extraction attempt to database"""
 		with self.get_db_session() as session:
 			session_repo = ScrapingSessionRepository(session)
@@ -125,115 +219,367 @@ class DatabaseService:
 				scraper_type=scraper_type,
 				status="failed",
 				error_message=error_message,
-				metadata=metadata
+				metadata=metadata,
+				duration_ms=duration_ms
 			)
 
+			self._stats_cache = None
 			return scraping_session.id
 
 	def get_extraction_history(self, url: Optional[str] = None,
 							limit: int = 10) -> List[Dict]:
 		"""Get extraction history"""
-		with self.get_db_session() as session:
+		if url:
+			return list(self.iter_extraction_history(url=url))
+
+		with self.get_db_session(read_only=True) as session:
+			session_repo = ScrapingSessionRepository(session)
+			return [_serialize_session(s) for s in session_repo.find_recent(limit)]
+
+	def iter_extraction_history(self, url: Optional[str] = None, since: Optional[datetime] = None,
+								until: Optional[datetime] = None, css_selector: Optional[str] = None,
+								min_results: Optional[int] = None, max_results: Optional[int] = None,
+								batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Dict]:
+		"""Stream the full extraction history, newest first, in constant memory"""
+		with self.get_db_session(read_only=True) as session:
 			session_repo = ScrapingSessionRepository(session)
+			sessions = session_repo.iter_sessions(
+				url=url, since=since, until=until, css_selector=css_selector,
+				min_results=min_results, max_results=max_results, batch_size=batch_size
+			)
+			for s in sessions:
+				yield _serialize_session(s)
+
+	def find_sessions(self, css_selector: Optional[str] = None, min_results: Optional[int] = None,
+					max_results: Optional[int] = None, url: Optional[str] = None,
+					since: Optional[datetime] = None, limit: int = 100) -> List[Dict]:
+		"""
+		Newest sessions matching a selector and/or a result-count range
+
+		Args:
+			css_selector: Only element extractions that used this selector
+			min_results: Only sessions that stored at least this many rows
+			max_results: Only sessions that stored at most this many rows
+			url: Only sessions of this page
+			since: Only sessions at or after this time
+			limit: Maximum number of sessions returned
+		"""
+		history = self.iter_extraction_history(
+			url=url, since=since, css_selector=css_selector, min_results=min_results,
+			max_results=max_results, batch_size=min(limit, STREAM_BATCH_SIZE)
+		)
+		return list(islice(history, limit))
+
+	def iter_session_rows(self, session_id: int, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+		"""Stream the extracted rows of one session without materializing them"""
+		with self.get_db_session(read_only=True) as session:
+			scraping_session = ScrapingSessionRepository(session).find_by_id(session_id)
+			if not scraping_session or scraping_session.scraper_type not in EXTRACTION_TYPES:
+				return
+
+			if scraping_session.snapshot is not None:
+				yield from self._tracked_rows(session, scraping_session)
+				return
+
+			repo_class, _, serialize = EXTRACTION_TYPES[scraping_session.scraper_type]
+			for row in repo_class(session).iter_by_session(session_id, batch_size):
+				yield serialize(row)
+
+	def iter_links(self, url: Optional[str] = None, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+		"""Stream every extracted link URL, optionally only those found on one page"""
+		with self.get_db_session(read_only=True) as session:
+			link_repo = LinkRepository(session)
+			if not url:
+				for link in link_repo.iter_all(batch_size=batch_size):
+					yield link.url
+				return
 
-			if url:
-				sessions = session_repo.find_by_url(url)
-			else:
-				sessions = session_repo.find_recent(limit)
-
-			return [
-				{
-					"id": s.id,
-					"url": s.url,
-					"scraper_type": s.scraper_type,
-					"timestamp": s.timestamp,
-					"status": s.status,
-					"error_message": s.error_message,
-					"metadata": s.extra_data  # Using extra_data field
-				}
-				for s in sessions
-			]
+			session_repo = ScrapingSessionRepository(session)
+			session_ids = (s.id for s in session_repo.iter_sessions(url=url, batch_size=batch_size))
+			for chunk in chunked(session_ids):
+				for link in link_repo.iter_all(session_ids=chunk, batch_size=batch_size):
+					yield link.url
 
 	def get_session_data(self, session_id: int) -> Optional[Dict]:
 		"""Get all data for a specific scraping session"""
-		with self.get_db_session() as session:
-			session_repo = ScrapingSessionRepository(session)
-			element_repo = ElementRepository(session)
-			link_repo = LinkRepository(session)
-			email_repo = EmailRepository(session)
-			image_repo = ImageRepository(session)
+		return self.get_sessions_data([session_id]).get(session_id)
+
+	def get_sessions_data(self, session_ids: List[int], limit_per_session: Optional[int] = None,
+						counts_only: bool = False) -> Dict[int, Dict]:
+		"""
+		Get data for many scraping sessions with a constant number of queries
+
+		Sessions are loaded with one IN-list query and the rows of each extraction
+		table with one more, regardless of how many sessions are requested.
 
-			# Get session info
-			scraping_session = session_repo.find_by_id(session_id)
-			if not scraping_session:
+		Args:
+			session_ids: IDs of the sessions to load; unknown IDs are skipped
+			limit_per_session: Maximum number of rows returned per session
+			counts_only: Return per-session row counts under "counts" instead of rows
+
+		Returns:
+			Dict mapping session ID to the same structure as get_session_data
+		"""
+		session_ids = list(dict.fromkeys(session_ids))
+		if not session_ids:
+			return {}
+
+		with self.get_db_session(read_only=True) as session:
+			session_repo = ScrapingSessionRepository(session)
+			scraping_sessions = {s.id: s for s in session_repo.find_by_ids(session_ids)}
+
+			results = {}
+			ids_by_type = {}
+			for session_id in session_ids:
+				scraping_session = scraping_sessions.get(session_id)
+				if not scraping_session:
+					continue
+
+				results[session_id] = {
+					"session": {
+						"id": scraping_session.id,
+						"url": scraping_session.url,
+						"scraper_type": scraping_session.scraper_type,
+						"timestamp": scraping_session.timestamp,
+						"status": scraping_session.status,
+						"metadata": scraping_session.extra_data,  # Using extra_data field
+						"domain": scraping_session.domain,
+						"result_count": scraping_session.result_count,
+						"duration_ms": scraping_session.duration_ms
+					},
+					"counts" if counts_only else "data": {}
+				}
+				if scraping_session.scraper_type not in EXTRACTION_TYPES:
+					continue
+
+				snapshot = scraping_session.snapshot
+				if snapshot is None:
+					ids_by_type.setdefault(scraping_session.scraper_type, []).append(session_id)
+				elif counts_only:
+					data_key = EXTRACTION_TYPES[scraping_session.scraper_type][1]
+					results[session_id]["counts"][data_key] = snapshot.item_count
+				else:
+					data_key = EXTRACTION_TYPES[scraping_session.scraper_type][1]
+					rows = self._tracked_rows(session, scraping_session)
+					if limit_per_session is not None:
+						rows = rows[:limit_per_session]
+					results[session_id]["data"][data_key] = rows
+
+			# One query per extraction table that is actually involved
+			for scraper_type, type_ids in ids_by_type.items():
+				repo_class, data_key, serialize = EXTRACTION_TYPES[scraper_type]
+				repo = repo_class(session)
+
+				if counts_only:
+					for session_id, count in repo.count_by_sessions(type_ids).items():
+						results[session_id]["counts"][data_key] = count
+				else:
+					rows_by_session = repo.find_by_sessions(type_ids, limit_per_session)
+					for session_id, rows in rows_by_session.items():
+						results[session_id]["data"][data_key] = [serialize(row) for row in rows]
+
+			return results
+
+	def _tracked_rows(self, session, scraping_session) -> List[Any]:
+		"""Reconstruct and serialize the items of a change-tracked session"""
+		serialize = TRACKED_SERIALIZERS[scraping_session.scraper_type]
+		css_selector = (scraping_session.extra_data or {}).get("css_selector")
+		items = ChangeTrackingRepository(session).reconstruct(scraping_session.id)
+		return [serialize(item, position, css_selector) for position, item in enumerate(items)]
+
+	def get_snapshot(self, session_id: int) -> Optional[List[str]]:
+		"""Full item list of a change-tracked session, or None if it is not tracked"""
+		with self.get_db_session(read_only=True) as session:
+			tracking_repo = ChangeTrackingRepository(session)
+			if tracking_repo.find_by_id(session_id) is None:
+				return None
+			return tracking_repo.reconstruct(session_id)
+
+	def get_changes(self, session_id: int) -> Optional[Dict]:
+		"""
+		Items added and removed by a change-tracked session
+
+		Returns:
+			Dict with the previous session of the same target, its fingerprint and
+			the added/removed items, or None if the session is not tracked
+		"""
+		with self.get_db_session(read_only=True) as session:
+			tracking_repo = ChangeTrackingRepository(session)
+			changes = tracking_repo.changes(session_id)
+			if changes is None:
 				return None
 
-			result = {
-				"session": {
-					"id": scraping_session.id,
-					"url": scraping_session.url,
-					"scraper_type": scraping_session.scraper_type,
-					"timestamp": scraping_session.timestamp,
-					"status": scraping_session.status,
-					"metadata": scraping_session.extra_data  # Using extra_data field
-				},
-				"data": {}
+			previous_session_id, added, removed = changes
+			return {
+				"session_id": session_id,
+				"previous_session_id": previous_session_id,
+				"fingerprint": tracking_repo.find_by_id(session_id).fingerprint,
+				"changed": bool(added or removed),
+				"added": added,
+				"removed": removed
 			}
 
-			# Get specific data based on scraper type
-			if scraping_session.scraper_type == "element_extraction":
-				elements = element_repo.find_by_session(session_id)
-				result["data"]["elements"] = [
-					{
-						"text": e.element_text,
-						"css_selector": e.css_selector,
-						"position": e.position
-					}
-					for e in elements
-				]
-			elif scraping_session.scraper_type == "link_extraction":
-				links = link_repo.find_by_session(session_id)
-				result["data"]["links"] = [
-					{
-						"url": l.url,
-						"is_external": l.is_external,
-						"is_valid": l.is_valid
-					}
-					for l in links
-				]
-			elif scraping_session.scraper_type == "email_extraction":
-				emails = email_repo.find_by_session(session_id)
-				result["data"]["emails"] = [e.email for e in emails]
-			elif scraping_session.scraper_type == "image_extraction":
-				images = image_repo.find_by_session(session_id)
-				result["data"]["images"] = [
-					{
-						"url": i.image_url,
-						"alt_text": i.alt_text,
-						"title": i.title
-					}
-					for i in images
-				]
-
-			return result
+	def get_unique_emails(self, domain: Optional[str] = None, site: Optional[str] = None,
+						limit: Optional[int] = 100, offset: int = 0) -> List[Dict]:
+		"""
+		Unique email addresses with first/last sighting and occurrence count
+
+		Args:
+			domain: Only addresses at this domain (e.g. "example.com")
+			site: Only addresses found on pages of this domain
+			limit: Page size (None for all)
+			offset: Number of addresses to skip, in address order
+		"""
+		return self._unique_entities("email", domain, site, limit, offset)
+
+	def get_unique_images(self, domain: Optional[str] = None, site: Optional[str] = None,
+						limit: Optional[int] = 100, offset: int = 0) -> List[Dict]:
+		"""Unique image URLs with first/last sighting and occurrence count (see get_unique_emails)"""
+		return self._unique_entities("image", domain, site, limit, offset)
+
+	def _unique_entities(self, kind: str, domain: Optional[str], site: Optional[str],
+						limit: Optional[int], offset: int) -> List[Dict]:
+		with self.get_db_session(read_only=True) as session:
+			entity_repo = EntityRepository(session)
+			return [_serialize_entity(e) for e in entity_repo.find_unique(kind, domain, site, limit, offset)]
+
+	def count_unique_entities(self, kind: str, domain: Optional[str] = None,
+							site: Optional[str] = None) -> int:
+		"""Number of unique emails ("email") or image URLs ("image") matching the filters"""
+		with self.get_db_session(read_only=True) as session:
+			return EntityRepository(session).count_unique(kind, domain, site)
+
+	def get_entity_sessions(self, kind: str, value: str) -> List[int]:
+		"""IDs of the sessions an email address or image URL was found in"""
+		with self.get_db_session(read_only=True) as session:
+			return EntityRepository(session).find_session_ids(kind, value)
+
+	def get_result_counts(self, session_ids: List[int]) -> Dict[int, int]:
+		"""Number of stored result rows per session, with one grouped query per 500 sessions"""
+		from .analytics import session_result_counts
+		with self.get_db_session(read_only=True) as session:
+			return session_result_counts(session, list(dict.fromkeys(session_ids)))
+
+	def get_aggregates(self, names: Optional[List[str]] = None, since: Optional[datetime] = None,
+					unlimited: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+		"""
+		Analytics aggregates computed in the database over the full history
+
+		Args:
+			names: Aggregates to compute (default: all of database.analytics.AGGREGATES)
+			since: Only count sessions at or after this time
+			unlimited: Aggregates to return without their row limit, e.g. to merge them across shards
+
+		Returns:
+			Dict mapping aggregate name to its grouped rows
+		"""
+		from .analytics import AGGREGATES, compute_aggregate
+		unlimited = set(unlimited or ())
+		with self.get_db_session(read_only=True) as session:
+			return {name: compute_aggregate(session, name, since, limited=name not in unlimited)
+					for name in (names or AGGREGATES)}
+
+	def search_elements(self, query: str, url_prefix: Optional[str] = None,
+						since: Optional[datetime] = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+		"""
+		Full-text search over extracted element text
+
+		Args:
+			query: Search terms (all terms must match)
+			url_prefix: Only match elements scraped from URLs starting with this prefix
+			since: Only match sessions at or after this time
+			limit: Page size
+			offset: Number of ranked results to skip
+
+		Returns:
+			Matches ordered by relevance, each with its session, URL, text and snippet
+		"""
+		from .search import search_elements
+		with self.get_db_session(read_only=True) as session:
+			return search_elements(session, query, url_prefix=url_prefix, since=since,
+								limit=limit, offset=offset)
+
+	def export_to_parquet(self, output_dir: str = "exports", since: Optional[datetime] = None,
+						until: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+		"""Export sessions and extraction tables to partitioned Parquet files (requires pyarrow)"""
+		from .archive import ParquetExporter
+		return ParquetExporter(self, output_dir).export_all(since, until, read_only=True)
+
+	def archive_sessions(self, before: datetime, output_dir: str = "exports") -> Dict[str, int]:
+		"""Export sessions older than a cutoff to Parquet and remove them from the database"""
+		from .archive import ParquetExporter
+		deleted = ParquetExporter(self, output_dir).archive(before)
+		self._stats_cache = None
+		return deleted
 
 	def test_connection(self) -> bool:
 		"""Test database connection"""
 		return self.db_manager.test_connection()
 
+	def close(self):
+		"""Close the database connections"""
+		self.db_manager.dispose()
+
+	def metrics(self, reset: bool = False) -> Dict:
+		"""
+		Connection pool and query metrics of the primary and read-only engines
+
+		Args:
+			reset: Clear the measurements after reading them, for interval reporting
+
+		Returns:
+			Dict with a "primary" entry and, when reads use their own engine, a
+			"read" entry, each holding pool occupancy and checkout wait, latency
+			histograms per statement kind and the most recent slow queries
+		"""
+		engines = {"primary": self.db_manager.metrics}
+		if self.db_manager.read_metrics is not self.db_manager.metrics:
+			engines["read"] = self.db_manager.read_metrics
+
+		snapshot = {name: metrics.snapshot() for name, metrics in engines.items()}
+		if reset:
+			for metrics in engines.values():
+				metrics.reset()
+		return snapshot
+
 	def get_statistics(self) -> Dict:
-		"""Get scraping statistics"""
+		"""Get scraping statistics from the incrementally maintained counters"""
+		cached = self._stats_cache
+		if cached and time.monotonic() - cached[0] < self.stats_cache_ttl:
+			return dict(cached[1])
+
+		with self.get_db_session(read_only=True) as session:
+			counters = StatisticsRepository(session).get_all()
+		if StatisticsRepository.INITIALIZED_MARKER in counters:
+			stats = {name: int(counters.get(name, 0)) for name in StatisticsRepository.COUNTERS}
+		else:
+			# Seeding the counters writes, so it goes through the primary
+			with self.get_db_session() as session:
+				stats = StatisticsRepository(session).get_statistics()
+
+		self._stats_cache = (time.monotonic(), stats)
+		return dict(stats)
+
+	def rebuild_statistics(self) -> Dict:
+		"""Recompute the statistics counters from the base tables"""
 		with self.get_db_session() as session:
-			from .models import ScrapingSession, ExtractedElements, ExtractedLinks, ExtractedEmails, ExtractedImages
-
-			stats = {
-				"total_sessions": session.query(ScrapingSession).count(),
-				"successful_sessions": session.query(ScrapingSession).filter(ScrapingSession.status == "success").count(),
-				"failed_sessions": session.query(ScrapingSession).filter(ScrapingSession.status == "failed").count(),
-				"total_elements": session.query(ExtractedElements).count(),
-				"total_links": session.query(ExtractedLinks).count(),
-				"total_emails": session.query(ExtractedEmails).count(),
-				"total_images": session.query(ExtractedImages).count(),
-			}
+			stats = StatisticsRepository(session).rebuild()
+
+		self._stats_cache = (time.monotonic(), stats)
+		return dict(stats)
 
-			return stats
+	def get_data_watermark(self) -> Dict[str, int]:
+		"""Newest session ID, session count and rollup version, for caching results derived from the sessions"""
+		with self.get_db_session(read_only=True) as session:
+			newest_id, count, rollup_version = ScrapingSessionRepository(session).watermark()
+		return {"max_session_id": newest_id, "session_count": count, "rollup_version": rollup_version}
+
+	def refresh_rollups(self) -> int:
+		"""Roll up sessions written past the rollup high-water mark and return how many there were"""
+		with self.get_db_session() as session:
+			return RollupRepository(session).catch_up()
+
+	def rebuild_rollups(self) -> int:
+		"""Recompute the session rollups from the sessions in the database"""
+		with self.get_db_session() as session:
+			return RollupRepository(session).rebuild()
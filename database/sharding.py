@@ -0,0 +1,357 @@
+"""
+Sharded SQLite storage
+
+ShardedDatabaseService spreads sessions over N SQLite files by a hash of the
+URL's domain, so processes scraping different sites write to different files
+and no longer queue on a single write lock. It offers the DatabaseService API:
+writes go to one shard, reads fan out over all shards in parallel and merge
+history, statistics and search results.
+
+Session IDs returned by the sharded service are global: local_id * N + shard.
+They stay stable as long as the shard count is unchanged.
+"""
+
+import heapq
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from .hashing import stable_hash64, url_domain
+from .repository import STREAM_BATCH_SIZE
+from .service import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+class ShardedDatabaseService:
+	"""DatabaseService facade over several SQLite files sharded by domain"""
+
+	def __init__(self, shards: int = 4, db_name: str = "web_scraper.db",
+				stats_cache_ttl: float = 10.0, track_changes: bool = False):
+		if shards < 1:
+			raise ValueError(f"Shard count must be positive, got {shards}")
+
+		base, extension = os.path.splitext(db_name)
+		self.shard_count = shards
+		self.shards = [
+			DatabaseService(db_type="sqlite", db_name=f"{base}.shard{index}{extension or '.db'}",
+							stats_cache_ttl=0, track_changes=track_changes)
+			for index in range(shards)
+		]
+		self._executor = ThreadPoolExecutor(max_workers=shards, thread_name_prefix="shard-read")
+
+		# Short-lived cache in front of the summed statistics counters
+		self.stats_cache_ttl = stats_cache_ttl
+		self._stats_cache = None
+
+	def shard_index(self, url: str) -> int:
+		"""Shard that stores sessions of a URL (all URLs of a domain share one)"""
+		return stable_hash64(url_domain(url)) % self.shard_count
+
+	def global_id(self, shard: int, session_id: Optional[int]) -> Optional[int]:
+		return None if session_id is None else session_id * self.shard_count + shard
+
+	def local_id(self, global_id: int) -> Tuple[int, int]:
+		"""(shard, shard-local session ID) of a global session ID"""
+		return global_id % self.shard_count, global_id // self.shard_count
+
+	def _fan_out(self, call: Callable[[DatabaseService], Any]) -> List[Any]:
+		"""Run a read on every shard concurrently and return the results in shard order"""
+		return list(self._executor.map(call, self.shards))
+
+	def _fan_out_indexed(self, call: Callable[[int, DatabaseService], Any]) -> List[Any]:
+		"""Like _fan_out, for calls that also need the shard's index"""
+		return list(self._executor.map(call, range(self.shard_count), self.shards))
+
+	def _globalize_session(self, shard: int, session: Dict) -> Dict:
+		return {**session, "id": self.global_id(shard, session["id"])}
+
+	def _save(self, url: str, method: str, *args, **kwargs) -> int:
+		shard = self.shard_index(url)
+		session_id = getattr(self.shards[shard], method)(url, *args, **kwargs)
+		self._stats_cache = None
+		return self.global_id(shard, session_id)
+
+	def save_element_extraction(self, url: str, css_selector: str, elements: List[str],
+							metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
+		"""Save element extraction results to the URL's shard"""
+		return self._save(url, "save_element_extraction", css_selector, elements, metadata, duration_ms)
+
+	def save_link_extraction(self, url: str, links: List[str], metadata: Dict = None,
+						duration_ms: Optional[int] = None) -> int:
+		"""Save link extraction results to the URL's shard"""
+		return self._save(url, "save_link_extraction", links, metadata, duration_ms)
+
+	def save_email_extraction(self, url: str, emails: List[str], metadata: Dict = None,
+							duration_ms: Optional[int] = None) -> int:
+		"""Save email extraction results to the URL's shard"""
+		return self._save(url, "save_email_extraction", emails, metadata, duration_ms)
+
+	def save_image_extraction(self, url: str, images: List[str], metadata: Dict = None,
+							duration_ms: Optional[int] = None) -> int:
+		"""Save image extraction results to the URL's shard"""
+		return self._save(url, "save_image_extraction", images, metadata, duration_ms)
+
+	def save_failed_extraction(self, url: str, scraper_type: str, error_message: str,
+							metadata: Dict = None, duration_ms: Optional[int] = None) -> int:
+		"""Save failed extraction attempt to the URL's shard"""
+		return self._save(url, "save_failed_extraction", scraper_type, error_message, metadata, duration_ms)
+
+	def get_extraction_history(self, url: Optional[str] = None, limit: int = 10) -> List[Dict]:
+		"""Get extraction history, newest first across all shards"""
+		if url:
+			return list(self.iter_extraction_history(url=url))
+
+		per_shard = self._fan_out(lambda shard: shard.get_extraction_history(limit=limit))
+		merged = heapq.merge(
+			*[[self._globalize_session(index, s) for s in sessions] for index, sessions in enumerate(per_shard)],
+			key=lambda s: (s["timestamp"], s["id"]), reverse=True
+		)
+		return list(merged)[:limit]
+
+	def iter_extraction_history(self, url: Optional[str] = None, since: Optional[datetime] = None,
+								until: Optional[datetime] = None, css_selector: Optional[str] = None,
+								min_results: Optional[int] = None, max_results: Optional[int] = None,
+								batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Dict]:
+		"""Stream the full extraction history, newest first, merging the shards' streams"""
+		indexes = [self.shard_index(url)] if url else range(self.shard_count)
+		streams = [
+			self._shard_history(index, url=url, since=since, until=until, css_selector=css_selector,
+								min_results=min_results, max_results=max_results, batch_size=batch_size)
+			for index in indexes
+		]
+		return heapq.merge(*streams, key=lambda s: (s["timestamp"], s["id"]), reverse=True)
+
+	def find_sessions(self, css_selector: Optional[str] = None, min_results: Optional[int] = None,
+					max_results: Optional[int] = None, url: Optional[str] = None,
+					since: Optional[datetime] = None, limit: int = 100) -> List[Dict]:
+		"""Newest sessions over all shards matching a selector and/or a result-count range"""
+		history = self.iter_extraction_history(
+			url=url, since=since, css_selector=css_selector, min_results=min_results,
+			max_results=max_results, batch_size=min(limit, STREAM_BATCH_SIZE)
+		)
+		return list(islice(history, limit))
+
+	def _shard_history(self, index: int, **kwargs) -> Iterator[Dict]:
+		for session in self.shards[index].iter_extraction_history(**kwargs):
+			yield self._globalize_session(index, session)
+
+	def iter_session_rows(self, session_id: int, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+		"""Stream the extracted rows of one session"""
+		shard, local_id = self.local_id(session_id)
+		return self.shards[shard].iter_session_rows(local_id, batch_size)
+
+	def iter_links(self, url: Optional[str] = None, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+		"""Stream every extracted link URL, optionally only those found on one page"""
+		if url:
+			yield from self.shards[self.shard_index(url)].iter_links(url, batch_size)
+			return
+		for shard in self.shards:
+			yield from shard.iter_links(batch_size=batch_size)
+
+	def get_session_data(self, session_id: int) -> Optional[Dict]:
+		"""Get all data for a specific scraping session"""
+		return self.get_sessions_data([session_id]).get(session_id)
+
+	def get_sessions_data(self, session_ids: List[int], limit_per_session: Optional[int] = None,
+						counts_only: bool = False) -> Dict[int, Dict]:
+		"""Get data for many sessions with one batched query set per involved shard"""
+		ids_by_shard = {}
+		for session_id in dict.fromkeys(session_ids):
+			shard, local_id = self.local_id(session_id)
+			ids_by_shard.setdefault(shard, []).append(local_id)
+
+		found = {}
+		for shard, local_ids in ids_by_shard.items():
+			data = self.shards[shard].get_sessions_data(local_ids, limit_per_session, counts_only)
+			for local_id, entry in data.items():
+				global_id = self.global_id(shard, local_id)
+				found[global_id] = {**entry, "session": {**entry["session"], "id": global_id}}
+
+		# Keep the caller's order like DatabaseService does
+		return {session_id: found[session_id] for session_id in dict.fromkeys(session_ids) if session_id in found}
+
+	def get_snapshot(self, session_id: int) -> Optional[List[str]]:
+		"""Full item list of a change-tracked session, or None if it is not tracked"""
+		shard, local_id = self.local_id(session_id)
+		return self.shards[shard].get_snapshot(local_id)
+
+	def get_changes(self, session_id: int) -> Optional[Dict]:
+		"""Items added and removed by a change-tracked session"""
+		shard, local_id = self.local_id(session_id)
+		changes = self.shards[shard].get_changes(local_id)
+		if changes is None:
+			return None
+		return {
+			**changes,
+			"session_id": session_id,
+			"previous_session_id": self.global_id(shard, changes["previous_session_id"])
+		}
+
+	def get_unique_emails(self, domain: Optional[str] = None, site: Optional[str] = None,
+						limit: Optional[int] = 100, offset: int = 0) -> List[Dict]:
+		"""Unique email addresses over all shards, combining per-shard sightings"""
+		return self._unique_entities("get_unique_emails", domain, site, limit, offset)
+
+	def get_unique_images(self, domain: Optional[str] = None, site: Optional[str] = None,
+						limit: Optional[int] = 100, offset: int = 0) -> List[Dict]:
+		"""Unique image URLs over all shards, combining per-shard sightings"""
+		return self._unique_entities("get_unique_images", domain, site, limit, offset)
+
+	def _unique_entities(self, method: str, domain: Optional[str], site: Optional[str],
+						limit: Optional[int], offset: int) -> List[Dict]:
+		# Every shard pages by value, so its first offset + limit entries cover the merged page
+		shard_limit = None if limit is None else offset + limit
+		if site:
+			per_shard = [getattr(self.shards[self.shard_index(f"//{site}")], method)(domain, site, shard_limit)]
+		else:
+			per_shard = self._fan_out(lambda shard: getattr(shard, method)(domain, site, shard_limit))
+
+		merged = []
+		for entity in heapq.merge(*per_shard, key=lambda e: e["value"]):
+			if merged and merged[-1]["value"] == entity["value"]:
+				last = merged[-1]
+				last["first_seen"] = min(last["first_seen"], entity["first_seen"])
+				last["last_seen"] = max(last["last_seen"], entity["last_seen"])
+				last["occurrence_count"] += entity["occurrence_count"]
+			else:
+				merged.append(dict(entity))
+		return merged[offset:] if limit is None else merged[offset:offset + limit]
+
+	def count_unique_entities(self, kind: str, domain: Optional[str] = None,
+							site: Optional[str] = None) -> int:
+		"""
+		Number of unique emails or image URLs over all shards
+
+		An entity found on sites of different shards is counted once per shard,
+		so without a site filter this is an upper bound.
+		"""
+		if site:
+			return self.shards[self.shard_index(f"//{site}")].count_unique_entities(kind, domain, site)
+		return sum(self._fan_out(lambda shard: shard.count_unique_entities(kind, domain, site)))
+
+	def get_entity_sessions(self, kind: str, value: str) -> List[int]:
+		"""Global IDs of the sessions an email address or image URL was found in"""
+		per_shard = self._fan_out(lambda shard: shard.get_entity_sessions(kind, value))
+		return sorted(self.global_id(index, session_id)
+					for index, session_ids in enumerate(per_shard) for session_id in session_ids)
+
+	def get_result_counts(self, session_ids: List[int]) -> Dict[int, int]:
+		"""Number of stored result rows per session, one grouped query set per involved shard"""
+		ids_by_shard = {}
+		for session_id in dict.fromkeys(session_ids):
+			shard, local_id = self.local_id(session_id)
+			ids_by_shard.setdefault(shard, []).append(local_id)
+
+		counts = {}
+		for shard, local_ids in ids_by_shard.items():
+			for local_id, count in self.shards[shard].get_result_counts(local_ids).items():
+				counts[self.global_id(shard, local_id)] = count
+		return counts
+
+	def get_aggregates(self, names: Optional[List[str]] = None,
+					since: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+		"""Analytics aggregates of every shard, merged by summing their measures"""
+		from .analytics import AGGREGATES, CROSS_SHARD_AGGREGATES, merge_aggregates
+		names = list(names or AGGREGATES)
+		# A group spread over shards can miss every shard's cut and still lead the merged rows
+		unlimited = [name for name in names if name in CROSS_SHARD_AGGREGATES]
+		per_shard = self._fan_out(lambda shard: shard.get_aggregates(names, since, unlimited))
+		return {name: merge_aggregates(name, [result[name] for result in per_shard]) for name in names}
+
+	def search_elements(self, query: str, url_prefix: Optional[str] = None,
+						since: Optional[datetime] = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+		"""
+		Full-text search over all shards, merged by score
+
+		Each shard ranks against its own term statistics, so scores from
+		different shards are comparable only approximately.
+		"""
+		per_shard = self._fan_out(lambda shard: shard.search_elements(
+			query, url_prefix=url_prefix, since=since, limit=offset + limit))
+
+		results = []
+		for index, matches in enumerate(per_shard):
+			for match in matches:
+				results.append({**match, "session_id": self.global_id(index, match["session_id"]), "shard": index})
+		results.sort(key=lambda match: match["score"], reverse=True)
+		return results[offset:offset + limit]
+
+	def test_connection(self) -> bool:
+		"""Test the connection of every shard"""
+		return all(self._fan_out(lambda shard: shard.test_connection()))
+
+	def _sum_counts(self, per_shard: List[Dict]) -> Dict:
+		totals = {}
+		for stats in per_shard:
+			for name, value in stats.items():
+				totals[name] = totals.get(name, 0) + value
+		return totals
+
+	def get_statistics(self) -> Dict:
+		"""Get scraping statistics summed over all shards"""
+		cached = self._stats_cache
+		if cached and time.monotonic() - cached[0] < self.stats_cache_ttl:
+			return dict(cached[1])
+
+		stats = self._sum_counts(self._fan_out(lambda shard: shard.get_statistics()))
+		self._stats_cache = (time.monotonic(), stats)
+		return dict(stats)
+
+	def rebuild_statistics(self) -> Dict:
+		"""Recompute every shard's statistics counters from its base tables"""
+		stats = self._sum_counts(self._fan_out(lambda shard: shard.rebuild_statistics()))
+		self._stats_cache = (time.monotonic(), stats)
+		return dict(stats)
+
+	def get_data_watermark(self) -> Dict[str, int]:
+		"""Newest global session ID, session count and rollup version over all shards"""
+		watermarks = self._fan_out(lambda shard: shard.get_data_watermark())
+		return {
+			"max_session_id": max(self.global_id(index, w["max_session_id"]) if w["max_session_id"] else 0
+								for index, w in enumerate(watermarks)),
+			"session_count": sum(w["session_count"] for w in watermarks),
+			"rollup_version": sum(w["rollup_version"] for w in watermarks),
+		}
+
+	def refresh_rollups(self) -> int:
+		"""Roll up sessions written past each shard's rollup high-water mark"""
+		return sum(self._fan_out(lambda shard: shard.refresh_rollups()))
+
+	def rebuild_rollups(self) -> int:
+		"""Recompute every shard's session rollups from its sessions"""
+		return sum(self._fan_out(lambda shard: shard.rebuild_rollups()))
+
+	def export_to_parquet(self, output_dir: str = "exports", since: Optional[datetime] = None,
+						until: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+		"""Export every shard to partitioned Parquet files below a shard=<index> level (requires pyarrow)"""
+		from .archive import ParquetExporter
+		per_shard = self._fan_out_indexed(lambda index, shard: ParquetExporter(
+			shard, output_dir, shard=index).export_all(since, until, read_only=True))
+
+		exported = {}
+		for files in per_shard:
+			for table, written in files.items():
+				exported.setdefault(table, {}).update(written)
+		return exported
+
+	def archive_sessions(self, before: datetime, output_dir: str = "exports") -> Dict[str, int]:
+		"""Archive every shard's sessions older than a cutoff, like DatabaseService.archive_sessions"""
+		from .archive import ParquetExporter
+		per_shard = self._fan_out_indexed(lambda index, shard: ParquetExporter(
+			shard, output_dir, shard=index).archive(before))
+		self._stats_cache = None
+		return self._sum_counts(per_shard)
+
+	def metrics(self, reset: bool = False) -> Dict:
+		"""Connection pool and query metrics per shard"""
+		return {f"shard{index}": shard.metrics(reset) for index, shard in enumerate(self.shards)}
+
+	def close(self):
+		"""Stop the read workers and close every shard's connections"""
+		self._executor.shutdown(wait=True)
+		for shard in self.shards:
+			shard.db_manager.dispose()
@@ -0,0 +1,119 @@
+"""
+In-memory crawl metrics
+
+CrawlMetrics counts requests as scrapers start and finish them: in-flight
+requests, throughput over a sliding window, error rates and a latency
+histogram per host. Queues (such as a database writer's) can be watched so
+their depth shows up in snapshots. Everything lives in process memory, so
+reading a snapshot never touches the database.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from database.metrics import LatencyHistogram
+
+# Seconds of completed requests used for throughput and the recent error rate
+THROUGHPUT_WINDOW = 60.0
+
+class CrawlMetrics:
+	"""Thread-safe counters of a running crawl"""
+
+	def __init__(self, window: float = THROUGHPUT_WINDOW):
+		self.window = window
+		self._lock = threading.Lock()
+		self._queues = {}
+		self.reset()
+
+	def reset(self):
+		"""Clear all recorded measurements (watched queues are kept)"""
+		with self._lock:
+			self.started_at = time.time()
+			self.in_flight = 0
+			self.completed = 0
+			self.failed = 0
+			self.hosts = {}
+			# (finish time, success) of requests finished within the window
+			self._recent = deque()
+
+	def watch_queue(self, name: str, queue) -> None:
+		"""Report the depth (qsize()) of a queue in snapshots; None stops watching it"""
+		with self._lock:
+			if queue is None:
+				self._queues.pop(name, None)
+			else:
+				self._queues[name] = queue
+
+	def request_started(self, url: str) -> float:
+		"""Count a request as in flight; returns the start time to pass to request_finished"""
+		with self._lock:
+			self.in_flight += 1
+		return time.perf_counter()
+
+	def request_finished(self, url: str, started: float, success: bool) -> None:
+		"""Record a finished request and its latency under its host"""
+		elapsed_ms = (time.perf_counter() - started) * 1000
+		now = time.time()
+		host = urlparse(url).netloc or url
+		with self._lock:
+			self.in_flight -= 1
+			self.completed += 1
+			if not success:
+				self.failed += 1
+
+			stats = self.hosts.get(host)
+			if stats is None:
+				stats = self.hosts[host] = {"requests": 0, "errors": 0, "latency": LatencyHistogram()}
+			stats["requests"] += 1
+			stats["errors"] += 0 if success else 1
+			stats["latency"].observe(elapsed_ms)
+
+			self._recent.append((now, success))
+			self._expire(now)
+
+	def _expire(self, now: float):
+		while self._recent and self._recent[0][0] < now - self.window:
+			self._recent.popleft()
+
+	def snapshot(self) -> Dict:
+		"""Current counters as plain data"""
+		now = time.time()
+		with self._lock:
+			self._expire(now)
+			recent = len(self._recent)
+			recent_errors = sum(1 for _, success in self._recent if not success)
+			# Before a full window has passed, rate over the time actually elapsed
+			window = min(self.window, max(now - self.started_at, 1.0))
+			return {
+				"at": now,
+				"uptime_s": round(now - self.started_at, 1),
+				"in_flight": self.in_flight,
+				"completed": self.completed,
+				"failed": self.failed,
+				"error_rate": round(self.failed / self.completed, 4) if self.completed else 0.0,
+				"throughput_per_s": round(recent / window, 3),
+				"recent_error_rate": round(recent_errors / recent, 4) if recent else 0.0,
+				"queues": {name: _depth(queue) for name, queue in self._queues.items()},
+				"hosts": {
+					host: {
+						"requests": stats["requests"],
+						"errors": stats["errors"],
+						"error_rate": round(stats["errors"] / stats["requests"], 4),
+						"latency": stats["latency"].snapshot(),
+					}
+					for host, stats in self.hosts.items()
+				},
+			}
+
+def _depth(queue) -> Optional[int]:
+	try:
+		return queue.qsize()
+	except NotImplementedError:
+		# multiprocessing queues on macOS cannot report their size
+		return None
+
+# Metrics of this process, recorded by every scraper unless it is given its own
+crawl_metrics = CrawlMetrics()
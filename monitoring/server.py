@@ -0,0 +1,179 @@
+"""
+Live crawl dashboard over server-sent events
+
+MetricsServer runs a ThreadingHTTPServer in a background thread of the
+crawling process. It serves a small dashboard page at /, the current
+CrawlMetrics snapshot as JSON at /metrics, and pushes a snapshot every
+interval seconds to each client of /events (text/event-stream), so a
+browser watches a long run without polling the database.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import logging
+
+from .metrics import CrawlMetrics, crawl_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+class _Handler(BaseHTTPRequestHandler):
+	server: "_Server"
+
+	def do_GET(self):
+		path = self.path.split("?", 1)[0]
+		if path == "/":
+			self._send(200, "text/html; charset=utf-8", _PAGE.encode("utf-8"))
+		elif path == "/metrics":
+			self._send(200, "application/json", json.dumps(self.server.metrics.snapshot()).encode("utf-8"))
+		elif path == "/events":
+			self._stream()
+		else:
+			self._send(404, "text/plain", b"Not found")
+
+	def _send(self, status: int, content_type: str, body: bytes):
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		self.send_header("Cache-Control", "no-store")
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _stream(self):
+		self.send_response(200)
+		self.send_header("Content-Type", "text/event-stream")
+		self.send_header("Cache-Control", "no-store")
+		self.send_header("Connection", "keep-alive")
+		self.end_headers()
+		try:
+			# The browser reconnects after retry ms if the stream drops
+			self.wfile.write(f"retry: {int(self.server.interval * 1000)}\n\n".encode("utf-8"))
+			while True:
+				self.wfile.write(f"data: {json.dumps(self.server.metrics.snapshot())}\n\n".encode("utf-8"))
+				self.wfile.flush()
+				if self.server.stopping.wait(self.server.interval):
+					break
+		except (BrokenPipeError, ConnectionResetError):
+			# Client went away
+			pass
+
+	def log_message(self, format, *args):
+		logger.debug(f"{self.address_string()} {format % args}")
+
+class _Server(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self, address, metrics: CrawlMetrics, interval: float):
+		super().__init__(address, _Handler)
+		self.metrics = metrics
+		self.interval = interval
+		self.stopping = threading.Event()
+
+class MetricsServer:
+	"""Local HTTP server streaming crawl metrics to a live dashboard"""
+
+	def __init__(self, metrics: Optional[CrawlMetrics] = None, host: str = "127.0.0.1",
+				port: int = DEFAULT_PORT, interval: float = 1.0):
+		"""
+		Args:
+			metrics: Metrics to publish (default: this process's crawl_metrics)
+			host: Interface to listen on; the default only accepts local connections
+			port: Port to listen on, 0 picks a free one
+			interval: Seconds between pushed snapshots
+		"""
+		self.metrics = metrics or crawl_metrics
+		self.host = host
+		self.port = port
+		self.interval = interval
+		self._server = None
+		self._thread = None
+
+	@property
+	def url(self) -> str:
+		return f"http://{self.host}:{self.port}/"
+
+	def start(self) -> "MetricsServer":
+		"""Start serving in a daemon thread; returns self"""
+		if self._server is None:
+			self._server = _Server((self.host, self.port), self.metrics, self.interval)
+			self.port = self._server.server_address[1]
+			self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+			self._thread.start()
+			logger.info(f"Live crawl dashboard at {self.url}")
+		return self
+
+	def stop(self):
+		"""End open event streams and stop the server"""
+		if self._server is None:
+			return
+		self._server.stopping.set()
+		self._server.shutdown()
+		self._server.server_close()
+		self._thread.join()
+		self._server = self._thread = None
+
+	def __enter__(self) -> "MetricsServer":
+		return self.start()
+
+	def __exit__(self, *exc_info):
+		self.stop()
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Live Crawl Dashboard</title>
+<style>
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 20px; background-color: #f5f5f5; color: #2c3e50; }
+.cards { display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 12px; }
+.card { background: white; border-radius: 8px; padding: 14px; box-shadow: 0 2px 8px rgba(0,0,0,0.08); }
+.value { font-size: 2em; font-weight: bold; }
+.label { color: #7f8c8d; }
+table { width: 100%; border-collapse: collapse; margin-top: 20px; background: white; }
+th, td { padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }
+th { background-color: #3498db; color: white; }
+#status { float: right; }
+</style>
+</head>
+<body>
+<h1>🕷️ Live Crawl Dashboard <small id="status">connecting…</small></h1>
+<div class="cards" id="cards"></div>
+<table>
+<thead><tr><th>Host</th><th>Requests</th><th>Error rate</th><th>p50 ms</th><th>p95 ms</th><th>Max ms</th></tr></thead>
+<tbody id="hosts"></tbody>
+</table>
+<script>
+function card(label, value) {
+	return '<div class="card"><div class="value">' + value + '</div><div class="label">' + label + '</div></div>';
+}
+function percent(rate) { return (rate * 100).toFixed(1) + '%'; }
+function escape(text) {
+	return String(text).replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+}
+var events = new EventSource('/events');
+events.onopen = function () { document.getElementById('status').textContent = 'live'; };
+events.onerror = function () { document.getElementById('status').textContent = 'reconnecting…'; };
+events.onmessage = function (message) {
+	var m = JSON.parse(message.data);
+	var cards = card('Pages / s', m.throughput_per_s) + card('In flight', m.in_flight) +
+		card('Completed', m.completed) + card('Error rate', percent(m.error_rate)) +
+		card('Recent error rate', percent(m.recent_error_rate));
+	Object.keys(m.queues).forEach(function (name) {
+		cards += card(escape(name) + ' queue', m.queues[name] === null ? 'n/a' : m.queues[name]);
+	});
+	document.getElementById('cards').innerHTML = cards;
+	document.getElementById('hosts').innerHTML = Object.keys(m.hosts).sort(function (a, b) {
+		return m.hosts[b].requests - m.hosts[a].requests;
+	}).map(function (host) {
+		var h = m.hosts[host];
+		return '<tr><td>' + escape(host) + '</td><td>' + h.requests + '</td><td>' + percent(h.error_rate) +
+			'</td><td>' + h.latency.p50_ms + '</td><td>' + h.latency.p95_ms + '</td><td>' + h.latency.max_ms + '</td></tr>';
+	}).join('');
+};
+</script>
+</body>
+</html>
+"""
@@ -1,15 +1,20 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 import logging
+import time
+
+from monitoring.metrics import CrawlMetrics, crawl_metrics
 
 logger = logging.getLogger(__name__)
 
 class BaseScraper(ABC):
 	"""Enhanced base scraper with database integration"""
 
-	def __init__(self, session=None, database_service=None):
+	def __init__(self, session=None, database_service=None, metrics: Optional[CrawlMetrics] = None):
 		self.session = session
 		self.database_service = database_service
+		# In-memory request counters, published live by monitoring.server.MetricsServer
+		self.metrics = metrics or crawl_metrics
 		self.logger = logging.getLogger(self.__class__.__name__)
 
 	@abstractmethod
@@ -35,16 +40,19 @@ class BaseScraper(ABC):
 			"scraper_type": self.__class__.__name__.lower().replace('extractor', '_extraction')
 		}
 
+		started = self.metrics.request_started(url)
 		try:
 			# Perform scraping
 			scraped_data = self.scrape(url)
+			self.metrics.request_finished(url, started, success=True)
+			result["duration_ms"] = self._elapsed_ms(started)
 			result["data"] = scraped_data
 			result["success"] = True
 
 			# Save to database if requested
 			if save_to_db and self.database_service:
 				try:
-					session_id = self._save_to_database(url, scraped_data, **kwargs)
+					session_id = self.save_result(result, **kwargs)
 					result["session_id"] = session_id
 					self.logger.info(f"Data saved to database with session ID: {session_id}")
 				except Exception as db_error:
@@ -63,6 +71,9 @@ class BaseScraper(ABC):
 					result["json_error"] = str(json_error)
 
 		except Exception as e:
+			# Only scrape() raises here; saving errors are caught above
+			self.metrics.request_finished(url, started, success=False)
+			result.setdefault("duration_ms", self._elapsed_ms(started))
 			result["error"] = str(e)
 			result["success"] = False
 			self.logger.error(f"Scraping failed for {url}: {str(e)}")
@@ -70,19 +81,31 @@ class BaseScraper(ABC):
 			# Save failed attempt to database if enabled
 			if save_to_db and self.database_service:
 				try:
-					session_id = self.database_service.save_failed_extraction(
-						url=url,
-						scraper_type=result["scraper_type"],
-						error_message=str(e),
-						metadata=kwargs
-					)
+					session_id = self.save_result(result, **kwargs)
 					result["session_id"] = session_id
 				except Exception as db_error:
 					self.logger.error(f"Failed to save error to database: {str(db_error)}")
 
 		return result
 
+	def save_result(self, result: Dict[str, Any], **kwargs) -> int:
+		"""Save a scrape_and_save result, successful or failed, to the database; returns the session ID"""
+		if result["success"]:
+			return self._save_to_database(result["url"], result["data"],
+										duration_ms=result.get("duration_ms"), **kwargs)
+		return self.database_service.save_failed_extraction(
+			url=result["url"],
+			scraper_type=result["scraper_type"],
+			error_message=result["error"],
+			metadata=kwargs,
+			duration_ms=result.get("duration_ms")
+		)
+
+	@staticmethod
+	def _elapsed_ms(started: float) -> int:
+		return int((time.perf_counter() - started) * 1000)
+
 	@abstractmethod
-	def _save_to_database(self, url: str, data: List[Any], **kwargs) -> int:
+	def _save_to_database(self, url: str, data: List[Any], duration_ms: Optional[int] = None, **kwargs) -> int:
 		"""Save scraped data to database. Must be implemented by subclasses."""
 		pass
@@ -1,6 +1,6 @@
 from .base_scraper import BaseScraper
 from bs4 import BeautifulSoup
-from typing import List
+from typing import List, Optional
 
 class ElementExtractor(BaseScraper):
 	def __init__(self, session, css_selector, database_service=None):
@@ -13,7 +13,7 @@ class ElementExtractor(BaseScraper):
 		soup = BeautifulSoup(response.content, "html.parser")
 		return [element.get_text() for element in soup.select(self.css_selector)]
 
-	def _save_to_database(self, url: str, data: List[str], **kwargs) -> int:
+	def _save_to_database(self, url: str, data: List[str], duration_ms: Optional[int] = None, **kwargs) -> int:
 		"""Save element extraction data to database"""
 		if not self.database_service:
 			raise ValueError("Database service not configured")
@@ -22,5 +22,6 @@ class ElementExtractor(BaseScraper):
 			url=url,
 			css_selector=self.css_selector,
 			elements=data,
-			metadata=kwargs
+			metadata=kwargs,
+			duration_ms=duration_ms
 		)
@@ -1,6 +1,6 @@
 from .base_scraper import BaseScraper
 from bs4 import BeautifulSoup
-from typing import List
+from typing import List, Optional
 
 class EmailExtractor(BaseScraper):
 	def __init__(self, session, database_service=None):
@@ -17,7 +17,7 @@ class EmailExtractor(BaseScraper):
 				emails.add(email)
 		return list(emails)
 
-	def _save_to_database(self, url: str, data: List[str], **kwargs) -> int:
+	def _save_to_database(self, url: str, data: List[str], duration_ms: Optional[int] = None, **kwargs) -> int:
 		"""Save email extraction data to database"""
 		if not self.database_service:
 			raise ValueError("Database service not configured")
@@ -25,5 +25,6 @@ class EmailExtractor(BaseScraper):
 		return self.database_service.save_email_extraction(
 			url=url,
 			emails=data,
-			metadata=kwargs
+			metadata=kwargs,
+			duration_ms=duration_ms
 		)
@@ -1,7 +1,7 @@
 from .base_scraper import BaseScraper
 from bs4 import BeautifulSoup
 import requests
-from typing import List
+from typing import List, Optional
 
 class ImageExtractor(BaseScraper):
 	def __init__(self, session, database_service=None):
@@ -22,7 +22,7 @@ class ImageExtractor(BaseScraper):
 			print(f"Error extracting images: {e}")
 			return []
 
-	def _save_to_database(self, url: str, data: List[str], **kwargs) -> int:
+	def _save_to_database(self, url: str, data: List[str], duration_ms: Optional[int] = None, **kwargs) -> int:
 		"""Save image extraction data to database"""
 		if not self.database_service:
 			raise ValueError("Database service not configured")
@@ -30,5 +30,6 @@ class ImageExtractor(BaseScraper):
 		return self.database_service.save_image_extraction(
 			url=url,
 			images=data,
-			metadata=kwargs
+			metadata=kwargs,
+			duration_ms=duration_ms
 		)
@@ -1,6 +1,6 @@
 from .base_scraper import BaseScraper
 from bs4 import BeautifulSoup
-from typing import List
+from typing import List, Optional
 
 class LinkExtractor(BaseScraper):
 	def __init__(self, session, database_service=None):
@@ -12,7 +12,7 @@ class LinkExtractor(BaseScraper):
 		soup = BeautifulSoup(response.content, "html.parser")
 		return [a['href'] for a in soup.find_all('a', href=True)]
 
-	def _save_to_database(self, url: str, data: List[str], **kwargs) -> int:
+	def _save_to_database(self, url: str, data: List[str], duration_ms: Optional[int] = None, **kwargs) -> int:
 		"""Save link extraction data to database"""
 		if not self.database_service:
 			raise ValueError("Database service not configured")
@@ -20,5 +20,6 @@ class LinkExtractor(BaseScraper):
 		return self.database_service.save_link_extraction(
 			url=url,
 			links=data,
-			metadata=kwargs
+			metadata=kwargs,
+			duration_ms=duration_ms
 		)
@@ -1,11 +1,17 @@
+from xml.sax.saxutils import escape
+
 class SitemapGenerator:
 	def generate(self, links, filename="sitemap"):
-		urlset = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">\n"
-		for link in links:
-			urlset += f"  <url>\n    <loc>{link}</loc>\n  </url>\n"
-		urlset += "</urlset>\n"
+		"""Write a sitemap, streaming links from any iterable (list, generator, DB cursor)"""
+		if not filename.endswith(".xml"):
+			filename = f"{filename}.xml"
 
-		filename = f"{filename}.xml"
+		count = 0
 		with open(filename, "w", encoding="utf-8") as f:
-			f.write(urlset)
-		print(f"Sitemap saved to {filename}")
+			f.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">\n")
+			for link in links:
+				f.write(f"  <url>\n    <loc>{escape(link)}</loc>\n  </url>\n")
+				count += 1
+			f.write("</urlset>\n")
+		print(f"Sitemap saved to {filename} ({count} URLs)")
+		return filename
@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import glob
+import unittest
+import uuid
+
+from database.service import DatabaseService
+from database.config import DatabaseConfig
+
+try:
+	import aiosqlite
+	import greenlet
+	from database.async_service import AsyncDatabaseService
+except ImportError:
+	AsyncDatabaseService = None
+
+class IntegrationScenario:
+	"""
+	The checks of test_database_integration.py, run against one service flavour
+
+	Subclasses provide setUp/tearDown and call(), which invokes a
+	service method and returns its result whether the service is sync or async.
+	"""
+
+	async def call(self, method, *args, **kwargs):
+		raise NotImplementedError
+
+	async def collect(self, method, *args, **kwargs):
+		raise NotImplementedError
+
+	async def test_connection(self):
+		self.assertTrue(await self.call("test_connection"))
+
+	async def test_saves_and_statistics(self):
+		element_id = await self.call("save_element_extraction", "https://example.com", "p",
+									["Test paragraph 1", "Test paragraph 2"], {"test": True})
+		await self.call("save_link_extraction", "https://example.com",
+						["https://example.com/page1", "https://example.com/page2"])
+		await self.call("save_email_extraction", "https://example.com",
+						["test@example.com", "contact@example.com"])
+		await self.call("save_image_extraction", "https://example.com",
+						["https://example.com/img1.jpg", "https://example.com/img2.png"])
+		await self.call("save_failed_extraction", "https://example.com", "test_extraction", "Test error message")
+
+		self.assertEqual(await self.call("get_statistics"), {
+			"total_sessions": 5,
+			"successful_sessions": 4,
+			"failed_sessions": 1,
+			"total_elements": 2,
+			"total_links": 2,
+			"total_emails": 2,
+			"total_images": 2,
+		})
+		self.assertEqual(len(await self.call("get_extraction_history", limit=5)), 5)
+
+		data = await self.call("get_session_data", element_id)
+		self.assertEqual(data["session"]["metadata"], {"css_selector": "p", "test": True})
+		self.assertEqual([e["text"] for e in data["data"]["elements"]], ["Test paragraph 1", "Test paragraph 2"])
+
+	async def test_queries(self):
+		link_ids = [
+			await self.call("save_link_extraction", "https://example.com", [f"/page{i}/{j}" for j in range(i + 1)])
+			for i in range(3)
+		]
+		batched = await self.call("get_sessions_data", link_ids, counts_only=True)
+		self.assertEqual([d["counts"]["links"] for d in batched.values()], [1, 2, 3])
+
+		history = await self.collect("iter_extraction_history", url="https://example.com", batch_size=2)
+		self.assertEqual([h["id"] for h in history], link_ids[::-1])
+		self.assertEqual(await self.collect("iter_session_rows", link_ids[1], batch_size=1),
+						(await self.call("get_session_data", link_ids[1]))["data"]["links"])
+		self.assertEqual(len(await self.collect("iter_links")), 6)
+
+		await self.call("save_element_extraction", "https://example.com", "p", ["async generators"])
+		self.assertEqual(len(await self.call("search_elements", "generators")), 1)
+
+		email_id = await self.call("save_email_extraction", "https://example.com", ["a@example.com"] * 2)
+		self.assertEqual([(e["value"], e["occurrence_count"]) for e in await self.call("get_unique_emails")],
+						[("a@example.com", 2)])
+		self.assertEqual(await self.call("get_entity_sessions", "email", "a@example.com"), [email_id])
+		self.assertEqual(await self.call("get_result_counts", [email_id]), {email_id: 2})
+		type_totals = (await self.call("get_aggregates", ["type_totals"]))["type_totals"]
+		self.assertEqual(sum(row["sessions"] for row in type_totals), 5)
+
+class TestSyncService(IntegrationScenario, unittest.IsolatedAsyncioTestCase):
+	def setUp(self):
+		self.db_name = f"test_async_{uuid.uuid4().hex}.db"
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+
+	def tearDown(self):
+		self.db_service.db_manager.dispose()
+		for path in glob.glob(DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):] + "*"):
+			os.remove(path)
+
+	async def call(self, method, *args, **kwargs):
+		return getattr(self.db_service, method)(*args, **kwargs)
+
+	async def collect(self, method, *args, **kwargs):
+		return list(getattr(self.db_service, method)(*args, **kwargs))
+
+@unittest.skipIf(AsyncDatabaseService is None, "aiosqlite/greenlet not installed")
+class TestAsyncService(IntegrationScenario, unittest.IsolatedAsyncioTestCase):
+	async def asyncSetUp(self):
+		self.db_name = f"test_async_{uuid.uuid4().hex}.db"
+		self.db_service = await AsyncDatabaseService.create(db_type="sqlite", db_name=self.db_name, pool_size=3)
+
+	async def asyncTearDown(self):
+		await self.db_service.close()
+		for path in glob.glob(DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):] + "*"):
+			os.remove(path)
+
+	async def call(self, method, *args, **kwargs):
+		return await getattr(self.db_service, method)(*args, **kwargs)
+
+	async def collect(self, method, *args, **kwargs):
+		return [item async for item in getattr(self.db_service, method)(*args, **kwargs)]
+
+	async def test_concurrent_saves(self):
+		ids = await asyncio.gather(*[
+			self.db_service.save_link_extraction(f"https://example.com/{i}", [f"/only{i}", "/shared"])
+			for i in range(10)
+		])
+		self.assertEqual(len(set(ids)), 10)
+		stats = await self.db_service.get_statistics()
+		self.assertEqual((stats["total_sessions"], stats["total_links"]), (10, 20))
+		self.assertEqual(self.db_service.db_manager.engine.pool.size(), 3)
+
+	async def test_bound_service_is_fully_constructed(self):
+		from database.async_service import _SessionBoundService
+		sync_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		try:
+			async with self.db_service.get_db_session() as session:
+				bound = await session.run_sync(lambda sync_session: _SessionBoundService(sync_session, True))
+			self.assertEqual(set(vars(bound)), set(vars(sync_service)))
+			self.assertTrue(bound.track_changes)
+		finally:
+			sync_service.db_manager.dispose()
+
+	async def test_rows_match_sync_service(self):
+		session_id = await self.db_service.save_image_extraction("https://example.com", ["/a.png"])
+		sync_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		try:
+			self.assertEqual(sync_service.get_session_data(session_id),
+							await self.db_service.get_session_data(session_id))
+		finally:
+			sync_service.db_manager.dispose()
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import glob
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from cli import batch
+from database.config import DatabaseConfig
+from database.service import DatabaseService
+
+class _Pages(BaseHTTPRequestHandler):
+	def do_GET(self):
+		if self.path.startswith("/missing"):
+			self.send_error(404)
+			return
+		body = f'<a href="{self.path}/next">next</a><p>mail admin@example.com</p>'.encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", "text/html")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+class TestBatchCli(unittest.TestCase):
+	def setUp(self):
+		self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Pages)
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+		self.directory = tempfile.mkdtemp()
+		self.db_name = f"test_batch_{uuid.uuid4().hex}.db"
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		shutil.rmtree(self.directory)
+		for path in glob.glob(DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):] + "*"):
+			os.remove(path)
+
+	def _input(self, urls):
+		path = os.path.join(self.directory, "urls.txt")
+		with open(path, "w", encoding="utf-8") as f:
+			f.write("# comment\n\n" + "\n".join(urls) + "\n")
+		return path
+
+	def test_links_to_gzip_and_database(self):
+		urls = [f"{self.base}/page{i}" for i in range(5)] + [f"{self.base}/missing"]
+		out = os.path.join(self.directory, "results.jsonl.gz")
+		code = batch.main(["links", "--input", self._input(urls), "--out", out, "--concurrency", "3",
+							"--db", "--db-name", self.db_name, "--quiet"])
+		self.assertEqual(code, batch.EXIT_PARTIAL)
+
+		with gzip.open(out, "rt", encoding="utf-8") as f:
+			records = {record["url"]: record for record in map(json.loads, f)}
+		self.assertEqual(set(records), set(urls))
+		self.assertEqual(records[f"{self.base}/page1"]["data"], ["/page1/next"])
+		self.assertFalse(records[f"{self.base}/missing"]["success"])
+
+		db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		try:
+			stats = db_service.get_statistics()
+		finally:
+			db_service.close()
+		self.assertEqual((stats["total_sessions"], stats["failed_sessions"], stats["total_links"]), (6, 1, 5))
+
+	def test_stdin_to_stdout(self):
+		stdin = mock.patch.object(sys, "stdin", new=io.StringIO(f"{self.base}/a\n"))
+		stdout = mock.patch.object(sys, "stdout", new=io.StringIO())
+		with stdin, stdout as output:
+			code = batch.main(["elements", "--selector", "p", "--quiet"])
+		self.assertEqual(code, batch.EXIT_OK)
+		self.assertEqual(json.loads(output.getvalue())["data"], ["mail admin@example.com"])
+
+	def _saved_sessions(self):
+		db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		try:
+			return db_service.get_statistics()["total_sessions"]
+		finally:
+			db_service.close()
+
+	def test_interrupt_keeps_finished_results(self):
+		urls = [f"{self.base}/page{i}" for i in range(4)]
+		out = os.path.join(self.directory, "results.jsonl")
+		with mock.patch.object(batch, "wait", side_effect=KeyboardInterrupt):
+			code = batch.main(["links", "--input", self._input(urls), "--out", out, "--concurrency", "1",
+								"--db", "--db-name", self.db_name, "--quiet"])
+		self.assertEqual(code, batch.EXIT_INTERRUPTED)
+
+		# The request in flight when interrupted is written and saved; queued ones are dropped
+		with open(out, encoding="utf-8") as f:
+			records = [json.loads(line) for line in f]
+		self.assertGreaterEqual(len(records), 1)
+		self.assertTrue(all(record["success"] for record in records))
+		self.assertEqual(self._saved_sessions(), len(records))
+
+	def test_closed_output_stops_the_run(self):
+		class BrokenSink(io.StringIO):
+			def write(self, text):
+				raise BrokenPipeError()
+
+		urls = [f"{self.base}/page{i}" for i in range(20)]
+		with mock.patch.object(batch, "open_output", return_value=BrokenSink()):
+			code = batch.main(["links", "--input", self._input(urls), "--concurrency", "1",
+								"--db", "--db-name", self.db_name, "--quiet"])
+		self.assertEqual(code, batch.EXIT_BROKEN_PIPE)
+		# Finished results are still saved, but no new URLs are started
+		self.assertTrue(1 <= self._saved_sessions() < len(urls))
+
+	def test_exit_codes(self):
+		missing = os.path.join(self.directory, "missing.txt")
+		self.assertEqual(batch.main(["emails", "--input", missing, "--quiet"]), batch.EXIT_FATAL)
+		with self.assertRaises(SystemExit) as raised, mock.patch("sys.stderr"):
+			batch.main(["links", "--concurrency", "0"])
+		self.assertEqual(raised.exception.code, batch.EXIT_USAGE)
+
+if __name__ == "__main__":
+	unittest.main()
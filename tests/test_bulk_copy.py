@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from database.bulk import format_copy_value, build_copy_stream, copy_rows, bulk_insert
+from database.models import ExtractedLinks
+
+def postgres_available() -> bool:
+	"""Whether a PostgreSQL server configured through POSTGRES_* is reachable"""
+	if not os.getenv("POSTGRES_HOST"):
+		return False
+	try:
+		from database.config import DatabaseManager
+		return DatabaseManager(db_type="postgresql").test_connection()
+	except Exception:
+		return False
+
+class TestCopyStream(unittest.TestCase):
+	def test_value_formatting(self):
+		self.assertEqual(format_copy_value(None), "\\N")
+		self.assertEqual(format_copy_value(True), "t")
+		self.assertEqual(format_copy_value(False), "f")
+		self.assertEqual(format_copy_value(42), "42")
+		self.assertEqual(format_copy_value(datetime(2024, 1, 2, 3, 4, 5)), "2024-01-02T03:04:05")
+		self.assertEqual(format_copy_value({"a": 1}), '{"a": 1}')
+
+	def test_special_characters_are_escaped(self):
+		self.assertEqual(format_copy_value("a\tb\nc\rd\\e"), "a\\tb\\nc\\rd\\\\e")
+		self.assertEqual(format_copy_value("\\N"), "\\\\N")
+
+	def test_stream_layout(self):
+		rows = [
+			{"session_id": 1, "url_id": 10, "is_external": True},
+			{"session_id": 1, "url_id": None, "is_external": False},
+		]
+		stream = build_copy_stream(rows, ["session_id", "url_id", "is_external"])
+		self.assertEqual(stream.read(), "1\t10\tt\n1\t\\N\tf\n")
+
+	def test_copy_rows_issues_copy_expert(self):
+		cursor = mock.MagicMock()
+		db_session = mock.MagicMock()
+		db_session.get_bind.return_value.dialect = self._postgres_dialect()
+		db_session.connection.return_value.connection.cursor.return_value = cursor
+
+		copy_rows(db_session, ExtractedLinks.__table__, [{"session_id": 7, "url_id": 3, "is_external": False}])
+
+		statement, stream = cursor.copy_expert.call_args[0]
+		self.assertTrue(statement.startswith("COPY extracted_links (session_id, url_id, is_external"))
+		self.assertTrue(statement.endswith("FROM STDIN"))
+		fields = stream.read().rstrip("\n").split("\t")
+		# created_at, url and is_valid defaults are filled in client-side
+		self.assertEqual(fields[:3], ["7", "3", "f"])
+		self.assertEqual(len(fields), 6)
+		cursor.close.assert_called_once()
+
+	def _postgres_dialect(self):
+		from sqlalchemy.dialects import postgresql
+		return postgresql.dialect()
+
+	def test_other_backends_use_executemany(self):
+		db_session = mock.MagicMock()
+		db_session.get_bind.return_value.dialect.name = "sqlite"
+		rows = [{"session_id": 1, "email": "a@example.com"}]
+
+		from database.models import ExtractedEmails
+		self.assertEqual(bulk_insert(db_session, ExtractedEmails.__table__, rows), 1)
+		statement, parameters = db_session.execute.call_args[0]
+		self.assertEqual(parameters, rows)
+
+@unittest.skipUnless(postgres_available(), "PostgreSQL not available (set POSTGRES_* to enable)")
+class TestPostgresCopy(unittest.TestCase):
+	def test_round_trip(self):
+		from database.service import DatabaseService
+		db_service = DatabaseService(db_type="postgresql")
+		links = ["https://example.com/a\tb", "/relative", "https://example.com/\\path"]
+		session_id = db_service.save_link_extraction("https://example.com", links)
+		elements_id = db_service.save_element_extraction("https://example.com", "p", ["line\nbreak", ""])
+
+		data = db_service.get_session_data(session_id)["data"]["links"]
+		self.assertEqual([l["url"] for l in data], links)
+		elements = db_service.get_session_data(elements_id)["data"]["elements"]
+		self.assertEqual([e["text"] for e in elements], ["line\nbreak", ""])
+
+if __name__ == "__main__":
+	unittest.main()
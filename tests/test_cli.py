@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from cli.cli import WebScraperCLI
+
+class TestVisualizationMenu(unittest.TestCase):
+	def setUp(self):
+		# Skip __init__, which opens the configured database
+		self.cli = WebScraperCLI.__new__(WebScraperCLI)
+		self.cli.db_service = mock.Mock()
+		self.cli.db_enabled = True
+
+	def _choose(self, *answers):
+		with mock.patch("builtins.input", side_effect=answers), \
+				mock.patch("visualization.DataVisualizer") as visualizer, \
+				mock.patch.object(WebScraperCLI, "_create_timeline") as create_timeline, \
+				mock.patch("builtins.print"):
+			self.cli.handle_visualizations()
+		return visualizer, create_timeline
+
+	def test_since_is_passed_to_the_visualizer(self):
+		visualizer, create_timeline = self._choose("4", "2024-03-01")
+		visualizer.assert_called_once_with(self.cli.db_service, since=datetime(2024, 3, 1))
+		create_timeline.assert_called_once_with(visualizer.return_value)
+
+	def test_empty_since_plots_all_history(self):
+		visualizer, _ = self._choose("4", "")
+		visualizer.assert_called_once_with(self.cli.db_service, since=None)
+
+	def test_invalid_since_renders_nothing(self):
+		visualizer, create_timeline = self._choose("4", "March")
+		visualizer.assert_not_called()
+		create_timeline.assert_not_called()
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,699 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+import uuid
+import glob
+import sqlite3
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from database.service import DatabaseService
+from database.config import DatabaseConfig
+from database.repository import StatisticsRepository
+from database.models import StatisticsCounter, UrlDictionary, ScrapingSession, SnapshotDelta, SessionRollup
+
+class DatabaseServiceTestCase(unittest.TestCase):
+	"""Base test case with a throwaway SQLite database per test"""
+
+	def setUp(self):
+		self.db_name = f"test_service_{uuid.uuid4().hex}.db"
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+
+	def tearDown(self):
+		self.db_service.db_manager.dispose()
+		db_path = DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):]
+		for path in glob.glob(db_path + "*"):
+			os.remove(path)
+
+class TestStatistics(DatabaseServiceTestCase):
+	def _populate(self):
+		self.db_service.save_element_extraction("https://example.com", "p", ["a", "b", "c"])
+		self.db_service.save_link_extraction("https://example.com", ["https://example.com/1", "/2"])
+		self.db_service.save_email_extraction("https://example.com", ["a@example.com"])
+		self.db_service.save_image_extraction("https://example.com", ["https://example.com/i.png"])
+		self.db_service.save_failed_extraction("https://example.com", "link_extraction", "boom")
+
+	def test_counters_track_saves(self):
+		self._populate()
+		stats = self.db_service.get_statistics()
+		self.assertEqual(stats, {
+			"total_sessions": 5,
+			"successful_sessions": 4,
+			"failed_sessions": 1,
+			"total_elements": 3,
+			"total_links": 2,
+			"total_emails": 1,
+			"total_images": 1,
+		})
+
+	def test_counters_track_saves_after_seeding(self):
+		# Seed the counters first, so the saves below are counted incrementally
+		reader = DatabaseService(db_type="sqlite", db_name=self.db_name, stats_cache_ttl=0)
+		self.assertEqual(reader.get_statistics()["total_sessions"], 0)
+		self._populate()
+		stats = reader.get_statistics()
+		reader.db_manager.dispose()
+		self.assertEqual((stats["total_sessions"], stats["successful_sessions"], stats["failed_sessions"]), (5, 4, 1))
+		with self.db_service.get_db_session() as session:
+			self.assertIsNone(session.get(StatisticsCounter, "success_sessions"))
+
+	def test_increment_upserts_missing_counters(self):
+		# A counter another writer created first is added to, not inserted again
+		with self.db_service.get_db_session() as session:
+			StatisticsRepository(session).increment({"new_counter": 2})
+			session.commit()
+		with self.db_service.get_db_session() as session:
+			StatisticsRepository(session).increment({"new_counter": 3, "other_counter": -1, "unchanged": 0})
+			session.commit()
+			counters = StatisticsRepository(session).get_all()
+		self.assertEqual((counters["new_counter"], counters["other_counter"]), (5, -1))
+		self.assertNotIn("unchanged", counters)
+
+	def test_counters_match_aggregated_query(self):
+		self._populate()
+		stats = self.db_service.get_statistics()
+		self.assertEqual(stats, self.db_service.rebuild_statistics())
+
+	def test_counters_seeded_for_existing_database(self):
+		self._populate()
+		with self.db_service.get_db_session() as session:
+			session.query(StatisticsCounter).delete()
+			session.commit()
+
+		fresh_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		self.assertEqual(fresh_service.get_statistics()["total_elements"], 3)
+		fresh_service.db_manager.dispose()
+
+	def test_cache_serves_within_ttl(self):
+		self._populate()
+		reader = DatabaseService(db_type="sqlite", db_name=self.db_name, stats_cache_ttl=60)
+		before = reader.get_statistics()
+
+		self.db_service.save_email_extraction("https://example.com", ["b@example.com"])
+		self.assertEqual(reader.get_statistics(), before)
+
+		reader.stats_cache_ttl = 0
+		self.assertEqual(reader.get_statistics()["total_emails"], before["total_emails"] + 1)
+		reader.db_manager.dispose()
+
+	def test_own_writes_invalidate_cache(self):
+		self.db_service.get_statistics()
+		self.db_service.save_email_extraction("https://example.com", ["a@example.com"])
+		self.assertEqual(self.db_service.get_statistics()["total_emails"], 1)
+
+class TestSessionsData(DatabaseServiceTestCase):
+	def setUp(self):
+		super().setUp()
+		self.element_id = self.db_service.save_element_extraction("https://example.com", "p", ["a", "b", "c"])
+		self.link_ids = [
+			self.db_service.save_link_extraction("https://example.com", [f"/page{i}/{j}" for j in range(i + 1)])
+			for i in range(5)
+		]
+		self.failed_id = self.db_service.save_failed_extraction("https://example.com", "link_extraction", "boom")
+
+	def _count_statements(self, func):
+		statements = []
+		def before_execute(conn, cursor, statement, parameters, context, executemany):
+			statements.append(statement)
+		engine = self.db_service.db_manager.read_engine
+		event.listen(engine, "before_cursor_execute", before_execute)
+		try:
+			result = func()
+		finally:
+			event.remove(engine, "before_cursor_execute", before_execute)
+		return result, statements
+
+	def test_matches_single_session_api(self):
+		ids = [self.element_id, *self.link_ids, self.failed_id]
+		batched = self.db_service.get_sessions_data(ids)
+		self.assertEqual(list(batched), ids)
+		for session_id in ids:
+			self.assertEqual(batched[session_id], self.db_service.get_session_data(session_id))
+		self.assertEqual([e["text"] for e in batched[self.element_id]["data"]["elements"]], ["a", "b", "c"])
+		self.assertEqual(batched[self.failed_id]["data"], {"links": []})
+
+	def test_query_count_is_constant(self):
+		ids = [self.element_id, *self.link_ids, self.failed_id]
+		_, statements = self._count_statements(lambda: self.db_service.get_sessions_data(ids))
+		selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+		# sessions + one query per extraction table involved
+		self.assertEqual(len(selects), 3)
+
+	def test_limit_per_session(self):
+		data = self.db_service.get_sessions_data(self.link_ids, limit_per_session=2)
+		self.assertEqual([len(d["data"]["links"]) for d in data.values()], [1, 2, 2, 2, 2])
+		self.assertEqual([l["url"] for l in data[self.link_ids[4]]["data"]["links"]], ["/page4/0", "/page4/1"])
+
+	def test_counts_only(self):
+		data = self.db_service.get_sessions_data([*self.link_ids, self.element_id], counts_only=True)
+		self.assertEqual([d["counts"]["links"] for sid, d in data.items() if sid in self.link_ids], [1, 2, 3, 4, 5])
+		self.assertEqual(data[self.element_id]["counts"], {"elements": 3})
+		self.assertNotIn("data", data[self.element_id])
+
+	def test_result_counts_in_one_query(self):
+		ids = [self.element_id, *self.link_ids, self.failed_id, 999999]
+		counts, statements = self._count_statements(lambda: self.db_service.get_result_counts(ids))
+		self.assertEqual(counts, {self.element_id: 3, **{sid: i + 1 for i, sid in enumerate(self.link_ids)},
+								self.failed_id: 0, 999999: 0})
+		self.assertEqual(len([s for s in statements if s.lstrip().upper().startswith("SELECT")]), 1)
+
+		tracked = DatabaseService(db_type="sqlite", db_name=self.db_name, track_changes=True)
+		tracked_id = tracked.save_email_extraction("https://example.com", ["a@example.com", "b@example.com"])
+		tracked.db_manager.dispose()
+		self.assertEqual(self.db_service.get_result_counts([tracked_id]), {tracked_id: 2})
+
+	def test_unknown_ids_are_skipped(self):
+		self.assertEqual(self.db_service.get_sessions_data([999999]), {})
+		self.assertIsNone(self.db_service.get_session_data(999999))
+
+class TestReadEngine(DatabaseServiceTestCase):
+	def _engines_used(self, func):
+		used = []
+		manager = self.db_service.db_manager
+		listeners = {
+			"primary": lambda *args: used.append("primary"),
+			"read": lambda *args: used.append("read"),
+		}
+		event.listen(manager.engine, "before_cursor_execute", listeners["primary"])
+		event.listen(manager.read_engine, "before_cursor_execute", listeners["read"])
+		try:
+			func()
+		finally:
+			event.remove(manager.engine, "before_cursor_execute", listeners["primary"])
+			event.remove(manager.read_engine, "before_cursor_execute", listeners["read"])
+		return set(used)
+
+	def test_sqlite_reads_use_read_only_wal_connection(self):
+		manager = self.db_service.db_manager
+		self.assertIsNot(manager.read_engine, manager.engine)
+		with manager.engine.connect() as connection:
+			self.assertEqual(connection.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+		with manager.read_engine.connect() as connection:
+			with self.assertRaises(OperationalError):
+				connection.execute(text("DELETE FROM scraping_sessions"))
+
+	def test_analytics_are_routed_to_read_engine(self):
+		session_id = self.db_service.save_link_extraction("https://example.com", ["/a"])
+		self.db_service.get_statistics()
+		self.db_service._stats_cache = None
+
+		used = self._engines_used(lambda: (
+			self.db_service.get_extraction_history(limit=5),
+			self.db_service.get_session_data(session_id),
+			list(self.db_service.iter_links()),
+			self.db_service.get_statistics(),
+		))
+		self.assertEqual(used, {"read"})
+		self.assertEqual(self._engines_used(lambda: self.db_service.save_email_extraction("https://example.com", [])),
+						{"primary"})
+
+	def test_read_engine_can_be_disabled(self):
+		self.db_service.use_read_engine = False
+		self.assertEqual(self._engines_used(lambda: self.db_service.get_extraction_history(limit=5)), {"primary"})
+
+	def test_replica_url_from_environment(self):
+		self.assertIsNone(DatabaseConfig.get_read_url("postgresql"))
+		with mock.patch.dict(os.environ, {"POSTGRES_HOST": "primary", "POSTGRES_REPLICA_HOST": "replica",
+										"POSTGRES_REPLICA_PORT": "6432"}):
+			url = DatabaseConfig.get_read_url("postgresql")
+		self.assertIn("@replica:6432/", url)
+
+class TestStreaming(DatabaseServiceTestCase):
+	def setUp(self):
+		super().setUp()
+		self.ids = [
+			self.db_service.save_link_extraction(f"https://example.com/{i % 3}", [f"/p{i}/{j}" for j in range(3)])
+			for i in range(10)
+		]
+
+	def test_history_iteration_is_complete_and_ordered(self):
+		history = list(self.db_service.iter_extraction_history(batch_size=3))
+		self.assertEqual(sorted(h["id"] for h in history), sorted(self.ids))
+		keys = [(h["timestamp"], h["id"]) for h in history]
+		self.assertEqual(keys, sorted(keys, reverse=True))
+
+	def test_history_by_url(self):
+		history = self.db_service.get_extraction_history(url="https://example.com/0")
+		self.assertEqual(sorted(h["id"] for h in history), [self.ids[i] for i in (0, 3, 6, 9)])
+
+	def test_session_rows(self):
+		rows = list(self.db_service.iter_session_rows(self.ids[0], batch_size=2))
+		self.assertEqual([r["url"] for r in rows], ["/p0/0", "/p0/1", "/p0/2"])
+
+	def test_links(self):
+		self.assertEqual(len(list(self.db_service.iter_links(batch_size=4))), 30)
+		self.assertEqual(len(list(self.db_service.iter_links(url="https://example.com/1", batch_size=4))), 9)
+
+class TestMetadataIndexes(DatabaseServiceTestCase):
+	def test_filters_by_selector_and_result_count(self):
+		h2 = self.db_service.save_element_extraction("https://example.com", "h2", ["a", "b", "c"])
+		p = self.db_service.save_element_extraction("https://example.com", "p", ["a"])
+		links = self.db_service.save_link_extraction("https://example.com", ["/a", "/b"])
+
+		self.assertEqual([s["id"] for s in self.db_service.find_sessions(css_selector="h2")], [h2])
+		self.assertEqual([s["id"] for s in self.db_service.find_sessions(min_results=2)], [links, h2])
+		self.assertEqual([s["id"] for s in self.db_service.find_sessions(max_results=2, limit=1)], [links])
+		self.assertEqual(self.db_service.get_session_data(p)["session"]["result_count"], 1)
+		filtered = self.db_service.iter_extraction_history(css_selector="p", min_results=1, max_results=1)
+		self.assertEqual([s["id"] for s in filtered], [p])
+
+	def test_filters_use_indexes(self):
+		from database.metadata_index import metadata_field
+		with self.db_service.get_db_session() as session:
+			for condition, index in ((f"{metadata_field('sqlite', 'css_selector')} = 'h2'", "meta_css_selector"),
+									("result_count >= 10", "result_count")):
+				plan = session.execute(text(
+					f"EXPLAIN QUERY PLAN SELECT id FROM scraping_sessions WHERE {condition}"
+				)).fetchall()
+				self.assertIn(f"ix_scraping_sessions_{index}", " ".join(row[-1] for row in plan))
+
+class TestSessionColumns(DatabaseServiceTestCase):
+	def test_columns_are_filled_at_write_time(self):
+		from scraper.link_extractor import LinkExtractor
+
+		scraper = LinkExtractor(session=None, database_service=self.db_service)
+		with mock.patch.object(LinkExtractor, "scrape", return_value=["/a", "/b"]):
+			result = scraper.scrape_and_save("https://Sub.Example.com/page", save_to_db=True, depth=1)
+		with mock.patch.object(LinkExtractor, "scrape", side_effect=RuntimeError("boom")):
+			failed = scraper.scrape_and_save("https://example.org/", save_to_db=True)
+
+		session = self.db_service.get_session_data(result["session_id"])["session"]
+		self.assertEqual((session["domain"], session["result_count"]), ("sub.example.com", 2))
+		self.assertEqual(session["duration_ms"], result["duration_ms"])
+		self.assertEqual(session["metadata"], {"depth": 1})
+		failed_session = self.db_service.get_session_data(failed["session_id"])["session"]
+		self.assertEqual((failed_session["domain"], failed_session["result_count"]), ("example.org", 0))
+		self.assertIsNotNone(failed_session["duration_ms"])
+
+	def test_result_count_is_the_stored_row_count(self):
+		from database import repository
+
+		# A backend skipping a row (e.g. a conflict) must not leave the session claiming it
+		def insert_all_but_last(db_session, table, rows, ignore_conflicts=False):
+			return bulk_insert(db_session, table, rows[:-1], ignore_conflicts)
+
+		bulk_insert = repository.bulk_insert
+		with mock.patch.object(repository, "bulk_insert", side_effect=insert_all_but_last):
+			session_id = self.db_service.save_link_extraction("https://example.com", ["/a", "/b", "/c"])
+		session = self.db_service.get_session_data(session_id)["session"]
+		self.assertEqual(session["result_count"], 2)
+		self.assertEqual(self.db_service.get_result_counts([session_id]), {session_id: 2})
+		self.assertEqual(self.db_service.get_statistics()["total_links"], 2)
+
+	def test_failed_row_insert_saves_no_session(self):
+		from database.repository import LinkRepository
+		with mock.patch.object(LinkRepository, "add_batch", side_effect=RuntimeError("boom")):
+			with self.assertRaises(RuntimeError):
+				self.db_service.save_link_extraction("https://example.com", ["/a"])
+		self.assertEqual(self.db_service.get_extraction_history(), [])
+		self.assertEqual(self.db_service.rebuild_statistics()["total_sessions"], 0)
+		self.assertEqual(self.db_service.get_statistics()["total_sessions"], 0)
+
+	def test_existing_sessions_are_backfilled(self):
+		links = self.db_service.save_link_extraction("https://a.example.com/1", ["/x", "/y", "/z"])
+		tracked = DatabaseService(db_type="sqlite", db_name=self.db_name, track_changes=True)
+		emails = tracked.save_email_extraction("https://b.example.com/", ["a@example.com", "b@example.com"])
+		tracked.db_manager.dispose()
+		with self.db_service.get_db_session() as session:
+			session.execute(text("UPDATE scraping_sessions SET domain = NULL, result_count = NULL"))
+			session.execute(text("DELETE FROM schema_version WHERE version >= 6"))
+			session.commit()
+		self.db_service.db_manager.dispose()
+
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		sessions = {s["id"]: s for s in self.db_service.get_extraction_history()}
+		self.assertEqual((sessions[links]["domain"], sessions[links]["result_count"]), ("a.example.com", 3))
+		self.assertEqual((sessions[emails]["domain"], sessions[emails]["result_count"]), ("b.example.com", 2))
+		self.assertIsNone(sessions[links]["duration_ms"])
+
+class TestAggregates(DatabaseServiceTestCase):
+	def setUp(self):
+		super().setUp()
+		self.db_service.save_link_extraction("https://a.example.com/1", ["/x", "/y"])
+		self.db_service.save_link_extraction("https://a.example.com/2", ["/z"])
+		self.db_service.save_element_extraction("https://b.example.com/", "p", ["text"])
+		self.db_service.save_failed_extraction("https://a.example.com/3", "link_extraction", "timeout")
+		self.db_service.save_failed_extraction("https://b.example.com/", "element_extraction", "timeout")
+
+		# Monday 2024-01-01 09:30 and Sunday 2024-01-07 23:10
+		with self.db_service.get_db_session() as session:
+			session.query(ScrapingSession).filter(ScrapingSession.id <= 2).update(
+				{ScrapingSession.timestamp: datetime(2024, 1, 1, 9, 30)}, synchronize_session=False)
+			session.query(ScrapingSession).filter(ScrapingSession.id > 2).update(
+				{ScrapingSession.timestamp: datetime(2024, 1, 7, 23, 10)}, synchronize_session=False)
+			session.commit()
+		self.assertEqual(self.db_service.rebuild_rollups(), 5)
+
+	def test_grouped_in_database(self):
+		aggregates = self.db_service.get_aggregates()
+		untimed = {"duration_ms_sum": 0, "timed_sessions": 0}
+		self.assertEqual(aggregates["type_totals"], [
+			{"scraper_type": "element_extraction", "sessions": 2, "successful": 1, "results": 1, **untimed},
+			{"scraper_type": "link_extraction", "sessions": 3, "successful": 2, "results": 3, **untimed},
+		])
+		self.assertEqual(aggregates["domain_totals"][0],
+						{"domain": "a.example.com", "sessions": 3, "successful": 2, "results": 3, **untimed})
+		self.assertEqual(aggregates["domain_count"], [{"domains": 2}])
+		self.assertEqual([(r["date"].isoformat(), r["scraper_type"], r["sessions"]) for r in aggregates["daily_counts"]], [
+			("2024-01-01", "link_extraction", 2),
+			("2024-01-07", "element_extraction", 2),
+			("2024-01-07", "link_extraction", 1),
+		])
+		self.assertEqual([(r["weekday"], r["hour"], r["sessions"]) for r in aggregates["activity_by_hour"]],
+						[(0, 9, 2), (6, 23, 3)])
+		self.assertEqual(aggregates["top_errors"], [{"error_message": "timeout", "sessions": 2}])
+
+	def test_since_and_subsets(self):
+		aggregates = self.db_service.get_aggregates(["type_totals"], since=datetime(2024, 1, 5))
+		self.assertEqual(list(aggregates), ["type_totals"])
+		self.assertEqual(sum(r["sessions"] for r in aggregates["type_totals"]), 3)
+
+class TestRollups(DatabaseServiceTestCase):
+	def test_rollups_are_updated_on_write(self):
+		self.db_service.save_link_extraction("https://a.example.com/1", ["/x", "/y"], duration_ms=120)
+		self.db_service.save_link_extraction("https://a.example.com/2", ["/z"], duration_ms=80)
+		self.db_service.save_failed_extraction("https://a.example.com/3", "link_extraction", "timeout")
+
+		with self.db_service.get_db_session() as session:
+			rollups = session.query(SessionRollup).filter(SessionRollup.status == "success").all()
+		self.assertEqual(sorted(r.granularity for r in rollups), ["day", "hour"])
+		self.assertTrue(all((r.sessions, r.results, r.duration_ms_sum, r.timed_sessions) == (2, 3, 200, 2)
+							for r in rollups))
+
+		totals = self.db_service.get_aggregates(["type_totals"])["type_totals"]
+		self.assertEqual(totals, [{"scraper_type": "link_extraction", "sessions": 3, "successful": 2,
+									"results": 3, "duration_ms_sum": 200, "timed_sessions": 2}])
+		self.assertEqual(self.db_service.refresh_rollups(), 0)
+
+	def test_catch_up_from_high_water_mark(self):
+		self.db_service.save_link_extraction("https://a.example.com/1", ["/x"])
+		# A session written without its rollups, e.g. by an older version
+		with self.db_service.get_db_session() as session:
+			session.add(ScrapingSession(url="https://b.example.com/", domain="b.example.com",
+										scraper_type="link_extraction", status="success", result_count=4))
+			session.commit()
+
+		self.assertEqual(self.db_service.refresh_rollups(), 1)
+		self.assertEqual(self.db_service.refresh_rollups(), 0)
+		domains = self.db_service.get_aggregates(["domain_totals"])["domain_totals"]
+		self.assertEqual([(d["domain"], d["results"]) for d in domains], [("a.example.com", 1), ("b.example.com", 4)])
+
+class TestUrlDictionary(DatabaseServiceTestCase):
+	def test_urls_are_deduplicated(self):
+		shared = ["https://a.example.com/x", "https://b.example.com/y"]
+		first = self.db_service.save_link_extraction("https://example.com", shared + ["/relative"])
+		second = self.db_service.save_image_extraction("https://example.com", shared)
+
+		with self.db_service.get_db_session() as session:
+			entries = {e.url: e.domain for e in session.query(UrlDictionary)}
+		self.assertEqual(entries, {
+			"https://example.com": "example.com",
+			"https://a.example.com/x": "a.example.com",
+			"https://b.example.com/y": "b.example.com",
+			"/relative": "",
+		})
+
+		links = self.db_service.get_session_data(first)["data"]["links"]
+		self.assertEqual([l["url"] for l in links], shared + ["/relative"])
+		images = self.db_service.get_session_data(second)["data"]["images"]
+		self.assertEqual([i["url"] for i in images], shared)
+
+	def test_legacy_database_is_migrated(self):
+		self.db_service.db_manager.dispose()
+		db_path = DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):]
+		os.remove(db_path)
+
+		# Schema and rows as written before URLs were normalized
+		connection = sqlite3.connect(db_path)
+		connection.executescript("""
+			CREATE TABLE scraping_sessions (id INTEGER PRIMARY KEY, url VARCHAR(2048) NOT NULL,
+				scraper_type VARCHAR(100) NOT NULL, timestamp DATETIME, status VARCHAR(50),
+				error_message TEXT, extra_data JSON);
+			CREATE TABLE extracted_links (id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL,
+				url VARCHAR(2048) NOT NULL, link_text TEXT, is_external BOOLEAN, is_valid BOOLEAN,
+				created_at DATETIME);
+			CREATE TABLE extracted_images (id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL,
+				image_url VARCHAR(2048) NOT NULL, alt_text TEXT, title TEXT, width INTEGER,
+				height INTEGER, file_size INTEGER, created_at DATETIME);
+			INSERT INTO scraping_sessions VALUES (1, 'https://example.com', 'link_extraction',
+				'2024-01-01 00:00:00', 'success', NULL, NULL);
+			INSERT INTO extracted_links VALUES (1, 1, 'https://example.com/a', NULL, 1, 1, NULL);
+			INSERT INTO extracted_links VALUES (2, 1, 'https://example.com/a', NULL, 1, 1, NULL);
+		""")
+		connection.commit()
+		connection.close()
+
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		links = self.db_service.get_session_data(1)["data"]["links"]
+		self.assertEqual([l["url"] for l in links], ["https://example.com/a"] * 2)
+		self.assertEqual(len(self.db_service.get_extraction_history(url="https://example.com")), 1)
+
+		connection = sqlite3.connect(db_path)
+		self.assertEqual(connection.execute("SELECT DISTINCT url FROM extracted_links").fetchall(), [("",)])
+		connection.close()
+
+class TestSearch(DatabaseServiceTestCase):
+	def setUp(self):
+		super().setUp()
+		self.blog_id = self.db_service.save_element_extraction("https://blog.example.com/post", "p", [
+			"Python generators keep memory flat",
+			"Generators and coroutines in Python",
+			"Unrelated paragraph about gardening",
+		])
+		self.shop_id = self.db_service.save_element_extraction("https://shop.example.com/", "h2", [
+			"Python books on sale",
+		])
+
+	def test_ranked_results(self):
+		results = self.db_service.search_elements("python generators")
+		self.assertEqual(len(results), 2)
+		self.assertTrue(all("Generators" in r["text"] or "generators" in r["text"] for r in results))
+		self.assertGreaterEqual(results[0]["score"], results[1]["score"])
+		self.assertIn("[", results[0]["snippet"])
+
+	def test_filters_and_pagination(self):
+		self.assertEqual(len(self.db_service.search_elements("python")), 3)
+		shop = self.db_service.search_elements("python", url_prefix="https://shop.")
+		self.assertEqual([r["session_id"] for r in shop], [self.shop_id])
+		self.assertEqual(self.db_service.search_elements("python", since=datetime.utcnow() + timedelta(days=1)), [])
+
+		pages = [self.db_service.search_elements("python", limit=2, offset=offset) for offset in (0, 2)]
+		self.assertEqual([len(page) for page in pages], [2, 1])
+		self.assertIsInstance(pages[0][0]["timestamp"], datetime)
+
+	def test_query_syntax_is_not_interpreted(self):
+		self.assertEqual(self.db_service.search_elements('python" OR "gardening'), [])
+		self.assertEqual(self.db_service.search_elements("   "), [])
+
+	def test_index_follows_deletes(self):
+		with self.db_service.get_db_session() as session:
+			session.execute(text("DELETE FROM extracted_elements WHERE session_id = :id"), {"id": self.shop_id})
+			session.commit()
+		self.assertEqual(len(self.db_service.search_elements("python")), 2)
+
+class TestChangeTracking(DatabaseServiceTestCase):
+	def setUp(self):
+		self.db_name = f"test_service_{uuid.uuid4().hex}.db"
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name, track_changes=True)
+		self.url = "https://example.com/news"
+
+	def _save(self, elements, selector="h2"):
+		return self.db_service.save_element_extraction(self.url, selector, elements)
+
+	def _delta_count(self):
+		with self.db_service.get_db_session() as session:
+			return session.query(SnapshotDelta).count()
+
+	def test_unchanged_page_writes_no_rows(self):
+		self._save(["a", "b", "c"])
+		stored = self._delta_count()
+		for _ in range(5):
+			session_id = self._save(["a", "b", "c"])
+		self.assertEqual(self._delta_count(), stored)
+		self.assertEqual(self.db_service.get_snapshot(session_id), ["a", "b", "c"])
+		self.assertFalse(self.db_service.get_changes(session_id)["changed"])
+
+	def test_history_is_reconstructed(self):
+		versions = [["a", "b", "c"], ["a", "c", "d"], ["x", "a", "c", "d", "d"], ["c", "a"], []]
+		ids = [self._save(items) for items in versions]
+		for session_id, items in zip(ids, versions):
+			self.assertEqual(self.db_service.get_snapshot(session_id), items)
+
+		changes = self.db_service.get_changes(ids[1])
+		self.assertEqual(changes["previous_session_id"], ids[0])
+		self.assertEqual((changes["added"], changes["removed"]), (["d"], ["b"]))
+
+		data = self.db_service.get_session_data(ids[2])["data"]["elements"]
+		self.assertEqual(data[0], {"text": "x", "css_selector": "h2", "position": 0})
+		self.assertEqual(list(self.db_service.iter_session_rows(ids[1])), self.db_service.get_session_data(ids[1])["data"]["elements"])
+		self.assertEqual(self.db_service.get_sessions_data(ids, counts_only=True)[ids[2]]["counts"], {"elements": 5})
+
+	def test_targets_are_tracked_separately(self):
+		first = self._save(["a"], selector="h1")
+		self._save(["b"], selector="h2")
+		self.assertIsNone(self.db_service.get_changes(first)["previous_session_id"])
+		link_id = self.db_service.save_link_extraction(self.url, ["/a", "https://other.example/"])
+		self.assertEqual([l["is_external"] for l in self.db_service.get_session_data(link_id)["data"]["links"]], [False, True])
+
+	def test_keyframe_interval_bounds_chains(self):
+		from database.repository import ChangeTrackingRepository
+		ids = [self._save([str(i), "stable"]) for i in range(60)]
+		with self.db_service.get_db_session() as session:
+			snapshots = ChangeTrackingRepository(session).find_by_sessions(ids)
+			self.assertLess(max(s.chain_length for s in snapshots.values()), 50)
+			self.assertIsNone(snapshots[ids[50]].parent_session_id)
+		self.assertEqual(self.db_service.get_snapshot(ids[55]), ["55", "stable"])
+		self.assertEqual(self.db_service.get_changes(ids[50])["removed"], ["49"])
+
+	def test_materialize_detaches_from_parents(self):
+		from database.repository import ChangeTrackingRepository
+		first = self._save(["a", "b"])
+		second = self._save(["b", "c"])
+		with self.db_service.get_db_session() as session:
+			ChangeTrackingRepository(session).materialize(second)
+			session.query(SnapshotDelta).filter(SnapshotDelta.session_id == first).delete()
+			session.commit()
+		self.assertEqual(self.db_service.get_snapshot(second), ["b", "c"])
+
+	def test_missing_parent_is_reported(self):
+		first = self._save(["a", "b"])
+		second = self._save(["b", "c"])
+		with self.db_service.get_db_session() as session:
+			session.execute(text("DELETE FROM session_snapshots WHERE session_id = :id"), {"id": first})
+			session.commit()
+		with self.assertRaisesRegex(ValueError, f"session {first}, which has no snapshot"):
+			self.db_service.get_snapshot(second)
+
+	def test_untracked_sessions_are_unaffected(self):
+		plain = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		plain_id = plain.save_element_extraction(self.url, "h2", ["a"])
+		self.assertIsNone(self.db_service.get_snapshot(plain_id))
+		self.assertEqual(self.db_service.get_session_data(plain_id)["data"]["elements"][0]["text"], "a")
+		plain.db_manager.dispose()
+
+class TestEntityIndex(DatabaseServiceTestCase):
+	def test_entities_are_deduplicated_with_counts(self):
+		first = self.db_service.save_email_extraction("https://a.example.com/1", ["info@example.com", "Info@Example.com"])
+		second = self.db_service.save_email_extraction("https://b.example.org/", ["info@example.com", "sales@other.net"])
+
+		emails = self.db_service.get_unique_emails()
+		self.assertEqual([e["value"] for e in emails], ["info@example.com", "sales@other.net"])
+		self.assertEqual(emails[0]["occurrence_count"], 3)
+		self.assertLessEqual(emails[0]["first_seen"], emails[0]["last_seen"])
+		self.assertEqual(self.db_service.get_entity_sessions("email", "INFO@example.com"), [first, second])
+
+		self.assertEqual([e["value"] for e in self.db_service.get_unique_emails(domain="other.net")], ["sales@other.net"])
+		self.assertEqual([e["value"] for e in self.db_service.get_unique_emails(site="a.example.com")], ["info@example.com"])
+		self.assertEqual(self.db_service.count_unique_entities("email", site="b.example.org"), 2)
+		self.assertEqual(len(self.db_service.get_unique_emails(limit=1, offset=1)), 1)
+
+	def test_images_and_tracked_sessions_are_indexed(self):
+		self.db_service.save_image_extraction("https://example.com", ["https://cdn.example.com/a.png"] * 2)
+		tracked = DatabaseService(db_type="sqlite", db_name=self.db_name, track_changes=True)
+		tracked.save_image_extraction("https://example.com/2", ["https://cdn.example.com/a.png", "/b.png"])
+		tracked.db_manager.dispose()
+
+		images = {i["value"]: i for i in self.db_service.get_unique_images()}
+		self.assertEqual(images["https://cdn.example.com/a.png"]["occurrence_count"], 3)
+		self.assertEqual(images["https://cdn.example.com/a.png"]["domain"], "cdn.example.com")
+		self.assertEqual(self.db_service.count_unique_entities("image"), 2)
+
+	def test_existing_rows_are_backfilled(self):
+		session_id = self.db_service.save_email_extraction("https://example.com", ["a@example.com", "a@example.com"])
+		self.db_service.save_image_extraction("https://example.com", ["https://example.com/i.png"])
+		with self.db_service.get_db_session() as session:
+			session.execute(text("DELETE FROM entity_sightings"))
+			session.execute(text("DELETE FROM entity_index"))
+			session.execute(text("DELETE FROM schema_version WHERE version >= 4"))
+			session.commit()
+		self.db_service.db_manager.dispose()
+
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		self.assertEqual([(e["value"], e["occurrence_count"]) for e in self.db_service.get_unique_emails()],
+						[("a@example.com", 2)])
+		self.assertEqual(self.db_service.get_entity_sessions("email", "a@example.com"), [session_id])
+		self.assertEqual(self.db_service.count_unique_entities("image"), 1)
+
+
+try:
+	import pyarrow.dataset as pa_dataset
+except ImportError:
+	pa_dataset = None
+
+@unittest.skipIf(pa_dataset is None, "pyarrow not installed")
+class TestParquetArchive(DatabaseServiceTestCase):
+	def setUp(self):
+		super().setUp()
+		self.output_dir = tempfile.mkdtemp()
+		self.old_id = self.db_service.save_link_extraction("https://example.com", ["/a", "/b"])
+		self.old_failed_id = self.db_service.save_failed_extraction("https://example.com", "link_extraction", "boom")
+		self.new_id = self.db_service.save_element_extraction("https://example.com", "p", ["x"])
+
+		with self.db_service.get_db_session() as session:
+			session.query(ScrapingSession).filter(ScrapingSession.id.in_([self.old_id, self.old_failed_id])).update(
+				{ScrapingSession.timestamp: datetime(2024, 1, 15, 12, 0)}, synchronize_session=False)
+			session.commit()
+
+	def tearDown(self):
+		shutil.rmtree(self.output_dir)
+		super().tearDown()
+
+	def _read(self, table):
+		path = os.path.join(self.output_dir, table)
+		return pa_dataset.dataset(path, format="parquet", partitioning="hive").to_table().to_pylist()
+
+	def test_export_is_partitioned_by_date_and_type(self):
+		self.db_service.export_to_parquet(self.output_dir)
+		links = self._read("extracted_links")
+		self.assertEqual(sorted(l["url"] for l in links), ["/a", "/b"])
+		self.assertEqual({(str(l["date"]), l["scraper_type"]) for l in links}, {("2024-01-15", "link_extraction")})
+		self.assertEqual(len(self._read("scraping_sessions")), 3)
+
+	def test_archive_moves_old_sessions_out(self):
+		# Seed the counters first, so archiving has to decrement them
+		stats = self.db_service.get_statistics()
+		self.assertEqual((stats["total_sessions"], stats["successful_sessions"], stats["failed_sessions"]), (3, 2, 1))
+
+		deleted = self.db_service.archive_sessions(datetime(2024, 2, 1), self.output_dir)
+		self.assertEqual(deleted["scraping_sessions"], 2)
+		self.assertEqual(deleted["extracted_links"], 2)
+
+		self.assertEqual([h["id"] for h in self.db_service.iter_extraction_history()], [self.new_id])
+		stats = self.db_service.get_statistics()
+		self.assertEqual((stats["total_sessions"], stats["successful_sessions"], stats["failed_sessions"],
+						stats["total_links"], stats["total_elements"]), (1, 1, 0, 0, 1))
+		self.assertEqual(stats, self.db_service.rebuild_statistics())
+		self.assertEqual(sorted(s["id"] for s in self._read("scraping_sessions")), [self.old_id, self.old_failed_id])
+
+	def test_archive_keeps_tracked_items_and_detaches_chains_across_batches(self):
+		from database.archive import ParquetExporter
+		tracked = DatabaseService(db_type="sqlite", db_name=self.db_name, track_changes=True)
+		url = "https://example.com/news"
+		first = tracked.save_element_extraction(url, "h2", ["a", "b"])
+		second = tracked.save_element_extraction(url, "h2", ["b", "c"])
+		third = tracked.save_element_extraction(url, "h2", ["c", "d"])
+		tracked.db_manager.dispose()
+
+		with self.db_service.get_db_session() as session:
+			session.query(ScrapingSession).filter(ScrapingSession.id.in_([first, second])).update(
+				{ScrapingSession.timestamp: datetime(2024, 1, 15, 12, 0)}, synchronize_session=False)
+			session.commit()
+
+		# One session per batch, so the chain's keyframe is deleted before its delta
+		ParquetExporter(self.db_service, self.output_dir, chunk_size=1).archive(datetime(2024, 2, 1))
+		self.assertEqual(self.db_service.get_snapshot(third), ["c", "d"])
+		self.assertIsNone(self.db_service.get_snapshot(second))
+
+		items = {}
+		for row in sorted(self._read("snapshot_items"), key=lambda row: (row["session_id"], row["position"])):
+			items.setdefault(row["session_id"], []).append(row["item"])
+		self.assertEqual(items, {first: ["a", "b"], second: ["b", "c"]})
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from visualization.downsampling import downsample, lttb, min_max_buckets
+
+class TestDownsampling(unittest.TestCase):
+	def setUp(self):
+		self.dates = pd.date_range("2020-01-01", periods=5000, freq="D").date
+		values = np.sin(np.arange(5000) / 50.0)
+		values[1234] = 10.0
+		self.series = pd.Series(values, index=self.dates)
+
+	def test_lttb_keeps_endpoints_and_peaks(self):
+		indices = lttb(self.series.index, self.series.to_numpy(), 100)
+		self.assertEqual(len(indices), 100)
+		self.assertEqual((indices[0], indices[-1]), (0, 4999))
+		self.assertIn(1234, indices)
+		self.assertTrue(np.all(np.diff(indices) > 0))
+
+	def test_min_max_keeps_extremes(self):
+		values = np.arange(1000, dtype=float)
+		values[500] = -1.0
+		indices = min_max_buckets(values, 10)
+		self.assertLessEqual(len(indices), 22)
+		self.assertIn(500, indices)
+		self.assertIn(999, indices)
+
+	def test_downsample(self):
+		self.assertEqual(len(downsample(self.series.iloc[:50], 100)), 50)
+		self.assertEqual(len(downsample(self.series, 100)), 100)
+
+		frame = pd.DataFrame({"a": self.series, "b": self.series.abs()})
+		reduced = downsample(frame, 100)
+		self.assertLessEqual(len(reduced), 100)
+		self.assertEqual(list(reduced.columns), ["a", "b"])
+		self.assertEqual(reduced.index[0], self.dates[0])
+
+		single = downsample(frame[["a"]], 100)
+		self.assertIsInstance(single, pd.DataFrame)
+		self.assertEqual(len(single), 100)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import glob
+import unittest
+import uuid
+from unittest import mock
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from database.config import DatabaseConfig
+from database.metrics import LatencyHistogram
+from database.service import DatabaseService
+
+class TestLatencyHistogram(unittest.TestCase):
+	def test_buckets_and_percentiles(self):
+		histogram = LatencyHistogram(buckets=(1, 10, 100))
+		for elapsed_ms in (0.5, 0.7, 5, 50, 500):
+			histogram.observe(elapsed_ms)
+
+		snapshot = histogram.snapshot()
+		self.assertEqual(snapshot["buckets"], {"<=1ms": 2, "<=10ms": 1, "<=100ms": 1, ">100ms": 1})
+		self.assertEqual(snapshot["count"], 5)
+		self.assertEqual(snapshot["max_ms"], 500)
+		self.assertEqual(snapshot["p50_ms"], 10)
+		self.assertEqual(snapshot["p99_ms"], 500)
+
+	def test_empty(self):
+		self.assertEqual(LatencyHistogram().snapshot()["p95_ms"], 0.0)
+
+class TestServiceMetrics(unittest.TestCase):
+	def _service(self, **environment):
+		self.db_name = f"test_metrics_{uuid.uuid4().hex}.db"
+		with mock.patch.dict(os.environ, environment):
+			self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		self.addCleanup(self._cleanup)
+		return self.db_service
+
+	def _cleanup(self):
+		self.db_service.db_manager.dispose()
+		for path in glob.glob(DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):] + "*"):
+			os.remove(path)
+
+	def test_statement_latency_and_checkouts(self):
+		db_service = self._service()
+		db_service.metrics(reset=True)
+		session_id = db_service.save_link_extraction("https://example.com", ["/a", "/b"])
+		db_service.get_session_data(session_id)
+
+		metrics = db_service.metrics()
+		primary, read = metrics["primary"], metrics["read"]
+		self.assertGreater(primary["statements"]["INSERT"]["count"], 0)
+		self.assertNotIn("INSERT", read["statements"])
+		self.assertGreater(read["statements"]["SELECT"]["count"], 0)
+		self.assertGreater(primary["pool"]["checkouts"], 0)
+		self.assertEqual(primary["pool"]["checked_out"], 0)
+		self.assertEqual(primary["slow_queries"], [])
+
+		db_service.metrics(reset=True)
+		self.assertEqual(db_service.metrics()["primary"]["statements"], {})
+
+	def test_slow_queries_are_logged(self):
+		db_service = self._service(DB_SLOW_QUERY_MS="0")
+		with self.assertLogs("database.metrics", level="WARNING") as logs:
+			db_service.save_email_extraction("https://example.com", ["a@example.com"])
+		self.assertTrue(any("Slow query" in line for line in logs.output))
+		slow = db_service.metrics()["primary"]["slow_queries"]
+		self.assertTrue(any(q["statement"].startswith("INSERT") for q in slow))
+
+	def test_pool_sizing_from_environment(self):
+		db_service = self._service(DB_POOL_SIZE="2", DB_MAX_OVERFLOW="1", DB_POOL_TIMEOUT="0.1")
+		engine = db_service.db_manager.engine
+
+		connections = [engine.connect() for _ in range(3)]
+		try:
+			pool = db_service.metrics()["primary"]["pool"]
+			self.assertEqual((pool["size"], pool["max_overflow"], pool["checked_out"]), (2, 1, 3))
+			self.assertEqual(pool["saturation"], 1.0)
+			with self.assertRaises(PoolTimeoutError):
+				engine.connect()
+		finally:
+			for connection in connections:
+				connection.close()
+
+		pool = db_service.metrics()["primary"]["pool"]
+		self.assertEqual(pool["checkout_timeouts"], 1)
+		self.assertEqual(pool["peak_saturation"], 1.0)
+		self.assertGreaterEqual(pool["checkout_wait"]["max_ms"], 100)
+
+if __name__ == "__main__":
+	unittest.main()
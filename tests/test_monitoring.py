@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import queue
+import unittest
+from urllib.request import urlopen
+
+from monitoring.metrics import CrawlMetrics
+from monitoring.server import MetricsServer
+from scraper.base_scraper import BaseScraper
+
+class FakeScraper(BaseScraper):
+	def scrape(self, url):
+		if "fail" in url:
+			raise ValueError("boom")
+		return ["item"]
+
+	def _save_to_database(self, url, data, duration_ms=None, **kwargs):
+		raise NotImplementedError
+
+class TestCrawlMetrics(unittest.TestCase):
+	def test_scrapes_are_counted_per_host(self):
+		metrics = CrawlMetrics()
+		scraper = FakeScraper(metrics=metrics)
+		scraper.scrape_and_save("https://a.example/1")
+		scraper.scrape_and_save("https://a.example/fail")
+		scraper.scrape_and_save("https://b.example/1")
+		writer_queue = queue.Queue()
+		writer_queue.put("row")
+		metrics.watch_queue("db_writer", writer_queue)
+
+		snapshot = metrics.snapshot()
+		self.assertEqual((snapshot["in_flight"], snapshot["completed"], snapshot["failed"]), (0, 3, 1))
+		self.assertEqual(snapshot["hosts"]["a.example"]["error_rate"], 0.5)
+		self.assertEqual(snapshot["hosts"]["b.example"]["latency"]["count"], 1)
+		self.assertGreater(snapshot["throughput_per_s"], 0)
+		self.assertEqual(snapshot["queues"], {"db_writer": 1})
+
+class TestMetricsServer(unittest.TestCase):
+	def setUp(self):
+		self.metrics = CrawlMetrics()
+		self.server = MetricsServer(self.metrics, port=0, interval=0.05).start()
+		self.addCleanup(self.server.stop)
+
+	def test_metrics_and_events(self):
+		started = self.metrics.request_started("https://a.example/")
+		with urlopen(self.server.url + "metrics") as response:
+			self.assertEqual(json.load(response)["in_flight"], 1)
+
+		self.metrics.request_finished("https://a.example/", started, success=True)
+		with urlopen(self.server.url + "events") as response:
+			self.assertEqual(response.headers["Content-Type"], "text/event-stream")
+			lines = [response.readline() for _ in range(4)]
+		self.assertEqual(lines[0], b"retry: 50\n")
+		event = json.loads(lines[2][len(b"data: "):])
+		self.assertEqual(event["completed"], 1)
+
+		with urlopen(self.server.url) as response:
+			self.assertIn(b"EventSource('/events')", response.read())
+
+if __name__ == "__main__":
+	unittest.main()
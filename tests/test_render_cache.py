@@ -0,0 +1,127 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import glob
+import gzip
+import shutil
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+import pandas as pd
+
+from database.config import DatabaseConfig
+from database.service import DatabaseService
+from visualization.render_cache import RenderCache
+
+class TestRenderCache(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.cache = RenderCache(os.path.join(self.directory, "cache"), max_bytes=250)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def _render(self, name: str, size: int) -> str:
+		path = os.path.join(self.directory, name)
+		with open(path, "wb") as f:
+			f.write(b"x" * size)
+		return path
+
+	def test_restores_missing_outputs(self):
+		path = self._render("chart.png", 100)
+		self.cache.put("k1", path, [path])
+		os.remove(path)
+
+		self.assertEqual(self.cache.get("k1"), path)
+		self.assertEqual(os.path.getsize(path), 100)
+		self.assertIsNone(self.cache.get("other"))
+
+	def test_evicts_least_recently_used(self):
+		for index in range(3):
+			path = self._render(f"chart{index}.png", 100)
+			self.cache.put(f"k{index}", {"Chart": path}, [path])
+			# k0 stays in use, so k1 is the oldest when k2 exceeds the bound
+			self.cache.get("k0")
+
+		self.assertIsNone(self.cache.get("k1"))
+		self.assertIsNotNone(self.cache.get("k0"))
+		self.assertLessEqual(self.cache.size(), 250)
+
+		self.cache.clear()
+		self.assertIsNone(self.cache.get("k0"))
+
+class TestVisualizerCache(unittest.TestCase):
+	def setUp(self):
+		from visualization import DataVisualizer
+
+		self.db_name = f"test_render_{uuid.uuid4().hex}.db"
+		self.db_service = DatabaseService(db_type="sqlite", db_name=self.db_name)
+		self.output_dir = tempfile.mkdtemp()
+		self.visualizer = DataVisualizer(self.db_service, output_dir=self.output_dir, dpi=20)
+		self.db_service.save_link_extraction("https://example.com", ["/a"])
+
+	def tearDown(self):
+		self.db_service.db_manager.dispose()
+		shutil.rmtree(self.output_dir)
+		for path in glob.glob(DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):] + "*"):
+			os.remove(path)
+
+	def test_unchanged_data_is_served_from_cache(self):
+		first = self.visualizer.create_extraction_timeline()
+		with mock.patch.object(self.visualizer, "get_aggregates") as get_aggregates:
+			self.assertEqual(self.visualizer.create_extraction_timeline(), first)
+			get_aggregates.assert_not_called()
+
+			# Explicit invalidation renders again
+			get_aggregates.return_value = {"daily_counts": pd.DataFrame()}
+			self.visualizer.clear_render_cache()
+			self.assertIsNone(self.visualizer.create_extraction_timeline())
+
+		# New sessions move the watermark
+		self.db_service.save_link_extraction("https://example.com/2", ["/b"])
+		with mock.patch.object(self.visualizer, "get_aggregates", wraps=self.visualizer.get_aggregates) as get_aggregates:
+			self.assertEqual(self.visualizer.create_extraction_timeline(), first)
+			get_aggregates.assert_called_once()
+
+	def test_rollup_rebuild_invalidates_charts(self):
+		self.visualizer.create_extraction_timeline()
+		self.db_service.rebuild_rollups()
+		with mock.patch.object(self.visualizer, "get_aggregates", wraps=self.visualizer.get_aggregates) as get_aggregates:
+			self.visualizer.create_extraction_timeline()
+			get_aggregates.assert_called_once()
+
+	def test_generate_all_renders_in_worker_processes(self):
+		visualizations = self.visualizer.generate_all_visualizations(max_workers=2)
+		self.assertIn("Extraction Timeline", visualizations)
+		self.assertTrue(all(os.path.exists(path) for path in visualizations.values()))
+		self.assertEqual(set(self.visualizer.render_timings), {
+			"scraping_dashboard", "extraction_timeline", "domain_analysis", "data_volume_charts", "success_rate_analysis"
+		})
+
+		with mock.patch.object(self.visualizer, "get_aggregates") as get_aggregates:
+			self.assertEqual(self.visualizer.generate_all_visualizations(max_workers=2), visualizations)
+			get_aggregates.assert_not_called()
+		self.assertEqual(set(self.visualizer.render_timings.values()), {0.0})
+
+	def test_dashboard_bundle_shares_plotly(self):
+		bundle = self.visualizer.create_dashboard_bundle()
+		with open(bundle, encoding="utf-8") as f:
+			page = f.read()
+		self.assertIn('src="plotly.min.js"', page)
+		self.assertIn('data-src="scraping_report.html"', page)
+		self.assertIn('data-src="extraction_timeline.png"', page)
+
+		# Standalone charts reference the one shared copy of plotly.js instead of embedding it
+		plotly_size = os.path.getsize(os.path.join(self.output_dir, "plotly.min.js"))
+		dashboard = os.path.join(self.output_dir, "scraping_dashboard.html")
+		self.assertLess(os.path.getsize(dashboard) * 100, plotly_size)
+
+		data = os.path.join(self.output_dir, "dashboard_data", "scraping_dashboard.js")
+		with open(data, encoding="utf-8") as f, gzip.open(data + ".gz", "rt", encoding="utf-8") as gz:
+			self.assertEqual(f.read(), gz.read())
+
+if __name__ == "__main__":
+	unittest.main()
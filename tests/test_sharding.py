@@ -0,0 +1,139 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import glob
+import shutil
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+from sqlalchemy import text
+
+from database.config import DatabaseConfig
+from database.models import ScrapingSession
+from database.sharding import ShardedDatabaseService
+
+try:
+	import pyarrow.dataset as pa_dataset
+except ImportError:
+	pa_dataset = None
+
+class TestShardedService(unittest.TestCase):
+	def setUp(self):
+		self.db_name = f"test_shards_{uuid.uuid4().hex}.db"
+		self.db_service = ShardedDatabaseService(shards=3, db_name=self.db_name)
+
+		# One domain per shard, plus a second domain sharing a shard
+		self.domains = {}
+		for index in range(1000):
+			url = f"https://site{index}.example.com/page"
+			self.domains.setdefault(self.db_service.shard_index(url), url)
+			if len(self.domains) == 3:
+				break
+
+	def tearDown(self):
+		self.db_service.close()
+		prefix = DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):-len(".db")]
+		for path in glob.glob(prefix + ".shard*"):
+			os.remove(path)
+
+	def test_sessions_of_a_domain_share_a_shard(self):
+		url = self.domains[0]
+		self.assertEqual(self.db_service.shard_index(url), self.db_service.shard_index(url + "/other?q=1"))
+		session_id = self.db_service.save_link_extraction(url, ["/a"])
+		self.assertEqual(self.db_service.local_id(session_id)[0], 0)
+
+	def test_global_ids_round_trip(self):
+		ids = {shard: self.db_service.save_element_extraction(url, "p", [f"text {shard}"])
+			for shard, url in self.domains.items()}
+		self.assertEqual(len(set(ids.values())), 3)
+		for shard, session_id in ids.items():
+			data = self.db_service.get_session_data(session_id)
+			self.assertEqual(data["session"]["id"], session_id)
+			self.assertEqual(data["session"]["url"], self.domains[shard])
+			self.assertEqual(data["data"]["elements"][0]["text"], f"text {shard}")
+			self.assertEqual(list(self.db_service.iter_session_rows(session_id))[0]["text"], f"text {shard}")
+
+		batched = self.db_service.get_sessions_data(list(ids.values())[::-1])
+		self.assertEqual(list(batched), list(ids.values())[::-1])
+
+	def test_history_is_merged_newest_first(self):
+		saved = [self.db_service.save_link_extraction(self.domains[i % 3], [f"/{i}"]) for i in range(9)]
+		history = list(self.db_service.iter_extraction_history(batch_size=2))
+		self.assertEqual([h["id"] for h in history], saved[::-1])
+		self.assertEqual([h["id"] for h in self.db_service.get_extraction_history(limit=4)], saved[::-1][:4])
+		self.assertEqual([h["id"] for h in self.db_service.get_extraction_history(url=self.domains[1])],
+						saved[1::3][::-1])
+
+	def test_statistics_and_search_are_merged(self):
+		for shard, url in self.domains.items():
+			self.db_service.save_element_extraction(url, "p", ["sharded storage", "other text"])
+		self.db_service.save_failed_extraction(self.domains[0], "link_extraction", "boom")
+
+		stats = self.db_service.get_statistics()
+		self.assertEqual((stats["total_sessions"], stats["failed_sessions"], stats["total_elements"]), (4, 1, 6))
+		self.assertEqual(self.db_service.get_data_watermark()["session_count"], 4)
+		self.assertEqual(stats, self.db_service.rebuild_statistics())
+
+		results = self.db_service.search_elements("sharded")
+		self.assertEqual({r["shard"] for r in results}, {0, 1, 2})
+		self.assertEqual(len(self.db_service.search_elements("sharded", limit=2, offset=2)), 1)
+		self.assertTrue(all(self.db_service.get_session_data(r["session_id"]) for r in results))
+
+	def test_top_errors_are_limited_after_merging(self):
+		# Each shard has five errors twice and "timeout" once, so it is sixth on every shard
+		for shard, url in self.domains.items():
+			for error in [f"shard{shard} error{n}" for n in range(5)] * 2 + ["timeout"]:
+				self.db_service.save_failed_extraction(url, "link_extraction", error)
+
+		top_errors = self.db_service.get_aggregates(["top_errors"])["top_errors"]
+		self.assertEqual(len(top_errors), 5)
+		self.assertEqual(top_errors[0], {"error_message": "timeout", "sessions": 3})
+
+	def test_unique_entities_are_merged(self):
+		for shard, url in self.domains.items():
+			self.db_service.save_email_extraction(url, ["shared@example.com", f"only{shard}@example.com"])
+
+		emails = self.db_service.get_unique_emails()
+		self.assertEqual([e["value"] for e in emails], ["only0@example.com", "only1@example.com",
+														"only2@example.com", "shared@example.com"])
+		self.assertEqual(emails[-1]["occurrence_count"], 3)
+		self.assertEqual([e["value"] for e in self.db_service.get_unique_emails(limit=2, offset=2)],
+						["only2@example.com", "shared@example.com"])
+		self.assertEqual(len(self.db_service.get_entity_sessions("email", "shared@example.com")), 3)
+
+	@unittest.skipIf(pa_dataset is None, "pyarrow not installed")
+	def test_archive_fans_out_to_every_shard(self):
+		ids = {shard: self.db_service.save_link_extraction(url, ["/a", "/b"]) for shard, url in self.domains.items()}
+		for shard in (0, 1):
+			with self.db_service.shards[shard].get_db_session() as session:
+				session.query(ScrapingSession).update({ScrapingSession.timestamp: datetime(2024, 1, 15, 12, 0)})
+				session.commit()
+
+		output_dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, output_dir)
+		deleted = self.db_service.archive_sessions(datetime(2024, 2, 1), output_dir)
+		self.assertEqual((deleted["scraping_sessions"], deleted["extracted_links"]), (2, 4))
+		self.assertEqual([h["id"] for h in self.db_service.get_extraction_history()], [ids[2]])
+		self.assertEqual(self.db_service.get_statistics()["total_sessions"], 1)
+
+		# Shard-local IDs are only unique together with their shard partition
+		sessions = pa_dataset.dataset(os.path.join(output_dir, "scraping_sessions"), format="parquet",
+									partitioning="hive").to_table().to_pylist()
+		self.assertEqual(sorted(self.db_service.global_id(s["shard"], s["id"]) for s in sessions),
+						sorted([ids[0], ids[1]]))
+
+	def test_shards_write_independently(self):
+		# Hold the write lock of shard 0; a write to shard 1 must not wait for it
+		blocker = self.db_service.shards[0].db_manager.engine.connect()
+		try:
+			blocker.execute(text("BEGIN IMMEDIATE"))
+			session_id = self.db_service.save_link_extraction(self.domains[1], ["/free"])
+			self.assertEqual(self.db_service.local_id(session_id)[0], 1)
+		finally:
+			blocker.execute(text("ROLLBACK"))
+			blocker.close()
+
+if __name__ == "__main__":
+	unittest.main()
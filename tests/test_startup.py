@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import glob
+import json
+import subprocess
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+from database.config import DatabaseConfig
+from database.models import Base
+from database.service import DatabaseService
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Wall-clock budget for importing the CLI and opening an existing database; timing
+# depends on the machine, so the budget is only checked when this is set
+STARTUP_BUDGET_SECONDS = os.getenv("STARTUP_BUDGET_SECONDS")
+
+# Modules that must only be imported when visualizations are requested
+HEAVY_MODULES = ["pandas", "matplotlib", "seaborn", "plotly", "numpy"]
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import cli.cli
+imported = time.perf_counter()
+from database.service import DatabaseService
+DatabaseService(db_type="sqlite", db_name="startup_benchmark.db")
+ready = time.perf_counter()
+print(json.dumps({
+	"import": imported - start,
+	"service": ready - imported,
+	"modules": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+def measure_startup(cwd: str) -> dict:
+	"""Run the startup script in a fresh interpreter and return its timings"""
+	env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+	output = subprocess.run(
+		[sys.executable, "-c", STARTUP_SCRIPT], cwd=cwd, env=env,
+		capture_output=True, text=True, check=True
+	).stdout
+	return json.loads(output.strip().splitlines()[-1])
+
+class TestStartup(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.workdir = tempfile.TemporaryDirectory()
+		cls.first_run = measure_startup(cls.workdir.name)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.workdir.cleanup()
+
+	def test_visualization_stack_is_not_imported(self):
+		self.assertEqual(self.first_run["modules"], [])
+
+	@unittest.skipUnless(STARTUP_BUDGET_SECONDS, "set STARTUP_BUDGET_SECONDS to check startup time")
+	def test_startup_within_budget(self):
+		budget = float(STARTUP_BUDGET_SECONDS)
+		# The first run in setUpClass created the schema, so these measure a warm start
+		best = min(run["import"] + run["service"] for run in [measure_startup(self.workdir.name) for _ in range(3)])
+		self.assertLess(best, budget, f"CLI startup took {best:.2f}s (budget {budget}s)")
+
+class TestSchemaCache(unittest.TestCase):
+	def setUp(self):
+		self.db_name = f"test_startup_{uuid.uuid4().hex}.db"
+
+	def tearDown(self):
+		db_path = DatabaseConfig.get_sqlite_url(self.db_name)[len("sqlite:///"):]
+		for path in glob.glob(db_path + "*"):
+			os.remove(path)
+
+	def _open(self):
+		with mock.patch.object(Base.metadata, "create_all", wraps=Base.metadata.create_all) as create_all:
+			DatabaseService(db_type="sqlite", db_name=self.db_name).db_manager.dispose()
+		return create_all.call_count
+
+	def test_existing_schema_skips_create_all(self):
+		self.assertGreater(self._open(), 0)
+		self.assertEqual(self._open(), 0)
+
+if __name__ == "__main__":
+	unittest.main()
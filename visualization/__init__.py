@@ -5,6 +5,11 @@ Provides comprehensive charts, graphs, and analytics for extracted data
 
 import os
 import json
+import time
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -14,38 +19,424 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
-from urllib.parse import urlparse
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .bundle import write_dashboard_bundle, write_figure_data, write_figure_html
+from .downsampling import downsample, DEFAULT_MAX_POINTS
+from .render_cache import RenderCache, DEFAULT_MAX_BYTES
+
+def apply_chart_style():
+	"""Matplotlib and seaborn styling shared by all charts"""
+	try:
+		plt.style.use('seaborn-v0_8')
+	except:
+		# Fallback to default style if seaborn style not available
+		plt.style.use('default')
+	sns.set_palette("husl")
+
+def render_overview_dashboard(aggregates: Dict[str, pd.DataFrame], output_dir: str, dpi: int, max_points: int) -> Optional[str]:
+	"""Create comprehensive dashboard with multiple charts"""
+	if aggregates["type_totals"].empty:
+		print("No data available for visualization")
+		return None
+
+	try:
+		return write_figure_html(overview_figure(aggregates, max_points),
+								os.path.join(output_dir, "scraping_dashboard.html"))
+	except Exception as e:
+		print(f"Error creating dashboard: {e}")
+		return None
+
+def overview_figure(aggregates: Dict[str, pd.DataFrame], max_points: int) -> go.Figure:
+	"""Figure of the overview dashboard"""
+	type_totals = aggregates["type_totals"]
+	# Create subplots
+	fig = make_subplots(
+		rows=2, cols=2,
+		subplot_titles=(
+			'Extractions by Type',
+			'Success Rate by Domain',
+			'Daily Extraction Volume',
+			'Hourly Activity Pattern'
+		),
+		specs=[[{"type": "pie"}, {"type": "bar"}],
+			[{"type": "scatter"}, {"type": "bar"}]]
+	)
+
+	# 1. Extraction types pie chart
+	fig.add_trace(
+		go.Pie(labels=type_totals['scraper_type'], values=type_totals['sessions'], name="Types"),
+		row=1, col=1
+	)
+
+	# 2. Success rate by domain (domains arrive busiest first)
+	domain_success = aggregates['domain_totals'].head(10).set_index('domain')
+	domain_success['success_rate'] = (domain_success['successful'] / domain_success['sessions'] * 100).round(1)
+
+	if not domain_success.empty:
+		fig.add_trace(
+			go.Bar(
+				x=domain_success.index,
+				y=domain_success['success_rate'],
+				name="Success Rate %"
+			),
+			row=1, col=2
+		)
+
+	# 3. Daily extraction volume
+	daily_counts = downsample(aggregates['daily_counts'].groupby('date')['sessions'].sum(), max_points)
+	fig.add_trace(
+		go.Scatter(
+			x=daily_counts.index,
+			y=daily_counts.values,
+			mode='lines+markers',
+			name="Daily Volume"
+		),
+		row=2, col=1
+	)
+
+	# 4. Hourly activity pattern
+	hourly_counts = aggregates['activity_by_hour'].groupby('hour')['sessions'].sum()
+	fig.add_trace(
+		go.Bar(
+			x=hourly_counts.index,
+			y=hourly_counts.values,
+			name="Hourly Activity"
+		),
+		row=2, col=2
+	)
+
+	fig.update_layout(
+		title_text="Web Scraping Analytics Dashboard",
+		showlegend=False,
+		height=800
+	)
+	return fig
+
+def render_extraction_timeline(aggregates: Dict[str, pd.DataFrame], output_dir: str, dpi: int, max_points: int) -> Optional[str]:
+	"""Create timeline chart of extractions"""
+	daily_counts = aggregates["daily_counts"]
+	if daily_counts.empty:
+		return None
+
+	plt.figure(figsize=(15, 8))
+
+	# Sessions per date and extraction type
+	timeline_data = daily_counts.pivot_table(
+		index='date', columns='scraper_type', values='sessions', aggfunc='sum', fill_value=0
+	)
+	timeline_data = downsample(timeline_data, max_points)
+
+	# Create stacked area chart
+	timeline_data.plot(kind='area', stacked=True, alpha=0.7, figsize=(15, 8))
+
+	plt.title('Extraction Timeline by Type', fontsize=16, fontweight='bold')
+	plt.xlabel('Date', fontsize=12)
+	plt.ylabel('Number of Extractions', fontsize=12)
+	plt.legend(title='Extraction Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+	plt.xticks(rotation=45)
+	plt.tight_layout()
+
+	output_file = os.path.join(output_dir, "extraction_timeline.png")
+	plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+	plt.close()
+	return output_file
+
+def render_domain_analysis(aggregates: Dict[str, pd.DataFrame], output_dir: str, dpi: int, max_points: int) -> Optional[str]:
+	"""Create domain analysis with interactive chart"""
+	if aggregates["domain_totals"].empty:
+		return None
+	return write_figure_html(domain_figure(aggregates), os.path.join(output_dir, "domain_analysis.html"))
+
+def domain_figure(aggregates: Dict[str, pd.DataFrame]) -> go.Figure:
+	"""Figure of the domain analysis"""
+	domain_totals = aggregates["domain_totals"]
+	# Analyze domains (busiest first)
+	domain_stats = domain_totals.head(15).set_index('domain')
+	domain_stats = pd.DataFrame({
+		'total_requests': domain_stats['sessions'],
+		'total_results': domain_stats['results'],
+		'success_rate': (domain_stats['successful'] / domain_stats['sessions']).round(3)
+	})
+
+	# Create interactive chart
+	fig = go.Figure()
+
+	# Add bar chart for total requests
+	fig.add_trace(go.Bar(
+		name='Total Requests',
+		x=domain_stats.index,
+		y=domain_stats['total_requests'],
+		yaxis='y',
+		offsetgroup=1
+	))
+
+	# Add line chart for success rate
+	fig.add_trace(go.Scatter(
+		name='Success Rate',
+		x=domain_stats.index,
+		y=domain_stats['success_rate'] * 100,
+		yaxis='y2',
+		mode='lines+markers',
+		line=dict(color='red', width=3)
+	))
+
+	fig.update_layout(
+		title='Domain Analysis: Requests vs Success Rate',
+		xaxis=dict(title='Domain', tickangle=45),
+		yaxis=dict(title='Total Requests', side='left'),
+		yaxis2=dict(title='Success Rate (%)', side='right', overlaying='y'),
+		hovermode='x unified',
+		height=600
+	)
+	return fig
+
+def render_data_volume_charts(aggregates: Dict[str, pd.DataFrame], output_dir: str, dpi: int, max_points: int) -> Dict[str, str]:
+	"""Create various data volume visualization charts"""
+	type_totals = aggregates["type_totals"]
+	if type_totals.empty:
+		return {}
+
+	charts = {}
+	type_totals = type_totals.set_index('scraper_type')
+
+	# 1. Results per extraction type
+	plt.figure(figsize=(12, 6))
+	type_results = type_totals['results'].sort_values(ascending=False)
+
+	plt.subplot(1, 2, 1)
+	bars = plt.bar(type_results.index, type_results.values, color=plt.cm.Set3(range(len(type_results))))
+	plt.title('Total Results by Extraction Type', fontweight='bold')
+	plt.xlabel('Extraction Type')
+	plt.ylabel('Total Results')
+	plt.xticks(rotation=45)
+
+	# Add value labels on bars
+	for bar in bars:
+		height = bar.get_height()
+		plt.text(bar.get_x() + bar.get_width()/2., height,
+				f'{int(height):,}', ha='center', va='bottom')
+
+	# 2. Average results per request
+	plt.subplot(1, 2, 2)
+	avg_results = (type_totals['results'] / type_totals['sessions']).sort_values(ascending=False)
+	bars = plt.bar(avg_results.index, avg_results.values, color=plt.cm.Pastel1(range(len(avg_results))))
+	plt.title('Average Results per Request', fontweight='bold')
+	plt.xlabel('Extraction Type')
+	plt.ylabel('Average Results')
+	plt.xticks(rotation=45)
+
+	# Add value labels on bars
+	for bar in bars:
+		height = bar.get_height()
+		plt.text(bar.get_x() + bar.get_width()/2., height,
+				f'{height:.1f}', ha='center', va='bottom')
+
+	plt.tight_layout()
+	output_file = os.path.join(output_dir, "data_volume_charts.png")
+	plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+	plt.close()
+	charts['Data Volume Charts'] = output_file
+
+	# 3. Heatmap of activity by day and hour
+	activity = aggregates["activity_by_hour"]
+	if type_totals['sessions'].sum() > 10:  # Only create if we have enough data
+		plt.figure(figsize=(12, 8))
+
+		# Create pivot table for heatmap (weekday 0 is Monday)
+		day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+		heatmap_data = activity.pivot_table(
+			values='results',
+			index='weekday',
+			columns='hour',
+			aggfunc='sum',
+			fill_value=0
+		)
+		heatmap_data.index = [day_order[weekday] for weekday in heatmap_data.index]
+
+		sns.heatmap(heatmap_data, annot=True, fmt='g', cmap='YlOrRd', cbar_kws={'label': 'Total Results'})
+		plt.title('Activity Heatmap: Results by Day and Hour', fontsize=14, fontweight='bold')
+		plt.xlabel('Hour of Day')
+		plt.ylabel('Day of Week')
+		plt.tight_layout()
+
+		heatmap_file = os.path.join(output_dir, "activity_heatmap.png")
+		plt.savefig(heatmap_file, dpi=dpi, bbox_inches='tight')
+		plt.close()
+		charts['Activity Heatmap'] = heatmap_file
+
+	return charts
+
+def render_success_rate_analysis(aggregates: Dict[str, pd.DataFrame], output_dir: str, dpi: int, max_points: int) -> Optional[str]:
+	"""Create success rate analysis chart"""
+	type_totals = aggregates["type_totals"]
+	if type_totals.empty:
+		return None
+
+	fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+
+	# 1. Overall success rate pie chart
+	successful = type_totals['successful'].sum()
+	success_counts = pd.Series([successful, type_totals['sessions'].sum() - successful])
+	success_labels = ['Success', 'Failed']
+	colors = ['#2ecc71', '#e74c3c']
+
+	wedges, texts, autotexts = ax1.pie(
+		success_counts.values,
+		labels=success_labels,
+		colors=colors,
+		autopct='%1.1f%%',
+		startangle=90
+	)
+	ax1.set_title('Overall Success Rate', fontweight='bold')
+
+	# 2. Success rate by extraction type
+	type_totals = type_totals.set_index('scraper_type')
+	type_success = type_totals['successful'] / type_totals['sessions'] * 100
+	bars = ax2.bar(type_success.index, type_success.values, color=plt.cm.Set2(range(len(type_success))))
+	ax2.set_title('Success Rate by Extraction Type', fontweight='bold')
+	ax2.set_ylabel('Success Rate (%)')
+	ax2.set_xticklabels(type_success.index, rotation=45)
+
+	# Add percentage labels
+	for bar in bars:
+		height = bar.get_height()
+		ax2.text(bar.get_x() + bar.get_width()/2., height,
+				f'{height:.1f}%', ha='center', va='bottom')
+
+	# 3. Success rate trend over time
+	daily = aggregates['daily_counts'].groupby('date')[['successful', 'sessions']].sum()
+	daily_success = downsample(daily['successful'] / daily['sessions'] * 100, max_points)
+	ax3.plot(daily_success.index, daily_success.values, marker='o', linewidth=2, markersize=6)
+	ax3.set_title('Success Rate Trend Over Time', fontweight='bold')
+	ax3.set_ylabel('Success Rate (%)')
+	ax3.set_xlabel('Date')
+	ax3.tick_params(axis='x', rotation=45)
+	ax3.grid(True, alpha=0.3)
+
+	# 4. Error analysis (if there are errors)
+	top_errors = aggregates['top_errors']
+	if not top_errors.empty:
+		error_counts = top_errors.set_index('error_message')['sessions']
+		if not error_counts.empty:
+			bars = ax4.barh(range(len(error_counts)), error_counts.values, color='#e74c3c')
+			ax4.set_yticks(range(len(error_counts)))
+			ax4.set_yticklabels([msg[:30] + '...' if len(msg) > 30 else msg for msg in error_counts.index])
+			ax4.set_title('Most Common Errors', fontweight='bold')
+			ax4.set_xlabel('Frequency')
+
+			# Add count labels
+			for i, bar in enumerate(bars):
+				width = bar.get_width()
+				ax4.text(width, bar.get_y() + bar.get_height()/2.,
+						f'{int(width)}', ha='left', va='center')
+		else:
+			ax4.text(0.5, 0.5, 'No error data available', ha='center', va='center', transform=ax4.transAxes)
+			ax4.set_title('Error Analysis', fontweight='bold')
+	else:
+		ax4.text(0.5, 0.5, 'No failed extractions found', ha='center', va='center', transform=ax4.transAxes)
+		ax4.set_title('Error Analysis', fontweight='bold')
+
+	plt.tight_layout()
+	output_file = os.path.join(output_dir, "success_rate_analysis.png")
+	plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+	plt.close()
+	return output_file
+
+# chart -> (result label or None for charts returning several files, aggregates it reads,
+#           render function, visualizer attributes that change its output)
+CHARTS: Dict[str, Tuple[Optional[str], Tuple[str, ...], Callable, Tuple[str, ...]]] = {
+	"scraping_dashboard": ("Interactive Dashboard",
+		("type_totals", "domain_totals", "daily_counts", "activity_by_hour"), render_overview_dashboard, ("max_points",)),
+	"extraction_timeline": ("Extraction Timeline", ("daily_counts",), render_extraction_timeline, ("dpi", "max_points")),
+	"domain_analysis": ("Domain Analysis", ("domain_totals",), render_domain_analysis, ()),
+	"data_volume_charts": (None, ("type_totals", "activity_by_hour"), render_data_volume_charts, ("dpi",)),
+	"success_rate_analysis": ("Success Rate Analysis",
+		("type_totals", "daily_counts", "top_errors"), render_success_rate_analysis, ("dpi", "max_points")),
+}
+
+def _init_render_worker():
+	# Workers only write files, so use the non-interactive backend
+	plt.switch_backend("Agg")
+	apply_chart_style()
+
+def _timed_render(chart: str, aggregates: Dict[str, pd.DataFrame], output_dir: str, dpi: int,
+				max_points: int) -> Tuple[Any, float]:
+	started = time.perf_counter()
+	result = CHARTS[chart][2](aggregates, output_dir, dpi, max_points)
+	return result, time.perf_counter() - started
+
+def cached_render(chart: str):
+	"""
+	Serve a chart method from the render cache while the data is unchanged
+
+	The method must return its output file path, a mapping of labels to
+	paths, or a falsy value when there is nothing to render (not cached).
+	"""
+	def decorator(method):
+		@functools.wraps(method)
+		def wrapper(self):
+			key = self._render_key(chart)
+			cached = self.render_cache.get(key) if key else None
+			if cached is not None:
+				return cached
+
+			result = method(self)
+			if key:
+				self._cache_result(key, result)
+			return result
+		return wrapper
+	return decorator
 
 class DataVisualizer:
 	"""Main visualization class for generating charts and graphs"""
 
-	def __init__(self, db_service=None, output_dir="visualizations"):
+	def __init__(self, db_service=None, output_dir="visualizations", dpi: int = 300,
+				cache_max_bytes: int = DEFAULT_MAX_BYTES, max_points: int = DEFAULT_MAX_POINTS,
+				since: Optional[datetime] = None):
 		self.db_service = db_service
 		self.output_dir = output_dir
+		self.dpi = dpi
+		# Time series are downsampled to max_points per trace; since limits the plotted range
+		self.max_points = max_points
+		self.since = since
 		self.ensure_output_directory()
 
+		# Rendered charts, reused until sessions or rollups change (see clear_render_cache)
+		self.render_cache = RenderCache(os.path.join(output_dir, ".render_cache"), cache_max_bytes)
+
 		# Set style for matplotlib
-		try:
-			plt.style.use('seaborn-v0_8')
-		except:
-			# Fallback to default style if seaborn style not available
-			plt.style.use('default')
-		sns.set_palette("husl")
+		apply_chart_style()
+
+		# Per-chart render seconds of the last generate_all_visualizations (0.0 when cached)
+		self.render_timings: Dict[str, float] = {}
 
 	def ensure_output_directory(self):
 		"""Create output directory if it doesn't exist"""
 		if not os.path.exists(self.output_dir):
 			os.makedirs(self.output_dir)
 
-	def get_scraping_data(self) -> pd.DataFrame:
-		"""Get all scraping data from database using the service layer"""
+	def clear_render_cache(self):
+		"""Drop all cached chart renderings, e.g. after changing the data without writing sessions"""
+		self.render_cache.clear()
+
+	def _data_watermark(self) -> Optional[Dict[str, int]]:
+		"""Watermark of the session data, or None if it cannot be read (charts are then not cached)"""
+		if not self.db_service or not hasattr(self.db_service, "get_data_watermark"):
+			return None
+		try:
+			return self.db_service.get_data_watermark()
+		except Exception as e:
+			print(f"Error getting data watermark: {e}")
+			return None
+
+	def get_scraping_data(self, limit: int = 1000) -> pd.DataFrame:
+		"""Get the most recent sessions from database using the service layer"""
 		if not self.db_service:
 			return pd.DataFrame()
 
 		try:
-			# Get all sessions from the database service
-			sessions = self.db_service.get_extraction_history(limit=1000)  # Get more data for better visualization
+			sessions = self.db_service.get_extraction_history(limit=limit)
 
 			if not sessions:
 				return pd.DataFrame()
@@ -53,15 +444,11 @@ class DataVisualizer:
 			# Convert to DataFrame
 			df_data = []
 			for session in sessions:
-				# Count results based on session type
-				result_count = 0
-				if session.get('metadata') and isinstance(session['metadata'], dict):
-					result_count = session['metadata'].get('result_count', 0)
-
 				df_data.append({
 					'url': session['url'],
+					'domain': session.get('domain') or '',
 					'extraction_type': session['scraper_type'],
-					'result_count': result_count,
+					'result_count': session.get('result_count') or 0,
 					'success': session['status'] == 'success',
 					'timestamp': session['timestamp'],
 					'error_message': session.get('error_message', ''),
@@ -78,358 +465,181 @@ class DataVisualizer:
 			df['date'] = df['timestamp'].dt.date
 			df['hour'] = df['timestamp'].dt.hour
 
-			# Extract domain from URL
-			df['domain'] = df['url'].apply(lambda x: urlparse(x).netloc if x else '')
-
 			return df
 		except Exception as e:
 			print(f"Error getting scraping data: {e}")
 			return pd.DataFrame()
 
-	def create_scraping_overview_dashboard(self) -> Optional[str]:
-		"""Create comprehensive dashboard with multiple charts"""
-		df = self.get_scraping_data()
-		if df.empty:
-			print("No data available for visualization")
-			return None
+	def get_aggregates(self, *names: str) -> Dict[str, pd.DataFrame]:
+		"""Get analytics aggregates as small DataFrames, grouped in the database over the history since self.since"""
+		empty = {name: pd.DataFrame() for name in names}
+		if not self.db_service:
+			return empty
 
 		try:
-			# Create subplots
-			fig = make_subplots(
-				rows=2, cols=2,
-				subplot_titles=(
-					'Extractions by Type',
-					'Success Rate by Domain',
-					'Daily Extraction Volume',
-					'Hourly Activity Pattern'
-				),
-				specs=[[{"type": "pie"}, {"type": "bar"}],
-					[{"type": "scatter"}, {"type": "bar"}]]
-			)
-
-			# 1. Extraction types pie chart
-			type_counts = df['extraction_type'].value_counts()
-			fig.add_trace(
-				go.Pie(labels=type_counts.index, values=type_counts.values, name="Types"),
-				row=1, col=1
-			)
-
-			# 2. Success rate by domain
-			domain_success = df.groupby('domain').agg({
-				'success': ['count', 'sum']
-			}).round(2)
-			domain_success.columns = ['total', 'successful']
-			domain_success['success_rate'] = (domain_success['successful'] / domain_success['total'] * 100).round(1)
-			domain_success = domain_success.sort_values('total', ascending=False).head(10)
-
-			if not domain_success.empty:
-				fig.add_trace(
-					go.Bar(
-						x=domain_success.index,
-						y=domain_success['success_rate'],
-						name="Success Rate %"
-					),
-					row=1, col=2
-				)
-
-			# 3. Daily extraction volume
-			daily_counts = df.groupby('date').size().reset_index(name='count')
-			fig.add_trace(
-				go.Scatter(
-					x=daily_counts['date'],
-					y=daily_counts['count'],
-					mode='lines+markers',
-					name="Daily Volume"
-				),
-				row=2, col=1
-			)
-
-			# 4. Hourly activity pattern
-			hourly_counts = df.groupby('hour').size()
-			fig.add_trace(
-				go.Bar(
-					x=hourly_counts.index,
-					y=hourly_counts.values,
-					name="Hourly Activity"
-				),
-				row=2, col=2
-			)
-
-			fig.update_layout(
-				title_text="Web Scraping Analytics Dashboard",
-				showlegend=False,
-				height=800
-			)
-
-			output_file = os.path.join(self.output_dir, "scraping_dashboard.html")
-			fig.write_html(output_file)
-			return output_file
+			results = self.db_service.get_aggregates(list(names), since=self.since)
+			return {name: pd.DataFrame(rows) for name, rows in results.items()}
 		except Exception as e:
-			print(f"Error creating dashboard: {e}")
-			return None
+			print(f"Error getting aggregates: {e}")
+			return empty
 
+	@cached_render("scraping_dashboard")
+	def create_scraping_overview_dashboard(self) -> Optional[str]:
+		"""Create comprehensive dashboard with multiple charts"""
+		return self._render("scraping_dashboard")
+
+	@cached_render("extraction_timeline")
 	def create_extraction_timeline(self) -> Optional[str]:
 		"""Create timeline chart of extractions"""
-		df = self.get_scraping_data()
-		if df.empty:
-			return None
-
-		plt.figure(figsize=(15, 8))
-
-		# Group by date and extraction type
-		timeline_data = df.groupby(['date', 'extraction_type']).size().unstack(fill_value=0)
-
-		# Create stacked area chart
-		timeline_data.plot(kind='area', stacked=True, alpha=0.7, figsize=(15, 8))
-
-		plt.title('Extraction Timeline by Type', fontsize=16, fontweight='bold')
-		plt.xlabel('Date', fontsize=12)
-		plt.ylabel('Number of Extractions', fontsize=12)
-		plt.legend(title='Extraction Type', bbox_to_anchor=(1.05, 1), loc='upper left')
-		plt.xticks(rotation=45)
-		plt.tight_layout()
-
-		output_file = os.path.join(self.output_dir, "extraction_timeline.png")
-		plt.savefig(output_file, dpi=300, bbox_inches='tight')
-		plt.close()
-		return output_file
+		return self._render("extraction_timeline")
 
+	@cached_render("domain_analysis")
 	def create_domain_analysis_chart(self) -> Optional[str]:
 		"""Create domain analysis with interactive chart"""
-		df = self.get_scraping_data()
-		if df.empty:
-			return None
-
-		# Analyze domains
-		domain_stats = df.groupby('domain').agg({
-			'url': 'count',
-			'result_count': 'sum',
-			'success': 'mean'
-		}).round(3)
-		domain_stats.columns = ['total_requests', 'total_results', 'success_rate']
-		domain_stats = domain_stats.sort_values('total_requests', ascending=False).head(15)
-
-		# Create interactive chart
-		fig = go.Figure()
-
-		# Add bar chart for total requests
-		fig.add_trace(go.Bar(
-			name='Total Requests',
-			x=domain_stats.index,
-			y=domain_stats['total_requests'],
-			yaxis='y',
-			offsetgroup=1
-		))
-
-		# Add line chart for success rate
-		fig.add_trace(go.Scatter(
-			name='Success Rate',
-			x=domain_stats.index,
-			y=domain_stats['success_rate'] * 100,
-			yaxis='y2',
-			mode='lines+markers',
-			line=dict(color='red', width=3)
-		))
-
-		fig.update_layout(
-			title='Domain Analysis: Requests vs Success Rate',
-			xaxis=dict(title='Domain', tickangle=45),
-			yaxis=dict(title='Total Requests', side='left'),
-			yaxis2=dict(title='Success Rate (%)', side='right', overlaying='y'),
-			hovermode='x unified',
-			height=600
-		)
-
-		output_file = os.path.join(self.output_dir, "domain_analysis.html")
-		fig.write_html(output_file)
-		return output_file
+		return self._render("domain_analysis")
 
+	@cached_render("data_volume_charts")
 	def create_data_volume_charts(self) -> Dict[str, str]:
 		"""Create various data volume visualization charts"""
-		df = self.get_scraping_data()
-		if df.empty:
-			return {}
+		return self._render("data_volume_charts")
 
-		charts = {}
-
-		# 1. Results per extraction type
-		plt.figure(figsize=(12, 6))
-		type_results = df.groupby('extraction_type')['result_count'].sum().sort_values(ascending=False)
-
-		plt.subplot(1, 2, 1)
-		bars = plt.bar(type_results.index, type_results.values, color=plt.cm.Set3(range(len(type_results))))
-		plt.title('Total Results by Extraction Type', fontweight='bold')
-		plt.xlabel('Extraction Type')
-		plt.ylabel('Total Results')
-		plt.xticks(rotation=45)
-
-		# Add value labels on bars
-		for bar in bars:
-			height = bar.get_height()
-			plt.text(bar.get_x() + bar.get_width()/2., height,
-					f'{int(height):,}', ha='center', va='bottom')
-
-		# 2. Average results per request
-		plt.subplot(1, 2, 2)
-		avg_results = df.groupby('extraction_type')['result_count'].mean().sort_values(ascending=False)
-		bars = plt.bar(avg_results.index, avg_results.values, color=plt.cm.Pastel1(range(len(avg_results))))
-		plt.title('Average Results per Request', fontweight='bold')
-		plt.xlabel('Extraction Type')
-		plt.ylabel('Average Results')
-		plt.xticks(rotation=45)
-
-		# Add value labels on bars
-		for bar in bars:
-			height = bar.get_height()
-			plt.text(bar.get_x() + bar.get_width()/2., height,
-					f'{height:.1f}', ha='center', va='bottom')
-
-		plt.tight_layout()
-		output_file = os.path.join(self.output_dir, "data_volume_charts.png")
-		plt.savefig(output_file, dpi=300, bbox_inches='tight')
-		plt.close()
-		charts['Data Volume Charts'] = output_file
-
-		# 3. Heatmap of activity by day and hour
-		if len(df) > 10:  # Only create if we have enough data
-			plt.figure(figsize=(12, 8))
-
-			# Create pivot table for heatmap
-			df['day_of_week'] = df['timestamp'].dt.day_name()
-			heatmap_data = df.pivot_table(
-				values='result_count',
-				index='day_of_week',
-				columns='hour',
-				aggfunc='sum',
-				fill_value=0
-			)
-
-			# Reorder days
-			day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-			heatmap_data = heatmap_data.reindex([day for day in day_order if day in heatmap_data.index])
+	@cached_render("success_rate_analysis")
+	def create_success_rate_analysis(self) -> Optional[str]:
+		"""Create success rate analysis chart"""
+		return self._render("success_rate_analysis")
 
-			sns.heatmap(heatmap_data, annot=True, fmt='g', cmap='YlOrRd', cbar_kws={'label': 'Total Results'})
-			plt.title('Activity Heatmap: Results by Day and Hour', fontsize=14, fontweight='bold')
-			plt.xlabel('Hour of Day')
-			plt.ylabel('Day of Week')
-			plt.tight_layout()
+	def _render(self, chart: str) -> Any:
+		"""Query a chart's aggregates and render it in this process"""
+		_, names, render, _ = CHARTS[chart]
+		return render(self.get_aggregates(*names), self.output_dir, self.dpi, self.max_points)
 
-			heatmap_file = os.path.join(self.output_dir, "activity_heatmap.png")
-			plt.savefig(heatmap_file, dpi=300, bbox_inches='tight')
-			plt.close()
-			charts['Activity Heatmap'] = heatmap_file
+	def _render_key(self, chart: str, watermark: Optional[Dict[str, int]] = None) -> Optional[str]:
+		"""Render cache key of a chart, or None if the data watermark is unavailable"""
+		watermark = watermark or self._data_watermark()
+		if watermark is None:
+			return None
+		params = {name: getattr(self, name) for name in CHARTS[chart][3]}
+		params["output_dir"] = os.path.abspath(self.output_dir)
+		params["since"] = self.since
+		return self.render_cache.key(chart, params, watermark)
 
-		return charts
+	def _cache_result(self, key: str, result: Any):
+		if result:
+			self.render_cache.put(key, result, list(result.values()) if isinstance(result, dict) else [result])
 
-	def create_success_rate_analysis(self) -> Optional[str]:
-		"""Create success rate analysis chart"""
-		df = self.get_scraping_data()
-		if df.empty:
-			return None
+	def generate_all_visualizations(self, max_workers: Optional[int] = None) -> Dict[str, str]:
+		"""
+		Generate all available visualizations
 
-		fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+		The aggregates of all charts are fetched in one call, then charts missing
+		from the render cache are rendered concurrently in a process pool, so the
+		total takes about as long as the slowest chart. Per-chart seconds are
+		printed and kept in render_timings.
 
-		# 1. Overall success rate pie chart
-		success_counts = df['success'].value_counts()
-		success_labels = ['Success', 'Failed']
-		colors = ['#2ecc71', '#e74c3c']
+		Args:
+			max_workers: Render processes (default: one per chart, bounded by the CPU count);
+				1 renders serially in this process
+		"""
+		print("🎨 Generating visualizations...")
+		started = time.perf_counter()
+
+		watermark = self._data_watermark()
+		results, keys, timings = {}, {}, {}
+		for chart in CHARTS:
+			keys[chart] = self._render_key(chart, watermark) if watermark else None
+			cached = self.render_cache.get(keys[chart]) if keys[chart] else None
+			if cached is not None:
+				results[chart], timings[chart] = cached, 0.0
+		pending = [chart for chart in CHARTS if chart not in results]
+
+		if pending:
+			names = list(dict.fromkeys(name for chart in pending for name in CHARTS[chart][1]))
+			aggregates = self.get_aggregates(*names)
+			jobs = {chart: ({name: aggregates[name] for name in CHARTS[chart][1]},
+							self.output_dir, self.dpi, self.max_points)
+					for chart in pending}
+			for chart, outcome in self._render_jobs(jobs, max_workers).items():
+				if isinstance(outcome, Exception):
+					print(f"  ✗ {chart} failed: {outcome}")
+					continue
+				results[chart], timings[chart] = outcome
+				if keys[chart]:
+					self._cache_result(keys[chart], results[chart])
 
-		wedges, texts, autotexts = ax1.pie(
-			success_counts.values,
-			labels=success_labels,
-			colors=colors,
-			autopct='%1.1f%%',
-			startangle=90
-		)
-		ax1.set_title('Overall Success Rate', fontweight='bold')
-
-		# 2. Success rate by extraction type
-		type_success = df.groupby('extraction_type')['success'].mean() * 100
-		bars = ax2.bar(type_success.index, type_success.values, color=plt.cm.Set2(range(len(type_success))))
-		ax2.set_title('Success Rate by Extraction Type', fontweight='bold')
-		ax2.set_ylabel('Success Rate (%)')
-		ax2.set_xticklabels(type_success.index, rotation=45)
-
-		# Add percentage labels
-		for bar in bars:
-			height = bar.get_height()
-			ax2.text(bar.get_x() + bar.get_width()/2., height,
-					f'{height:.1f}%', ha='center', va='bottom')
-
-		# 3. Success rate trend over time
-		daily_success = df.groupby('date')['success'].mean() * 100
-		ax3.plot(daily_success.index, daily_success.values, marker='o', linewidth=2, markersize=6)
-		ax3.set_title('Success Rate Trend Over Time', fontweight='bold')
-		ax3.set_ylabel('Success Rate (%)')
-		ax3.set_xlabel('Date')
-		ax3.tick_params(axis='x', rotation=45)
-		ax3.grid(True, alpha=0.3)
-
-		# 4. Error analysis (if there are errors)
-		error_df = df[df['success'] == False]
-		if not error_df.empty and 'error_message' in error_df.columns:
-			error_counts = error_df['error_message'].value_counts().head(5)
-			if not error_counts.empty:
-				bars = ax4.barh(range(len(error_counts)), error_counts.values, color='#e74c3c')
-				ax4.set_yticks(range(len(error_counts)))
-				ax4.set_yticklabels([msg[:30] + '...' if len(msg) > 30 else msg for msg in error_counts.index])
-				ax4.set_title('Most Common Errors', fontweight='bold')
-				ax4.set_xlabel('Frequency')
-
-				# Add count labels
-				for i, bar in enumerate(bars):
-					width = bar.get_width()
-					ax4.text(width, bar.get_y() + bar.get_height()/2.,
-							f'{int(width)}', ha='left', va='center')
+		visualizations = {}
+		for chart, (label, _, _, _) in CHARTS.items():
+			result = results.get(chart)
+			if chart in timings:
+				print(f"  ⏱️  {chart}: " + ("cached" if chart not in pending else f"{timings[chart]:.2f}s"))
+			if not result:
+				continue
+			if label is None:
+				visualizations.update(result)
 			else:
-				ax4.text(0.5, 0.5, 'No error data available', ha='center', va='center', transform=ax4.transAxes)
-				ax4.set_title('Error Analysis', fontweight='bold')
-		else:
-			ax4.text(0.5, 0.5, 'No failed extractions found', ha='center', va='center', transform=ax4.transAxes)
-			ax4.set_title('Error Analysis', fontweight='bold')
+				visualizations[label] = result
 
-		plt.tight_layout()
-		output_file = os.path.join(self.output_dir, "success_rate_analysis.png")
-		plt.savefig(output_file, dpi=300, bbox_inches='tight')
-		plt.close()
-		return output_file
+		self.render_timings = timings
+		print(f"✓ Visualizations ready in {time.perf_counter() - started:.2f}s")
+		return visualizations
 
-	def generate_all_visualizations(self) -> Dict[str, str]:
-		"""Generate all available visualizations"""
-		visualizations = {}
+	def _render_jobs(self, jobs: Dict[str, Tuple], max_workers: Optional[int]) -> Dict[str, Any]:
+		"""Render charts in a process pool; returns (result, seconds) or the exception per chart"""
+		workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+		if workers > 1:
+			# Forked workers inherit the loaded modules; spawned ones would re-import pandas and plotly
+			context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+			try:
+				with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+										initializer=_init_render_worker) as pool:
+					futures = {chart: pool.submit(_timed_render, chart, *job) for chart, job in jobs.items()}
+					outcomes = {}
+					for chart, future in futures.items():
+						try:
+							outcomes[chart] = future.result()
+						except Exception as e:
+							outcomes[chart] = e
+					return outcomes
+			except (OSError, BrokenProcessPool) as e:
+				print(f"Process pool unavailable ({e}), rendering serially")
+
+		outcomes = {}
+		for chart, job in jobs.items():
+			try:
+				outcomes[chart] = _timed_render(chart, *job)
+			except Exception as e:
+				outcomes[chart] = e
+		return outcomes
+
+	def create_dashboard_bundle(self, include_report: bool = True) -> Optional[str]:
+		"""
+		Build dashboard.html, a tabbed page of every chart and the report that opens offline
 
-		print("🎨 Generating visualizations...")
+		Static charts come from generate_all_visualizations (and so the render
+		cache). The interactive figures are written as compact JSON scripts
+		next to the page and share one plotly.min.js with the standalone chart
+		pages; each tab loads its content when first opened.
+		"""
+		visualizations = self.generate_all_visualizations()
+		aggregates = self.get_aggregates("type_totals", "domain_totals", "daily_counts", "activity_by_hour")
+		if aggregates["type_totals"].empty:
+			return None
 
-		# Generate dashboard
-		print("  📊 Creating interactive dashboard...")
-		dashboard = self.create_scraping_overview_dashboard()
-		if dashboard:
-			visualizations['Interactive Dashboard'] = dashboard
-
-		# Generate timeline
-		print("  📈 Creating extraction timeline...")
-		timeline = self.create_extraction_timeline()
-		if timeline:
-			visualizations['Extraction Timeline'] = timeline
-
-		# Generate domain analysis
-		print("  🌐 Creating domain analysis...")
-		domain_analysis = self.create_domain_analysis_chart()
-		if domain_analysis:
-			visualizations['Domain Analysis'] = domain_analysis
-
-		# Generate volume charts
-		print("  📊 Creating data volume charts...")
-		volume_charts = self.create_data_volume_charts()
-		visualizations.update(volume_charts)
-
-		# Generate success analysis
-		print("  ✅ Creating success rate analysis...")
-		success_analysis = self.create_success_rate_analysis()
-		if success_analysis:
-			visualizations['Success Rate Analysis'] = success_analysis
+		tabs = []
+		write_figure_data(overview_figure(aggregates, self.max_points), self.output_dir, "scraping_dashboard")
+		tabs.append({"id": "overview", "label": "Overview", "figure": "scraping_dashboard"})
+		if not aggregates["domain_totals"].empty:
+			write_figure_data(domain_figure(aggregates), self.output_dir, "domain_analysis")
+			tabs.append({"id": "domains", "label": "Domain Analysis", "figure": "domain_analysis"})
+		for label, path in visualizations.items():
+			if path.endswith(".png"):
+				tabs.append({"id": label.lower().replace(" ", "-"), "label": label, "images": [path]})
 
-		return visualizations
+		if include_report:
+			report_path = ReportGenerator(self).generate_html_report()
+			if report_path:
+				tabs.append({"id": "report", "label": "Report", "page": report_path})
+
+		return write_dashboard_bundle(self.output_dir, tabs)
 
 	def get_enhanced_scraping_data(self) -> pd.DataFrame:
 		"""Get enhanced scraping data with actual result counts from session data"""
@@ -443,34 +653,24 @@ class DataVisualizer:
 			if not sessions:
 				return pd.DataFrame()
 
-			# Get detailed data for each session
+			# Result counts are stored on the session; only sessions saved without one are counted
+			result_counts = self.db_service.get_result_counts(
+				[session['id'] for session in sessions if session.get('result_count') is None]
+			)
+
 			df_data = []
 			for session in sessions:
-				session_data = self.db_service.get_session_data(session['id'])
-
-				if session_data:
-					# Calculate actual result count based on data
-					result_count = 0
-					if 'data' in session_data:
-						data = session_data['data']
-						if 'elements' in data:
-							result_count = len(data['elements'])
-						elif 'links' in data:
-							result_count = len(data['links'])
-						elif 'emails' in data:
-							result_count = len(data['emails'])
-						elif 'images' in data:
-							result_count = len(data['images'])
-
-					df_data.append({
-						'url': session['url'],
-						'extraction_type': session['scraper_type'],
-						'result_count': result_count,
-						'success': session['status'] == 'success',
-						'timestamp': session['timestamp'],
-						'error_message': session.get('error_message', ''),
-						'session_id': session['id']
-					})
+				result_count = session.get('result_count')
+				df_data.append({
+					'url': session['url'],
+					'domain': session.get('domain') or '',
+					'extraction_type': session['scraper_type'],
+					'result_count': result_count if result_count is not None else result_counts.get(session['id'], 0),
+					'success': session['status'] == 'success',
+					'timestamp': session['timestamp'],
+					'error_message': session.get('error_message', ''),
+					'session_id': session['id']
+				})
 
 			df = pd.DataFrame(df_data)
 
@@ -482,30 +682,33 @@ class DataVisualizer:
 			df['date'] = df['timestamp'].dt.date
 			df['hour'] = df['timestamp'].dt.hour
 
-			# Extract domain from URL
-			df['domain'] = df['url'].apply(lambda x: urlparse(x).netloc if x else '')
-
 			return df
 		except Exception as e:
 			print(f"Error getting enhanced scraping data: {e}")
 			return pd.DataFrame()
 
 	def create_quick_stats_summary(self) -> Dict[str, Any]:
-		"""Create a quick statistics summary"""
-		df = self.get_enhanced_scraping_data()
-		if df.empty:
+		"""Create a quick statistics summary of the full history from the rollups"""
+		aggregates = self.get_aggregates("type_totals", "domain_totals", "domain_count")
+		type_totals = aggregates["type_totals"]
+		if type_totals.empty:
 			return {}
 
+		total = int(type_totals['sessions'].sum())
+		total_results = int(type_totals['results'].sum())
+		busiest_type = type_totals.sort_values('sessions', ascending=False, kind='stable')['scraper_type']
+		domain_totals = aggregates["domain_totals"]
+
 		stats = {
-			'total_extractions': len(df),
-			'successful_extractions': df['success'].sum(),
-			'success_rate': round(df['success'].mean() * 100, 1) if len(df) > 0 else 0,
-			'total_results': df['result_count'].sum(),
-			'avg_results_per_extraction': round(df['result_count'].mean(), 1) if len(df) > 0 else 0,
-			'unique_domains': df['domain'].nunique(),
-			'extraction_types': df['extraction_type'].unique().tolist(),
-			'most_active_domain': df['domain'].value_counts().index[0] if not df['domain'].value_counts().empty else 'N/A',
-			'most_used_extraction_type': df['extraction_type'].value_counts().index[0] if not df['extraction_type'].value_counts().empty else 'N/A'
+			'total_extractions': total,
+			'successful_extractions': int(type_totals['successful'].sum()),
+			'success_rate': round(float(type_totals['successful'].sum()) / total * 100, 1) if total else 0,
+			'total_results': total_results,
+			'avg_results_per_extraction': round(total_results / total, 1) if total else 0,
+			'unique_domains': int(aggregates["domain_count"]['domains'].sum()),
+			'extraction_types': type_totals['scraper_type'].tolist(),
+			'most_active_domain': domain_totals['domain'].iloc[0] if not domain_totals.empty else 'N/A',
+			'most_used_extraction_type': busiest_type.iloc[0]
 		}
 
 		return stats
@@ -519,15 +722,16 @@ class ReportGenerator:
 
 	def generate_html_report(self) -> Optional[str]:
 		"""Generate comprehensive HTML report"""
-		df = self.visualizer.get_scraping_data()
-		if df.empty:
+		# Totals come from the rollups; only the recent activity table reads sessions
+		aggregates = self.visualizer.get_aggregates("type_totals", "domain_totals", "daily_counts", "domain_count")
+		if aggregates["type_totals"].empty:
 			return None
 
 		# Generate statistics
-		stats = self._calculate_statistics(df)
+		stats = self._calculate_statistics(aggregates)
 
 		# Generate HTML content
-		html_content = self._create_html_template(stats, df)
+		html_content = self._create_html_template(stats, self.visualizer.get_scraping_data(limit=10))
 
 		# Save report
 		report_path = os.path.join(self.visualizer.output_dir, "scraping_report.html")
@@ -536,19 +740,24 @@ class ReportGenerator:
 
 		return report_path
 
-	def _calculate_statistics(self, df: pd.DataFrame) -> Dict[str, Any]:
+	def _calculate_statistics(self, aggregates: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
 		"""Calculate summary statistics"""
+		type_totals = aggregates['type_totals'].sort_values('sessions', ascending=False, kind='stable')
+		domain_totals = aggregates['domain_totals']
+		daily_counts = aggregates['daily_counts']
+		total = int(type_totals['sessions'].sum())
+		total_results = int(type_totals['results'].sum())
 		return {
-			'total_extractions': len(df),
-			'successful_extractions': df['success'].sum(),
-			'success_rate': (df['success'].mean() * 100).round(1),
-			'total_results': df['result_count'].sum(),
-			'avg_results_per_extraction': df['result_count'].mean().round(1),
-			'unique_domains': df['domain'].nunique(),
-			'extraction_types': df['extraction_type'].unique().tolist(),
-			'date_range': f"{df['date'].min()} to {df['date'].max()}",
-			'top_domains': df['domain'].value_counts().head(5).to_dict(),
-			'extraction_type_counts': df['extraction_type'].value_counts().to_dict()
+			'total_extractions': total,
+			'successful_extractions': int(type_totals['successful'].sum()),
+			'success_rate': round(float(type_totals['successful'].sum()) / total * 100, 1) if total else 0,
+			'total_results': total_results,
+			'avg_results_per_extraction': round(total_results / total, 1) if total else 0,
+			'unique_domains': int(aggregates['domain_count']['domains'].sum()),
+			'extraction_types': type_totals['scraper_type'].tolist(),
+			'date_range': f"{daily_counts['date'].min()} to {daily_counts['date'].max()}",
+			'top_domains': dict(zip(domain_totals['domain'].head(5), domain_totals['sessions'].head(5))),
+			'extraction_type_counts': dict(zip(type_totals['scraper_type'], type_totals['sessions']))
 		}
 
 	def _create_html_template(self, stats: Dict[str, Any], df: pd.DataFrame) -> str:
@@ -740,6 +949,7 @@ class ReportGenerator:
 			<h3>📈 Interactive Charts Available</h3>
 			<p>Run the visualization commands in the CLI to generate:</p>
 			<ul style="text-align: left; display: inline-block;">
+				<li>Dashboard Bundle with every chart in one page (dashboard.html)</li>
 				<li>Interactive Dashboard (scraping_dashboard.html)</li>
 				<li>Domain Analysis Chart (domain_analysis.html)</li>
 				<li>Extraction Timeline (extraction_timeline.png)</li>
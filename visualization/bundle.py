@@ -0,0 +1,153 @@
+"""
+Lightweight dashboard bundle
+
+All charts and the report in one tabbed page (dashboard.html) that opens
+offline. Interactive charts share a single plotly.min.js next to the page
+instead of embedding the multi-megabyte library in every HTML file, and
+their figures are stored as compact JSON in small scripts under
+dashboard_data/, with pre-gzipped copies for static servers that serve .gz
+siblings (e.g. nginx gzip_static). A tab fetches its figure, images or
+report only when first opened. Data is loaded with script tags rather than
+fetch(), which browsers block for file:// pages.
+"""
+
+import gzip
+import json
+import os
+from typing import Dict, List
+
+import plotly.graph_objects as go
+
+# Shared plotly.js asset, the file name plotly itself uses for include_plotlyjs="directory"
+PLOTLY_ASSET = "plotly.min.js"
+
+BUNDLE_PAGE = "dashboard.html"
+BUNDLE_DATA_DIR = "dashboard_data"
+
+def ensure_plotly_asset(output_dir: str) -> str:
+	"""Write the shared plotly.min.js into output_dir unless it is already there"""
+	path = os.path.join(output_dir, PLOTLY_ASSET)
+	if not os.path.exists(path):
+		from plotly.offline import get_plotlyjs
+		with open(path, "w", encoding="utf-8") as f:
+			f.write(get_plotlyjs())
+	return path
+
+def write_figure_html(fig: go.Figure, output_file: str) -> str:
+	"""Write a standalone chart page that references the shared plotly.min.js"""
+	fig.write_html(output_file, include_plotlyjs="directory")
+	return output_file
+
+def write_figure_data(fig: go.Figure, output_dir: str, chart: str) -> List[str]:
+	"""Write a figure as a compact JSON script and its gzipped copy; returns both paths"""
+	data_dir = os.path.join(output_dir, BUNDLE_DATA_DIR)
+	os.makedirs(data_dir, exist_ok=True)
+	# to_json is compact (numeric arrays are base64 typed arrays); the JSON is a valid JS literal
+	script = f"dashboardLoaded({json.dumps(chart)},{fig.to_json()});".encode("utf-8")
+	path = os.path.join(data_dir, f"{chart}.js")
+	with open(path, "wb") as f:
+		f.write(script)
+	# mtime=0 keeps the gzipped copy byte-identical while the figure is unchanged
+	with open(path + ".gz", "wb") as f:
+		f.write(gzip.compress(script, mtime=0))
+	return [path, path + ".gz"]
+
+def write_dashboard_bundle(output_dir: str, tabs: List[Dict], title: str = "Web Scraping Analytics") -> str:
+	"""
+	Write the tabbed dashboard page
+
+	Args:
+		output_dir: Directory holding the charts, the shared plotly.min.js and dashboard_data/
+		tabs: Tabs in display order, each {"id", "label"} and one of
+			"figure" (chart name written by write_figure_data), "images" (paths) or "page" (path)
+		title: Page title
+	"""
+	ensure_plotly_asset(output_dir)
+	buttons, panels = [], []
+	for tab in tabs:
+		buttons.append(f'<button data-tab="{tab["id"]}">{tab["label"]}</button>')
+		if "figure" in tab:
+			body = f'<div class="figure" data-figure="{tab["figure"]}"></div>'
+		elif "images" in tab:
+			body = "".join(f'<img data-src="{_relative(path, output_dir)}" alt="{tab["label"]}">'
+						for path in tab["images"])
+		else:
+			body = f'<iframe data-src="{_relative(tab["page"], output_dir)}" title="{tab["label"]}"></iframe>'
+		panels.append(f'<section id="tab-{tab["id"]}" hidden>{body}</section>')
+
+	page = _TEMPLATE.format(
+		title=title,
+		plotly=PLOTLY_ASSET,
+		data_dir=BUNDLE_DATA_DIR,
+		buttons="".join(buttons),
+		panels="".join(panels),
+		first=json.dumps(tabs[0]["id"] if tabs else ""),
+	)
+	path = os.path.join(output_dir, BUNDLE_PAGE)
+	with open(path, "w", encoding="utf-8") as f:
+		f.write(page)
+	return path
+
+def _relative(path: str, output_dir: str) -> str:
+	return os.path.relpath(path, output_dir).replace(os.sep, "/")
+
+_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<style>
+body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; background-color: #f5f5f5; }}
+nav {{ display: flex; gap: 4px; padding: 10px 20px 0; background-color: #2c3e50; }}
+nav button {{ border: 0; padding: 10px 16px; color: white; background: none; cursor: pointer; }}
+nav button.active {{ color: #2c3e50; background-color: #f5f5f5; border-radius: 6px 6px 0 0; }}
+section {{ padding: 20px; }}
+section img {{ display: block; max-width: 100%; margin: 0 auto 20px; }}
+section iframe {{ width: 100%; height: 85vh; border: 0; }}
+</style>
+<script src="{plotly}" defer></script>
+</head>
+<body>
+<nav>{buttons}</nav>
+{panels}
+<script>
+var figures = {{}}, pending = {{}};
+function dashboardLoaded(chart, figure) {{
+	figures[chart] = figure;
+	(pending[chart] || []).forEach(function (el) {{ draw(el, figure); }});
+}}
+function draw(el, figure) {{
+	if (window.Plotly) {{ Plotly.newPlot(el, figure.data, figure.layout, {{responsive: true}}); }}
+	else {{ window.addEventListener('load', function () {{ draw(el, figure); }}); }}
+}}
+function load(panel) {{
+	if (panel.dataset.loaded) {{ return; }}
+	panel.dataset.loaded = '1';
+	panel.querySelectorAll('[data-src]').forEach(function (el) {{ el.src = el.dataset.src; }});
+	panel.querySelectorAll('[data-figure]').forEach(function (el) {{
+		var chart = el.dataset.figure;
+		if (figures[chart]) {{ draw(el, figures[chart]); return; }}
+		(pending[chart] = pending[chart] || []).push(el);
+		var script = document.createElement('script');
+		script.src = '{data_dir}/' + chart + '.js';
+		document.head.appendChild(script);
+	}});
+}}
+function show(id) {{
+	document.querySelectorAll('nav button').forEach(function (b) {{ b.classList.toggle('active', b.dataset.tab === id); }});
+	document.querySelectorAll('body > section').forEach(function (s) {{
+		s.hidden = s.id !== 'tab-' + id;
+		if (!s.hidden) {{ load(s); window.dispatchEvent(new Event('resize')); }}
+	}});
+	history.replaceState(null, '', '#' + id);
+}}
+document.querySelectorAll('nav button').forEach(function (b) {{
+	b.addEventListener('click', function () {{ show(b.dataset.tab); }});
+}});
+var initial = location.hash.slice(1);
+show(document.getElementById('tab-' + initial) ? initial : {first});
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,83 @@
+"""
+Shape-preserving downsampling of time series
+
+Charts plot at most a bounded number of points per trace, so output size and
+render time stay flat as histories grow. Single series use
+Largest-Triangle-Three-Buckets (LTTB), which keeps peaks and troughs that
+plain striding drops; frames of several series sharing an x axis (stacked
+areas) keep the minimum and maximum row of each bucket, so every series is
+sampled at the same x values. Ranges shorter than the limit are returned
+unchanged, so the resolution adapts to the plotted range.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Default bound on the points plotted per time-series trace
+DEFAULT_MAX_POINTS = 1000
+
+def _as_numbers(values) -> np.ndarray:
+	"""x values as floats; dates and datetimes become nanosecond timestamps"""
+	values = pd.Index(values)
+	if pd.api.types.is_numeric_dtype(values):
+		return values.to_numpy(dtype=float)
+	return pd.to_datetime(values).asi8.astype(float)
+
+def lttb(x, y, threshold: int) -> np.ndarray:
+	"""
+	Indices of the points kept by Largest-Triangle-Three-Buckets
+
+	The first and last points are always kept; the points in between are split
+	into threshold - 2 buckets and each contributes the point forming the
+	largest triangle with the previously kept point and the next bucket's mean.
+	"""
+	x, y = _as_numbers(x), np.asarray(y, dtype=float)
+	n = len(x)
+	if threshold >= n or threshold < 3:
+		return np.arange(n)
+
+	edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+	selected = np.empty(threshold, dtype=int)
+	selected[0], selected[-1] = 0, n - 1
+	previous = 0
+	for bucket in range(threshold - 2):
+		start, end = edges[bucket], edges[bucket + 1]
+		if bucket + 2 < len(edges):
+			next_x = x[end:edges[bucket + 2]].mean()
+			next_y = y[end:edges[bucket + 2]].mean()
+		else:
+			next_x, next_y = x[n - 1], y[n - 1]
+
+		areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+					- (x[previous] - x[start:end]) * (next_y - y[previous]))
+		previous = start + int(np.argmax(areas))
+		selected[bucket + 1] = previous
+	return selected
+
+def min_max_buckets(values, buckets: int) -> np.ndarray:
+	"""Indices of the first, last, and smallest and largest value of each of buckets equal-count buckets"""
+	values = np.asarray(values, dtype=float)
+	n = len(values)
+	if 2 * buckets + 2 >= n or buckets < 1:
+		return np.arange(n)
+
+	selected = {0, n - 1}
+	for chunk in np.array_split(np.arange(n), buckets):
+		selected.add(int(chunk[np.argmin(values[chunk])]))
+		selected.add(int(chunk[np.argmax(values[chunk])]))
+	return np.array(sorted(selected))
+
+def downsample(data, max_points: int):
+	"""
+	Reduce a Series or DataFrame indexed by x (sorted) to at most max_points rows
+
+	A Series goes through LTTB; a DataFrame of several series is bucketed on the
+	row totals, so stacked areas keep their outline.
+	"""
+	if max_points is None or len(data) <= max_points:
+		return data
+	if isinstance(data, pd.Series):
+		return data.iloc[lttb(data.index, data.to_numpy(), max_points)]
+	if data.shape[1] == 1:
+		return data.iloc[lttb(data.index, data.iloc[:, 0].to_numpy(), max_points)]
+	return data.iloc[min_max_buckets(data.sum(axis=1).to_numpy(), (max_points - 2) // 2)]
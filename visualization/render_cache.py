@@ -0,0 +1,119 @@
+"""
+Cache of rendered chart files
+
+Rendered charts are copied into a cache directory under a key derived from
+the chart name, its parameters and the data watermark (newest session ID,
+session count and rollup version). While the watermark is unchanged a chart
+is served by restoring its files instead of querying and rendering again. The
+directory is kept below max_bytes by evicting the least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+# Default size bound of the cache directory
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+class RenderCache:
+	"""Size-bounded directory of rendered chart files, keyed by chart, parameters and watermark"""
+
+	MANIFEST = "manifest.json"
+
+	def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+		self.directory = directory
+		self.max_bytes = max_bytes
+
+	@staticmethod
+	def key(chart: str, params: Dict[str, Any], watermark: Dict[str, int]) -> str:
+		"""Cache key of one chart rendering"""
+		payload = json.dumps({"chart": chart, "params": params, "watermark": watermark},
+							sort_keys=True, default=str)
+		return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+	def get(self, key: str) -> Optional[Any]:
+		"""Restore the output files of a cached rendering and return its result, or None on a miss"""
+		manifest = self._load()
+		entry = manifest.get(key)
+		if entry is None:
+			return None
+
+		for output_path, cached_name in entry["files"].items():
+			cached_path = os.path.join(self.directory, cached_name)
+			if not os.path.exists(cached_path):
+				# Files removed behind our back: drop the entry and render again
+				del manifest[key]
+				self._save(manifest)
+				return None
+			if not self._same_file(cached_path, output_path):
+				os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+				shutil.copy2(cached_path, output_path)
+
+		entry["last_used"] = time.time()
+		self._save(manifest)
+		return entry["result"]
+
+	def put(self, key: str, result: Any, output_paths: List[str]):
+		"""Store copies of a rendering's output files and evict old entries beyond max_bytes"""
+		os.makedirs(self.directory, exist_ok=True)
+		files = {}
+		size = 0
+		for index, output_path in enumerate(output_paths):
+			cached_name = f"{key}-{index}{os.path.splitext(output_path)[1]}"
+			shutil.copy2(output_path, os.path.join(self.directory, cached_name))
+			files[output_path] = cached_name
+			size += os.path.getsize(output_path)
+
+		manifest = self._load()
+		manifest[key] = {"result": result, "files": files, "size": size, "last_used": time.time()}
+		self._evict(manifest)
+		self._save(manifest)
+
+	def clear(self):
+		"""Drop every cached rendering"""
+		shutil.rmtree(self.directory, ignore_errors=True)
+
+	def size(self) -> int:
+		"""Total bytes of the cached files"""
+		return sum(entry["size"] for entry in self._load().values())
+
+	def _evict(self, manifest: Dict[str, Dict]):
+		total = sum(entry["size"] for entry in manifest.values())
+		for key in sorted(manifest, key=lambda k: manifest[k]["last_used"]):
+			if total <= self.max_bytes:
+				break
+			entry = manifest.pop(key)
+			total -= entry["size"]
+			for cached_name in entry["files"].values():
+				try:
+					os.remove(os.path.join(self.directory, cached_name))
+				except FileNotFoundError:
+					pass
+
+	@staticmethod
+	def _same_file(cached_path: str, output_path: str) -> bool:
+		# copy2 keeps the modification time, so an untouched output matches its cached copy
+		try:
+			cached, output = os.stat(cached_path), os.stat(output_path)
+		except FileNotFoundError:
+			return False
+		return (cached.st_size, int(cached.st_mtime)) == (output.st_size, int(output.st_mtime))
+
+	def _load(self) -> Dict[str, Dict]:
+		try:
+			with open(os.path.join(self.directory, self.MANIFEST), encoding="utf-8") as f:
+				return json.load(f)
+		except (FileNotFoundError, ValueError):
+			return {}
+
+	def _save(self, manifest: Dict[str, Dict]):
+		os.makedirs(self.directory, exist_ok=True)
+		path = os.path.join(self.directory, self.MANIFEST)
+		# Write then rename, so a concurrent reader never sees a partial manifest
+		temporary = f"{path}.{os.getpid()}.tmp"
+		with open(temporary, "w", encoding="utf-8") as f:
+			json.dump(manifest, f)
+		os.replace(temporary, path)